@@ -0,0 +1,212 @@
+"""
+Backtesting of the fare forecast models (Fare_Models): every route's most
+recent HOLDOUT_YEARS years are held out, each model projects them from the
+years before, and the projections are compared with the actual average fares.
+Routes are evaluated in a pool of worker processes.
+
+    python -m Fare_Backtest --csv "US Airline Flight Routes and Fares 1993-2024.csv" --holdout 2 --workers 4
+
+Reported per model: MAPE, MAE, RMSE and bias (mean signed percent error) over
+all held-out (route, Year, quarter) fares, coverage (share of those fares the
+model projected) and cost (forecast time per route, measured in the workers).
+
+Held-out fares of stale or sparse quarters (see stale_quarters) are counted
+and reported; growth_rate projects them badly, as it compounds one quarter's
+average yearly change over every year since its latest fare. --skip-stale
+leaves them out of every model's scores.
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Fare_Models import MODELS, get_model
+from Fare_Projection import HISTORY_YEARS, add_percent_increase, route_average_fares
+from Flight_Dataset import CSV_PATH, load_flights
+
+
+# Most recent years of the data held out from training
+HOLDOUT_YEARS = 2
+
+# Routes need fares in at least this many years before the held-out ones
+MIN_TRAIN_YEARS = 2
+
+# Quarters with fewer year-over-year changes than this in their last
+# HISTORY_YEARS training years are sparse (see stale_quarters)
+MIN_YOY_POINTS = 2
+
+# Most routes per task sent to a worker process
+BACKTEST_CHUNK_ROUTES = 2000
+
+_METRICS = ("points", "missing", "abs_percent", "abs_error", "squared_error", "percent", "seconds", "routes")
+
+
+def split_route(avg_fare_results, test_years):
+    """(training rows, {(Year, quarter): actual average fare} of `test_years`) of one route."""
+    train = [row for row in avg_fare_results if row['Year'] < test_years[0]]
+    actual = {
+        (row['Year'], row['quarter']): row['average_fare'] for row in avg_fare_results
+        if row['Year'] in test_years and row['average_fare'] is not None and row['average_fare'] > 0
+    }
+    return train, actual
+
+
+def stale_quarters(train, last_train_year):
+    """
+    Quarters of a route's training rows whose latest fare is older than
+    `last_train_year`, or with fewer than MIN_YOY_POINTS year-over-year
+    changes in the HISTORY_YEARS years up to it.
+    """
+    window = range(last_train_year - HISTORY_YEARS + 1, last_train_year + 1)
+    latest, changes = {}, {}
+    # add_percent_increase() adds a key to its rows: work on copies
+    for row in add_percent_increase([dict(row) for row in train]):
+        quarter = row['quarter']
+        changes.setdefault(quarter, 0)
+        if row['average_fare'] is not None and row['average_fare'] > 0:
+            latest[quarter] = row['Year']      # rows come oldest year first per quarter
+        if row['Year'] in window and row['percent_increase'] is not None:
+            changes[quarter] += 1
+    return {
+        quarter for quarter, count in changes.items()
+        if latest.get(quarter, last_train_year - 1) < last_train_year or count < MIN_YOY_POINTS
+    }
+
+
+def _evaluate_routes(models, routes, test_years):
+    """
+    Worker: run every model on `routes` ([(training rows, actual fares)]).
+    Returns {model name: {metric: total}} for _METRICS.
+    """
+    totals = {}
+    for model in models:
+        total = totals[model.name] = dict.fromkeys(_METRICS, 0)
+        for train, actual in routes:
+            start = time.perf_counter()
+            projection = model.project(train, test_years)
+            total['seconds'] += time.perf_counter() - start
+            total['routes'] += 1
+
+            projected = {(row['Year'], row['quarter']): row['projected_fare'] for row in projection}
+            for key, fare in actual.items():
+                forecast = projected.get(key)
+                if forecast is None:
+                    total['missing'] += 1
+                    continue
+                error = forecast - fare
+                total['points'] += 1
+                total['abs_percent'] += abs(error) / fare * 100
+                total['percent'] += error / fare * 100
+                total['abs_error'] += abs(error)
+                total['squared_error'] += error * error
+    return totals
+
+
+def backtest(flights, models=None, holdout_years=HOLDOUT_YEARS, workers=None, skip_stale=False):
+    """
+    Backtest `models` (Fare_Models instances; default: one of each in MODELS)
+    on a flight table. `workers` processes evaluate chunks of routes (None: one
+    per CPU, 1: in this process). Returns one dict per model with name, model,
+    routes, points, mape, mae, rmse, bias, coverage, us_per_route, stale (share
+    of the held-out fares from stale_quarters()) and skip_stale (whether those
+    were left out of the scores).
+    """
+    models = list(models) if models is not None else [model() for model in MODELS.values()]
+    averages = route_average_fares(flights)
+    last_year = max(row['Year'] for rows in averages.values() for row in rows)
+    test_years = list(range(last_year - holdout_years + 1, last_year + 1))
+
+    routes = []
+    held_out = stale_points = 0
+    for avg_fare_results in averages.values():
+        train, actual = split_route(avg_fare_results, test_years)
+        if not actual or len({row['Year'] for row in train}) < MIN_TRAIN_YEARS:
+            continue
+        stale = stale_quarters(train, test_years[0] - 1)
+        flagged = [key for key in actual if key[1] in stale]
+        held_out += len(actual)
+        stale_points += len(flagged)
+        if skip_stale:
+            for key in flagged:
+                del actual[key]
+        if actual:
+            routes.append((train, actual))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # A few chunks per worker, so uneven routes still keep every worker busy
+    size = max(1, min(BACKTEST_CHUNK_ROUTES, len(routes) // (workers * 4)))
+    chunks = [routes[i:i + size] for i in range(0, len(routes), size)]
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            partials = list(pool.map(_evaluate_routes, [models] * len(chunks), chunks, [test_years] * len(chunks)))
+    else:
+        partials = [_evaluate_routes(models, chunk, test_years) for chunk in chunks]
+
+    results = []
+    for model in models:
+        total = dict.fromkeys(_METRICS, 0)
+        for partial in partials:
+            for metric, value in partial[model.name].items():
+                total[metric] += value
+        points = total['points']
+        results.append({
+            'name': model.name,
+            'model': repr(model),
+            'test_years': test_years,
+            'routes': total['routes'],
+            'points': points,
+            'mape': total['abs_percent'] / points if points else None,
+            'mae': total['abs_error'] / points if points else None,
+            'rmse': math.sqrt(total['squared_error'] / points) if points else None,
+            'bias': total['percent'] / points if points else None,
+            'coverage': points / (points + total['missing']) if points + total['missing'] else None,
+            'us_per_route': total['seconds'] / total['routes'] * 1e6 if total['routes'] else None,
+            'stale': stale_points / held_out if held_out else None,
+            'skip_stale': skip_stale,
+        })
+    return results
+
+
+def format_report(results):
+    """The backtest results as a text table, most accurate model (lowest MAPE) first."""
+    lines = [f"{'model':16s} {'MAPE %':>8s} {'MAE':>8s} {'RMSE':>8s} {'bias %':>8s} {'coverage':>9s} {'us/route':>9s}"]
+    for r in sorted(results, key=lambda r: (r['mape'] is None, r['mape'])):
+        if r['points']:
+            lines.append(f"{r['name']:16s} {r['mape']:8.2f} {r['mae']:8.2f} {r['rmse']:8.2f} {r['bias']:+8.2f} "
+                         f"{r['coverage']:9.1%} {r['us_per_route']:9.1f}")
+        else:
+            lines.append(f"{r['name']:16s} {'-':>8s}")
+    if results and results[0]['stale']:
+        lines.append(f"{results[0]['stale']:.1%} of the held-out fares are in stale or sparse quarters "
+                     f"(latest fare before the last training year, or fewer than {MIN_YOY_POINTS} yearly "
+                     f"changes in the last {HISTORY_YEARS} training years)")
+        lines.append("  left out of the scores" if results[0]['skip_stale'] else
+                     "  growth_rate compounds their average change over the years since their latest fare; "
+                     "--skip-stale leaves them out")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the fare forecast models on held-out recent years")
+    parser.add_argument("--csv", default=CSV_PATH, help="Flight fare CSV")
+    parser.add_argument("--holdout", type=int, default=HOLDOUT_YEARS, help="most recent years to hold out")
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=list(MODELS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--skip-stale", action="store_true",
+                        help="leave out held-out fares of stale or sparse quarters (see stale_quarters)")
+    args = parser.parse_args()
+
+    flights = load_flights(args.csv)
+    start = time.perf_counter()
+    results = backtest(flights, [get_model(name) for name in args.models], args.holdout, args.workers,
+                       args.skip_stale)
+    if results:
+        print(f"{results[0]['routes']} routes, held out {results[0]['test_years']}, "
+              f"{time.perf_counter() - start:.1f}s")
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Headless fare-estimation engine: the questions the app's FAQ answers, for many
+routes per call and without Streamlit (batch jobs, services, benchmarks).
+
+    from Fare_Estimator import FareEstimator
+    estimator = FareEstimator()                  # the process-wide dataset
+    pairs = [("Chicago, IL", "Boston, MA (Metropolitan Area)"), ...]
+    estimator.project_routes(pairs)              # {pair: projection rows}
+    estimator.best_months(pairs)                 # {pair: ['July', 'August', 'September']}
+    estimator.compare_price(pairs[0], "July", 250.0)
+
+A route is answered from its direct projection, or from the best 1-stop
+itinerary's when it has none (FlightDataset.route_projections). Answers are
+cached per route in the dataset's result cache and shared with the app.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from Fare_Projection import PROJECTION_YEARS, best_quarter
+from Flight_Dataset import get_dataset
+
+
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December']
+
+MONTH_QUARTER = {month: i // 3 + 1 for i, month in enumerate(MONTHS)}
+
+QUARTER_MONTHS = {quarter: MONTHS[3 * (quarter - 1):3 * quarter] for quarter in (1, 2, 3, 4)}
+
+# A current price below this share of the projected fare is a strong "buy now"
+BUY_NOW_RATIO = 0.7
+
+# Threads that compute exact answers while approximate ones are shown (see refine)
+_refinements = ThreadPoolExecutor(max_workers=2, thread_name_prefix="refine")
+
+
+def quarter_fares(projection, quarter):
+    """Projection rows of one quarter for PROJECTION_YEARS, oldest year first."""
+    return sorted(
+        (row for row in projection or [] if row.get('quarter') == quarter and row.get('Year') in PROJECTION_YEARS),
+        key=lambda x: x.get('Year'))
+
+
+def price_advice(price, projected_fare):
+    """
+    "buy now" (price under BUY_NOW_RATIO of the projected fare), "wait" (price
+    above it) or "buy"; None without a positive projected fare.
+    """
+    if not isinstance(projected_fare, (int, float)) or projected_fare <= 0:
+        return None
+    if price < projected_fare * BUY_NOW_RATIO:
+        return "buy now"
+    if price > projected_fare:
+        return "wait"
+    return "buy"
+
+
+def projection_best_months(projection, year=PROJECTION_YEARS[-1]):
+    """Months of the quarter with the lowest projected fare in `year`; [] if unknown."""
+    return QUARTER_MONTHS.get(best_quarter(projection or [], year), [])
+
+
+def projection_price_comparison(projection, month, price, year=PROJECTION_YEARS[-1]):
+    """compare_price() for a route's projection rows."""
+    projected_fare = None
+    for row in quarter_fares(projection, MONTH_QUARTER[month]):
+        if row.get('Year') == year:
+            projected_fare = row.get('projected_fare')
+            break
+    advice = price_advice(price, projected_fare)
+    if advice is None:
+        return None
+    return {'projected_fare': projected_fare, 'advice': advice}
+
+
+class FareEstimator:
+    def __init__(self, dataset=None):
+        # Defaults to the dataset shared with the app (loaded on first use)
+        self.dataset = dataset if dataset is not None else get_dataset()
+
+    def project_routes(self, pairs):
+        """{(origin, dest): projected 2025/2026 fares per quarter}; [] for routes without data."""
+        return {pair: projection or [] for pair, projection in self.dataset.route_projections(pairs).items()}
+
+    def approximate_routes(self, pairs):
+        """
+        {(origin, dest): projection estimated from the dataset's sample, with
+        projected_fare_low/high}; None where there is no sample or direct route.
+        """
+        return {pair: self.dataset.approximate_projection(*pair) for pair in dict.fromkeys(pairs)}
+
+    def refine(self, pairs):
+        """project_routes(pairs) in a background thread; returns its concurrent.futures.Future."""
+        return _refinements.submit(self.project_routes, list(pairs))
+
+    def month_fares(self, pairs, month):
+        """{(origin, dest): projection rows of `month`'s quarter for PROJECTION_YEARS}."""
+        quarter = MONTH_QUARTER[month]
+        return {pair: quarter_fares(projection, quarter) for pair, projection in self.project_routes(pairs).items()}
+
+    def best_months(self, pairs, year=PROJECTION_YEARS[-1]):
+        """{(origin, dest): months of the quarter with the lowest projected fare in `year`}; [] if unknown."""
+        # Projects the routes that are not cached yet in one batch
+        self.dataset.route_projections(pairs)
+        return {
+            pair: QUARTER_MONTHS.get(self.dataset.best_quarter(*pair, year=year), [])
+            for pair in dict.fromkeys(pairs)
+        }
+
+    def compare_price(self, pair, month, price, year=PROJECTION_YEARS[-1]):
+        """
+        Buy-or-wait answer for a current `price` on a route, against the
+        projected fare of `month`'s quarter in `year`: {'projected_fare': ...,
+        'advice': "buy now" | "wait" | "buy"}, or None without a projected fare.
+        """
+        return projection_price_comparison(self.project_routes([pair])[pair], month, price, year)
@@ -0,0 +1,151 @@
+"""
+Pluggable fare forecast models. A model turns a route's average fare per
+(Year, quarter) (rows of Year, quarter and average_fare, as from
+Fare_Projection.average_fares) into projection rows for the asked years:
+
+    from Fare_Models import get_model
+    project_route(route, model=get_model("seasonal_trend"))
+
+    growth_rate      the app's projection: the last HISTORY_YEARS years' average
+                     year-over-year change, compounded from the latest fare
+    exp_smoothing    Holt's linear exponential smoothing per quarter
+    seasonal_trend   least-squares trend over recent years shared by the four
+                     quarters, with one level per quarter
+
+Fare_Backtest measures their accuracy and cost on held-out years.
+"""
+from Fare_Projection import HISTORY_YEARS, PROJECTION_YEARS, add_percent_increase, project_quarters
+
+
+class ForecastModel:
+    """
+    Base class: subclasses set `name` and implement forecast(). project()
+    returns rows like Fare_Projection.project_quarters(): Year, quarter,
+    projected_fare and avg_percent_increase (here the compound yearly change
+    from the quarter's latest fare), sorted by quarter, then Year.
+    """
+    name = None
+
+    def forecast(self, series, years):
+        """
+        {quarter: {year: fare}} from {quarter: [(Year, average fare), ...]}
+        (positive fares, oldest year first).
+        """
+        raise NotImplementedError
+
+    def project(self, avg_fare_results, years=PROJECTION_YEARS):
+        series = {}
+        for row in sorted(avg_fare_results, key=lambda x: x['Year']):
+            fare = row['average_fare']
+            if fare is not None and fare > 0:
+                series.setdefault(row['quarter'], []).append((row['Year'], fare))
+
+        projection_results = []
+        for quarter, fares in self.forecast(series, years).items():
+            base_year, base_fare = series[quarter][-1]
+            for year, fare in fares.items():
+                fare = max(fare, 0.0)
+                percent = 0.0
+                if year > base_year and fare > 0:
+                    percent = ((fare / base_fare) ** (1 / (year - base_year)) - 1) * 100
+                projection_results.append({
+                    'Year': year,
+                    'quarter': quarter,
+                    'projected_fare': round(fare, 2),
+                    'avg_percent_increase': round(percent, 2)
+                })
+        return sorted(projection_results, key=lambda x: (x['quarter'], x['Year']))
+
+    def __repr__(self):
+        params = ", ".join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"{type(self).__name__}({params})"
+
+
+class GrowthRateModel(ForecastModel):
+    """
+    The app's projection (Fare_Projection.project_quarters), unchanged. A
+    quarter whose latest fare is years old, or whose average change rests on
+    one or two large yearly jumps, has that change compounded over every year
+    since its latest fare, which can miss by several times the fare
+    (Fare_Backtest reports such quarters; see stale_quarters).
+    """
+    name = "growth_rate"
+
+    def project(self, avg_fare_results, years=PROJECTION_YEARS):
+        # add_percent_increase() adds a key to its rows: work on copies
+        return project_quarters(add_percent_increase([dict(row) for row in avg_fare_results]), years)
+
+
+class ExponentialSmoothingModel(ForecastModel):
+    """
+    Holt's linear method on each quarter's yearly fares: the level follows the
+    fares with weight `alpha`, the trend (change per year) follows the level's
+    changes with weight `beta`. Missing years are bridged with the trend.
+    """
+    name = "exp_smoothing"
+
+    def __init__(self, alpha=0.5, beta=0.3):
+        self.alpha = alpha
+        self.beta = beta
+
+    def forecast(self, series, years):
+        forecasts = {}
+        for quarter, fares in series.items():
+            last_year, level = fares[0]
+            trend = 0.0
+            for year, fare in fares[1:]:
+                gap = year - last_year
+                new_level = self.alpha * fare + (1 - self.alpha) * (level + gap * trend)
+                trend = self.beta * (new_level - level) / gap + (1 - self.beta) * trend
+                level, last_year = new_level, year
+            forecasts[quarter] = {year: level + (year - last_year) * trend for year in years}
+        return forecasts
+
+
+class SeasonalTrendModel(ForecastModel):
+    """
+    Linear trend over the last `window` years of data, fitted by least squares
+    to all quarters at once (one slope) with a separate level per quarter, so
+    sparse quarters borrow the trend of the others.
+    """
+    name = "seasonal_trend"
+
+    def __init__(self, window=2 * HISTORY_YEARS):
+        self.window = window
+
+    def forecast(self, series, years):
+        if not series:
+            return {}
+        first_year = max(fares[-1][0] for fares in series.values()) - self.window + 1
+        recent = {}
+        for quarter, fares in series.items():
+            # At least the latest fare of every quarter, even if it is older than the window
+            recent[quarter] = [(y, f) for y, f in fares if y >= first_year] or fares[-1:]
+
+        # Pooled slope: per-quarter deviations from the quarter's mean year and fare
+        means = {}
+        sxy = sxx = 0.0
+        for quarter, fares in recent.items():
+            mean_year = sum(y for y, _ in fares) / len(fares)
+            mean_fare = sum(f for _, f in fares) / len(fares)
+            means[quarter] = (mean_year, mean_fare)
+            for y, f in fares:
+                sxy += (y - mean_year) * (f - mean_fare)
+                sxx += (y - mean_year) ** 2
+        slope = sxy / sxx if sxx else 0.0
+        return {
+            quarter: {year: mean_fare + slope * (year - mean_year) for year in years}
+            for quarter, (mean_year, mean_fare) in means.items()
+        }
+
+
+# Name -> model class, for get_model() and command lines
+MODELS = {model.name: model for model in (GrowthRateModel, ExponentialSmoothingModel, SeasonalTrendModel)}
+
+
+def get_model(name, **params):
+    """A model instance by name (see MODELS), with optional parameters."""
+    try:
+        return MODELS[name](**params)
+    except KeyError:
+        raise ValueError(f"Unknown forecast model {name!r} (expected one of {', '.join(MODELS)})") from None
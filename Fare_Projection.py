@@ -0,0 +1,473 @@
+"""
+Fare projections for direct routes and connecting itineraries.
+
+The projection for a route averages the fare per (Year, quarter), takes the
+year-over-year percent change per quarter, averages that change over the last
+five years and compounds the latest quarter fare forward to 2025 and 2026.
+Other forecast models (Fare_Models) can be passed to project_route() and
+project_routes(); Fare_Backtest compares them on held-out years.
+
+Run as a batch job to precompute every route into a lookup artifact:
+
+    python -m Fare_Projection --csv "US Airline Flight Routes and Fares 1993-2024.csv"
+"""
+import argparse
+import math
+import time
+from statistics import NormalDist
+
+from Mini_DataFrame import MyTable
+
+
+# Years the app answers questions about
+PROJECTION_YEARS = [2025, 2026]
+
+# Number of most recent years whose YoY change is averaged
+HISTORY_YEARS = 5
+
+PROJECTION_COLUMNS = ['Year', 'quarter', 'projected_fare', 'avg_percent_increase']
+
+
+def projections_path_for(csv_path):
+    """Precomputed projection artifact, written next to the CSV."""
+    return csv_path + ".projections.mytable"
+
+
+def average_fares(route):
+    """Average fare per (Year, quarter) of a route table, as a list of dicts."""
+    avg_fare_table = route.groupby(['Year', 'quarter']).agg({'fare': 'mean'})
+    return [
+        {'Year': row.get('Year'), 'quarter': row.get('quarter'), 'average_fare': row.get('fare_mean')}
+        for row in avg_fare_table.rows
+    ]
+
+
+def add_percent_increase(avg_fare_results):
+    """
+    Add 'percent_increase' (vs. the previous available year of the same quarter)
+    to each row. Returns the rows sorted by quarter, then Year.
+    """
+    # Group by quarter to calculate year-over-year changes
+    quarter_data = {}
+    for row in avg_fare_results:
+        quarter_data.setdefault(row['quarter'], []).append(row)
+
+    final_results = []
+    for quarter in sorted(quarter_data.keys()):
+        quarter_rows = sorted(quarter_data[quarter], key=lambda x: x['Year'])
+        for i, row in enumerate(quarter_rows):
+            if i == 0:
+                # First year for this quarter, no previous year to compare
+                row['percent_increase'] = None
+            else:
+                prev_year_fare = quarter_rows[i-1]['average_fare']
+                current_fare = row['average_fare']
+                if prev_year_fare is not None and current_fare is not None and prev_year_fare > 0:
+                    percent_increase = ((current_fare - prev_year_fare) / prev_year_fare) * 100
+                    row['percent_increase'] = round(percent_increase, 2)
+                else:
+                    row['percent_increase'] = None
+            final_results.append(row)
+    return final_results
+
+
+def history_window(final_results):
+    """The last HISTORY_YEARS years (inclusive) of the data, e.g. [2020, ..., 2024]."""
+    max_year = max(row['Year'] for row in final_results)
+    return list(range(max_year - HISTORY_YEARS + 1, max_year + 1))
+
+
+def project_quarters(final_results, years=PROJECTION_YEARS):
+    """
+    Project `years` (PROJECTION_YEARS) for every quarter from rows produced by
+    add_percent_increase(). Returns rows sorted by quarter, then Year.
+    """
+    if not final_results:
+        return []
+    last_years = history_window(final_results)
+
+    quarter_data = {}
+    for row in final_results:
+        quarter_data.setdefault(row['quarter'], []).append(row)
+
+    projection_results = []
+    for quarter in sorted(quarter_data.keys()):
+        quarter_rows = sorted(quarter_data[quarter], key=lambda x: x['Year'])
+
+        # Average percentage increase over the last years (0% if no data)
+        percent_increases = [
+            row['percent_increase'] for row in quarter_rows
+            if row['Year'] in last_years and row['percent_increase'] is not None
+        ]
+        avg_percent_increase = sum(percent_increases) / len(percent_increases) if percent_increases else 0
+
+        # The most recent year's fare for this quarter is the base for projection
+        most_recent_row = None
+        for row in reversed(quarter_rows):
+            if row['average_fare'] is not None and row['average_fare'] > 0:
+                most_recent_row = row
+                break
+        if not most_recent_row:
+            continue
+
+        current_fare = most_recent_row['average_fare']
+        current_year = most_recent_row['Year']
+        for proj_year in years:
+            # Apply average percentage increase for each year from the base year
+            projected_fare = current_fare
+            for _ in range(proj_year - current_year):
+                projected_fare = projected_fare * (1 + avg_percent_increase / 100)
+
+            projection_results.append({
+                'Year': proj_year,
+                'quarter': quarter,
+                'projected_fare': round(projected_fare, 2),
+                'avg_percent_increase': round(avg_percent_increase, 2)
+            })
+            current_fare = projected_fare
+            current_year = proj_year
+
+    return sorted(projection_results, key=lambda x: (x['quarter'], x['Year']))
+
+
+def best_quarter(projection, year=PROJECTION_YEARS[-1]):
+    """Quarter with the lowest projected fare in `year` (the earliest one on ties), or None."""
+    best = None
+    min_fare = float('inf')
+    for row in sorted((row for row in projection if row.get('Year') == year), key=lambda x: x.get('quarter', 0)):
+        fare = row.get('projected_fare')
+        if isinstance(fare, (int, float)) and fare < min_fare:
+            min_fare = fare
+            best = row.get('quarter')
+    return best
+
+
+def project_route(route, model=None):
+    """
+    Live projection for one route table (rows of a single city1 -> city2 pair),
+    with a Fare_Models forecast model (None: the growth-rate projection above).
+    """
+    if model is not None:
+        return model.project(average_fares(route))
+    return project_quarters(add_percent_increase(average_fares(route)))
+
+
+def project_sampled_route(sample, confidence=0.95):
+    """
+    Approximate projection for one route from its rows of a StratifiedSample:
+    rows like project_route() plus 'projected_fare_low' and
+    'projected_fare_high', a `confidence` interval of the projected fare.
+
+    The standard error of each sampled quarterly average (from its confidence
+    bounds) is carried through the year-over-year changes and the compounding
+    with the delta method: the projection is recomputed with each average moved
+    one standard error up and down. Bounds of the averages projected on their
+    own would mostly cancel out in the year-over-year changes.
+    """
+    averages = sample.groupby(['Year', 'quarter']).agg({'fare': 'mean'}, confidence=confidence).rows
+    projection = project_quarters(add_percent_increase([
+        {'Year': row['Year'], 'quarter': row['quarter'], 'average_fare': row['fare_mean']}
+        for row in averages
+    ]))
+    if not projection:
+        return []
+    last_years = history_window(averages)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    quarter_data = {}
+    for row in averages:
+        quarter_data.setdefault(row['quarter'], []).append(row)
+
+    bounds = {}
+    for quarter, quarter_rows in quarter_data.items():
+        quarter_rows.sort(key=lambda x: x['Year'])
+        years = [row['Year'] for row in quarter_rows]
+        fares = [row['fare_mean'] for row in quarter_rows]
+        errors = [
+            (row['fare_mean_high'] - row['fare_mean_low']) / (2 * z) if row['fare_mean'] is not None and z else 0.0
+            for row in quarter_rows
+        ]
+        # Only the years of the history window, the year before it and the
+        # base fare change the projection; earlier years stay as estimated
+        first = next((i for i, year in enumerate(years) if year >= last_years[0]), len(years))
+        first = max(first - 1, 0)
+        if not any(fare is not None and fare > 0 for fare in fares[first:]):
+            first = 0
+        years, fares, errors = years[first:], fares[first:], errors[first:]
+
+        # Delta method: each average moved by one standard error either way
+        centre = dict(_compound_quarter(years, fares, last_years))
+        variance = dict.fromkeys(centre, 0.0)
+        for i, error in enumerate(errors):
+            if not error:
+                continue
+            moved = {}
+            for sign in (1, -1):
+                shifted = fares[:i] + [fares[i] + sign * error] + fares[i + 1:]
+                for proj_year, projected_fare in _compound_quarter(years, shifted, last_years):
+                    moved.setdefault(proj_year, []).append(projected_fare)
+            for proj_year, (up, down) in moved.items():
+                variance[proj_year] += ((up - down) / 2) ** 2
+        for proj_year, fare in centre.items():
+            half = z * math.sqrt(variance[proj_year])
+            bounds[(proj_year, quarter)] = (fare - half, fare + half)
+
+    results = []
+    for row in projection:
+        low, high = bounds.get((row['Year'], row['quarter']), (row['projected_fare'],) * 2)
+        results.append({**row, 'projected_fare_low': round(min(low, row['projected_fare']), 2),
+                        'projected_fare_high': round(max(high, row['projected_fare']), 2)})
+    return results
+
+
+def _compound_quarter(years, fares, last_years, proj_years=PROJECTION_YEARS):
+    """
+    [(Year, projected fare)] of one quarter from its average fares per year
+    (ascending), as project_quarters(add_percent_increase(...)) computes them.
+    """
+    percent_increases = []
+    for i in range(1, len(fares)):
+        prev_year_fare, current_fare = fares[i - 1], fares[i]
+        if years[i] in last_years and prev_year_fare is not None and current_fare is not None and prev_year_fare > 0:
+            percent_increases.append(round((current_fare - prev_year_fare) / prev_year_fare * 100, 2))
+    avg_percent_increase = sum(percent_increases) / len(percent_increases) if percent_increases else 0
+
+    for i in range(len(fares) - 1, -1, -1):
+        if fares[i] is not None and fares[i] > 0:
+            current_fare, current_year = fares[i], years[i]
+            break
+    else:
+        return []
+    projected = []
+    for proj_year in proj_years:
+        for _ in range(proj_year - current_year):
+            current_fare = current_fare * (1 + avg_percent_increase / 100)
+        projected.append((proj_year, current_fare))
+        current_year = proj_year
+    return projected
+
+
+def connection_fare_changes(connections):
+    """
+    Total fare of the best connection per (Year, quarter) with its percent
+    change vs. the previous available year of the same quarter, as rows of
+    Year, quarter, total_fare and percent_increase sorted by quarter, then Year.
+    """
+    quarter_data = {}
+    for row in connections:
+        quarter_data.setdefault(row['quarter'], []).append(row)
+
+    results = []
+    for quarter in sorted(quarter_data.keys()):
+        quarter_rows = sorted(quarter_data[quarter], key=lambda x: x['Year'])
+        for i, row in enumerate(quarter_rows):
+            percent_increase = None
+            if i > 0:
+                prev_year_fare = quarter_rows[i-1]['fare_total']
+                current_fare = row['fare_total']
+                if prev_year_fare is not None and current_fare is not None and prev_year_fare > 0:
+                    percent_increase = round(((current_fare - prev_year_fare) / prev_year_fare) * 100, 2)
+            results.append({
+                'Year': row['Year'],
+                'quarter': row['quarter'],
+                'total_fare': row['fare_total'],
+                'percent_increase': percent_increase
+            })
+    return results
+
+
+def project_connections(connections):
+    """
+    Project PROJECTION_YEARS per quarter from the best connection per
+    (Year, quarter) (rows with Year, quarter and fare_total). Unlike
+    project_quarters(), the change is only taken against exactly the previous
+    year, and only years after the latest data are projected.
+    Returns rows sorted by quarter, then Year.
+    """
+    if not connections:
+        return []
+    last_years = history_window(connections)
+
+    quarter_data = {}
+    for row in connections:
+        quarter_data.setdefault(row['quarter'], []).append(row)
+
+    projection_results = []
+    for quarter in sorted(quarter_data.keys()):
+        quarter_rows = sorted(quarter_data[quarter], key=lambda x: x['Year'])
+        fare_by_year = {row['Year']: row['fare_total'] for row in quarter_rows}
+
+        # Average year-over-year change over the last years (0% if no data)
+        percent_increases = []
+        for row in quarter_rows:
+            if row['Year'] not in last_years:
+                continue
+            prev_fare = fare_by_year.get(row['Year'] - 1)
+            if prev_fare is not None and row['fare_total'] is not None and prev_fare > 0:
+                percent_increases.append(((row['fare_total'] - prev_fare) / prev_fare) * 100)
+        avg_percent_increase = sum(percent_increases) / len(percent_increases) if percent_increases else 0
+
+        # The most recent year's fare for this quarter is the base for projection
+        most_recent_row = None
+        for row in reversed(quarter_rows):
+            if row['fare_total'] is not None and row['fare_total'] > 0:
+                most_recent_row = row
+                break
+        if not most_recent_row:
+            continue
+
+        current_fare = most_recent_row['fare_total']
+        current_year = most_recent_row['Year']
+        for proj_year in PROJECTION_YEARS:
+            if proj_year <= current_year:
+                continue
+            projected_fare = current_fare
+            for _ in range(proj_year - current_year):
+                projected_fare = projected_fare * (1 + avg_percent_increase / 100)
+
+            projection_results.append({
+                'Year': proj_year,
+                'quarter': quarter,
+                'projected_fare': round(projected_fare, 2),
+                'avg_percent_increase': round(avg_percent_increase, 2)
+            })
+            current_fare = projected_fare
+            current_year = proj_year
+
+    return sorted(projection_results, key=lambda x: (x['quarter'], x['Year']))
+
+
+def route_average_fares(flights):
+    """{(city1, city2): average fare rows like average_fares()} of every route of a flight table."""
+    # One grouped pass gives the quarterly average fare of every route at once
+    averages = flights.groupby(['city1', 'city2', 'Year', 'quarter']).agg({'fare': 'mean'})
+
+    routes = {}
+    for row in averages.rows:
+        routes.setdefault((row['city1'], row['city2']), []).append({
+            'Year': row['Year'],
+            'quarter': row['quarter'],
+            'average_fare': row['fare_mean']
+        })
+    return routes
+
+
+def project_routes(flights, model=None):
+    """
+    Project every (city1, city2) pair of a flight table (or of some of its
+    rows) in one pass, with `model` as in project_route().
+    Returns {(city1, city2): projection rows}.
+    """
+    routes = route_average_fares(flights)
+    if model is not None:
+        return {route: model.project(avg_fare_results) for route, avg_fare_results in routes.items()}
+    return {
+        route: project_quarters(add_percent_increase(avg_fare_results))
+        for route, avg_fare_results in routes.items()
+    }
+
+
+def build_projection_table(flights):
+    """
+    Project every (city1, city2) pair of the flight table in one pass.
+    Returns a MyTable with city1, city2 and PROJECTION_COLUMNS.
+    """
+    projection_rows = []
+    for (city1, city2), projections in project_routes(flights).items():
+        for projection in projections:
+            projection_rows.append({'city1': city1, 'city2': city2, **projection})
+
+    return MyTable(['city1', 'city2'] + PROJECTION_COLUMNS, projection_rows)
+
+
+class RouteProjections:
+    """
+    Direct-route projections that follow appends to the flight table.
+
+    Keeps a running mean fare per (city1, city2, Year, quarter)
+    (MyTable.running_agg), so after new rows are appended refresh()
+    recomputes only the routes whose quarterly averages changed, without
+    regrouping the whole table.
+    """
+
+    def __init__(self, flights):
+        self._averages = flights.running_agg(['city1', 'city2', 'Year', 'quarter'], {'fare': 'mean'})
+        self._periods = {}          # (city1, city2) -> set of (city1, city2, Year, quarter) keys
+        for key in self._averages.keys():
+            self._periods.setdefault(key[:2], set()).add(key)
+        self.projections = {}       # (city1, city2) -> projection rows recomputed by refresh()
+
+    def refresh(self):
+        """Recompute the routes that received rows since the last refresh; returns those routes."""
+        routes = set()
+        for key in self._averages.pop_changed():
+            route = key[:2]
+            self._periods.setdefault(route, set()).add(key)
+            routes.add(route)
+        for route in routes:
+            avg_fare_results = [
+                {'Year': key[2], 'quarter': key[3], 'average_fare': self._averages.get(key)['fare_mean']}
+                for key in self._periods[route]
+            ]
+            self.projections[route] = project_quarters(add_percent_increase(avg_fare_results))
+        return routes
+
+
+def merge_projections(projections, updates):
+    """
+    Projection table (city1, city2 and PROJECTION_COLUMNS) with the routes in
+    `updates` ({(city1, city2): projection rows}) replaced.
+    """
+    rows = [row for row in projections.rows if (row['city1'], row['city2']) not in updates]
+    for (city1, city2), projection_rows in updates.items():
+        for projection in projection_rows:
+            rows.append({'city1': city1, 'city2': city2, **projection})
+    return MyTable(['city1', 'city2'] + PROJECTION_COLUMNS, rows)
+
+
+def write_projections(flights, csv_path, out_path=None):
+    """Build the projection artifact for the table loaded from `csv_path`; returns (path, number of rows)."""
+    out_path = out_path or projections_path_for(csv_path)
+    table = build_projection_table(flights)
+    # Tied to the CSV's mtime/size, so a new data drop makes it stale
+    table.to_cache(out_path, source=csv_path)
+    return out_path, len(table)
+
+
+def load_projections(csv_path, path=None):
+    """
+    Load the projection artifact with a (city1, city2) index, or return None if it
+    is missing or stale (the app then computes projections live).
+    """
+    try:
+        table = MyTable.from_cache(path or projections_path_for(csv_path), source=csv_path)
+    except (FileNotFoundError, ValueError):
+        return None
+    table.create_index(['city1', 'city2'])
+    return table
+
+
+def lookup_projection(projections, origin, dest):
+    """Projection rows (PROJECTION_COLUMNS) of one route from a loaded artifact."""
+    return [
+        {col: row[col] for col in PROJECTION_COLUMNS}
+        for row in projections.filter_eq(city1=origin, city2=dest).rows
+    ]
+
+
+def main():
+    # Imported here: Flight_Dataset itself imports this module
+    from Flight_Dataset import CSV_PATH, load_flights
+
+    parser = argparse.ArgumentParser(description="Precompute direct-route fare projections for every city pair")
+    parser.add_argument("--csv", default=CSV_PATH, help="Flight fare CSV")
+    parser.add_argument("--out", help="Artifact path (default: next to the CSV)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, n_rows = write_projections(load_flights(args.csv), args.csv, args.out)
+    print(f"Wrote {n_rows} projections to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
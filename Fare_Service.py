@@ -0,0 +1,334 @@
+"""
+Asyncio HTTP service for fare queries, backed by the shared FlightDataset
+(stdlib only, JSON responses):
+
+    python -m Fare_Service --port 8600
+    curl "localhost:8600/projection?origin=Chicago,%20IL&dest=Boston,%20MA%20(Metropolitan%20Area)"
+
+    GET /projection?origin=...&dest=...                 projected 2025/2026 fares per quarter
+    GET /best-months?origin=...&dest=...[&year=2026]    months of the cheapest quarter
+    GET /compare?origin=...&dest=...&month=July&price=250[&year=2026]
+    GET /stats                                          batching and result cache counters
+
+Routes asked for within BATCH_WINDOW seconds of each other are answered by
+one FlightDataset.route_projections() call, run in a thread so the event
+loop keeps accepting requests. Connecting-itinerary searches (routes without
+a direct projection) go to a pool of worker processes that each load the
+dataset of `csv_path` (from its binary cache), as long as the service's dataset
+holds exactly that CSV's rows; otherwise (an injected table, rows added by
+append() only, a CSV changed since) they run in the batch thread. Results land
+in the dataset's result cache, so repeated routes skip the batch altogether.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from Fare_Estimator import MONTH_QUARTER, projection_best_months, projection_price_comparison
+from Fare_Projection import PROJECTION_YEARS
+from Flight_Dataset import CSV_PATH, get_dataset
+from Mini_DataFrame import MyTable
+
+
+# Seconds a route query waits for others to share its batch
+BATCH_WINDOW = 0.005
+
+# A batch is dispatched right away once it has this many routes
+BATCH_MAX_ROUTES = 256
+
+# Worker processes for connecting-itinerary searches; 0 searches in the batch thread
+SEARCH_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+# Requests larger than this are rejected
+MAX_HEADER_BYTES = 16 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class StaleDataset(RuntimeError):
+    """A search worker's dataset is not the one the service answers from."""
+
+
+def _search_connections(source, pairs):
+    """
+    Worker process: connection projections of `pairs` (None where there is no
+    itinerary) on the dataset of `source`, (csv_path, backend, signature).
+    Raises StaleDataset if the CSV is no longer the one of `signature`.
+    """
+    csv_path, backend, signature = source
+    dataset = get_dataset(csv_path, backend=backend)
+    if dataset.signature != signature:
+        raise StaleDataset(f"{csv_path} has changed")
+    return _connection_projections(dataset, pairs)
+
+
+def _connection_projections(dataset, pairs):
+    return [dataset.connection_projection(*pair) if dataset.connection_count(*pair) else None
+            for pair in pairs]
+
+
+class _Batcher:
+    """Collects route queries for `window` seconds and answers them with one call of `run(pairs)`."""
+
+    def __init__(self, run, window=BATCH_WINDOW, max_routes=BATCH_MAX_ROUTES):
+        self.run = run
+        self.window = window
+        self.max_routes = max_routes
+        self._pending = {}          # (origin, dest) -> future shared by every query for it
+        self._timer = None
+        self.batches = 0
+        self.routes = 0
+
+    def submit(self, pair):
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(pair)
+        if future is None:
+            future = self._pending[pair] = loop.create_future()
+            if len(self._pending) >= self.max_routes or self.window <= 0:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._dispatch)
+        return future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if pending:
+            asyncio.ensure_future(self._answer(pending))
+
+    async def _answer(self, pending):
+        self.batches += 1
+        self.routes += len(pending)
+        try:
+            results = await self.run(list(pending))
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for pair, future in pending.items():
+            if not future.done():
+                future.set_result(results[pair])
+
+
+class FareService:
+    def __init__(self, dataset=None, csv_path=CSV_PATH, search_workers=SEARCH_WORKERS, batch_window=BATCH_WINDOW):
+        self.csv_path = csv_path
+        self.dataset = dataset if dataset is not None else get_dataset(csv_path)
+        self.search_workers = search_workers
+        self.pool = ProcessPoolExecutor(max_workers=search_workers) if search_workers else None
+        self.batcher = _Batcher(self._project, window=batch_window)
+        self.requests = 0
+        self.cache_answers = 0
+
+    def close(self):
+        """Stop the search processes."""
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def _worker_source(self):
+        """(csv_path, backend, signature) the search workers load, or None if they cannot load this dataset's rows."""
+        dataset = self.dataset
+        if dataset.signature is None or dataset.signature_version != dataset.version:
+            return None
+        return self.csv_path, "memory" if isinstance(dataset.flights, MyTable) else "sqlite", dataset.signature
+
+    def _search(self, pairs):
+        """
+        route_projections() hook: spread the searches over the worker processes
+        (blocks its thread), or run them here when the workers would load other rows.
+        """
+        source = self._worker_source()
+        if source is None:
+            return _connection_projections(self.dataset, pairs)
+        chunk = max(1, len(pairs) // (self.search_workers * 4))
+        chunks = [pairs[i:i + chunk] for i in range(0, len(pairs), chunk)]
+        try:
+            return [projection for results in self.pool.map(_search_connections, [source] * len(chunks), chunks)
+                    for projection in results]
+        except StaleDataset:
+            return _connection_projections(self.dataset, pairs)
+
+    async def _project(self, pairs):
+        search = self._search if self.pool is not None else None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.dataset.route_projections(pairs, search=search))
+
+    async def projection(self, origin, dest):
+        """Projection rows of a route (None without data), from the cache or the next batch."""
+        pair = (origin, dest)
+        cached = self.dataset.cached_projection(origin, dest)
+        if cached is not None:
+            self.cache_answers += 1
+            return cached[0]
+        return await self.batcher.submit(pair)
+
+    async def handle(self, path, query):
+        """(status, JSON-able body) for one GET request."""
+        if path == "/stats":
+            return 200, self.stats()
+        if path not in ("/projection", "/best-months", "/compare"):
+            return 404, {"error": f"unknown path {path}"}
+
+        origin, dest = _param(query, "origin"), _param(query, "dest")
+        if origin not in self.dataset.origin_cities:
+            raise BadRequest(f"unknown origin {origin!r}")
+        if dest not in self.dataset.dest_cities:
+            raise BadRequest(f"unknown dest {dest!r}")
+        projection = await self.projection(origin, dest)
+        body = {"origin": origin, "dest": dest}
+        if path == "/projection":
+            body["projection"] = projection or []
+            return 200, body
+
+        try:
+            year = int(_param(query, "year", PROJECTION_YEARS[-1]))
+        except ValueError:
+            raise BadRequest("year must be an integer")
+        if path == "/best-months":
+            body["year"] = year
+            body["months"] = projection_best_months(projection, year)
+            return 200, body
+
+        month = _param(query, "month")
+        if month not in MONTH_QUARTER:
+            raise BadRequest(f"unknown month {month!r}")
+        try:
+            price = float(_param(query, "price"))
+        except ValueError:
+            raise BadRequest("price must be a number")
+        body.update(month=month, price=price, year=year,
+                    comparison=projection_price_comparison(projection, month, price, year))
+        return 200, body
+
+    def stats(self):
+        batcher = self.batcher
+        return {
+            "requests": self.requests,
+            "cache_answers": self.cache_answers,
+            "batches": batcher.batches,
+            "batched_routes": batcher.routes,
+            "routes_per_batch": batcher.routes / batcher.batches if batcher.batches else None,
+            "search_workers": self.search_workers,
+            "dataset_version": self.dataset.version,
+            "result_cache": self.dataset.results.stats(),
+        }
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive: answer GET requests until the client closes."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 400, {"error": "request header too large"}, keep_alive=False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await _respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length", "0")
+                if not length.isascii() or not length.isdigit():
+                    await _respond(writer, 400, {"error": "bad Content-Length"}, keep_alive=False)
+                    break
+                if int(length):
+                    try:
+                        await reader.readexactly(int(length))      # bodies are not used
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                self.requests += 1
+                if method != "GET":
+                    status, body = 405, {"error": "only GET is supported"}
+                else:
+                    url = urlsplit(target)
+                    try:
+                        status, body = await self.handle(url.path, parse_qs(url.query))
+                    except BadRequest as exc:
+                        status, body = 400, {"error": str(exc)}
+                    except Exception as exc:
+                        status, body = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                await _respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+
+def _param(query, name, default=None):
+    values = query.get(name)
+    if values:
+        return values[0]
+    if default is None:
+        raise BadRequest(f"missing parameter {name!r}")
+    return default
+
+
+async def _respond(writer, status, body, keep_alive):
+    payload = json.dumps(body).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload)
+    await writer.drain()
+
+
+async def serve(service, host="127.0.0.1", port=8600):
+    """Run `service` until cancelled (or sent SIGTERM)."""
+    try:
+        # Stop cleanly on `kill` too, so main() can shut down the search processes
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass        # Windows
+    server = await asyncio.start_server(service.serve_connection, host, port, limit=MAX_HEADER_BYTES)
+    address = server.sockets[0].getsockname()
+    # Flushed right away: benchmarks/load_test_service.py reads the port from it
+    print(f"Fare service listening on http://{address[0]}:{address[1]}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fare projections over HTTP")
+    parser.add_argument("--csv", default=CSV_PATH, help="Flight fare CSV")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=SEARCH_WORKERS,
+                        help="processes for connecting-itinerary searches (0: in the batch thread)")
+    parser.add_argument("--batch-window", type=float, default=BATCH_WINDOW, help="seconds (0: no batching)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    service = FareService(csv_path=args.csv, search_workers=args.workers, batch_window=args.batch_window)
+    print(f"Loaded {len(service.dataset.flights)} rows in {time.perf_counter() - start:.1f}s", flush=True)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+import argparse
+import csv
+import os
+import threading
+import time
+
+from Mini_DataFrame import CATEGORY, MyTable
+from Fare_Projection import (PROJECTION_YEARS, RouteProjections, best_quarter, load_projections, lookup_projection,
+                             merge_projections, project_connections, project_route, project_routes,
+                             project_sampled_route, projections_path_for)
+from Result_Cache import LRUCache
+from Route_Graph import RouteGraph
+from SQLite_Table import SQLiteTable
+
+
+CSV_PATH = "US Airline Flight Routes and Fares 1993-2024.csv"
+
+# Columns used by the app; only these are parsed from the CSV
+REQUIRED_COLUMNS = [
+    "Year",
+    "quarter",
+    "citymarketid_1",
+    "citymarketid_2",
+    "city1",
+    "city2",
+    "airportid_1",
+    "airportid_2",
+    "airport_1",
+    "airport_2",
+    "nsmiles",
+    "fare",
+    "fare_low"
+]
+
+# Column types, so the parser does not have to guess per cell. City and airport
+# names repeat a few hundred values: they are stored as dictionary codes
+FLIGHT_SCHEMA = {
+    "Year": int,
+    "quarter": int,
+    "citymarketid_1": int,
+    "citymarketid_2": int,
+    "city1": CATEGORY,
+    "city2": CATEGORY,
+    "airportid_1": int,
+    "airportid_2": int,
+    "airport_1": CATEGORY,
+    "airport_2": CATEGORY,
+    "nsmiles": float,
+    "fare": float,
+    "fare_low": float
+}
+
+# Processes that parse the CSV (MyTable.from_file workers); None uses every CPU.
+# Only files of several PARALLEL_MIN_BYTES per worker are split.
+LOAD_WORKERS = 1
+
+# Limits of the process-wide cache of per-route results (projections, best
+# quarter); least recently used routes are evicted first
+RESULT_CACHE_ENTRIES = 4096
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+RESULT_CACHE_TTL = None          # seconds an entry stays valid; None: until evicted
+
+# Tables with at least SAMPLE_MIN_ROWS rows also keep a stratified sample of up to
+# SAMPLE_ROWS_PER_STRATUM rows per (city1, city2, Year, quarter), for quick
+# approximate projections while the exact ones are computed; None disables it
+SAMPLE_MIN_ROWS = 2000000
+SAMPLE_ROWS_PER_STRATUM = 20
+
+# Where get_dataset() keeps the flight rows: "memory" (a MyTable) or "sqlite"
+# (an SQLiteTable in a file next to the CSV, for tables larger than RAM)
+DATA_BACKEND = "memory"
+
+# Indexes of the SQLite backend: route lookups use the first, arrivals the second
+SQLITE_INDEXES = [["city1", "city2", "Year", "quarter"], ["city2", "Year", "quarter"]]
+
+_MISSING = object()
+
+
+def cache_path_for(csv_path):
+    """Binary snapshot of the cleaned table, written next to the CSV."""
+    return csv_path + ".mytable"
+
+
+def sqlite_path_for(csv_path):
+    """SQLite file of the cleaned table (the "sqlite" backend), written next to the CSV."""
+    return csv_path + ".sqlite"
+
+
+def read_flights(csv_path, workers=None):
+    """
+    Parse the required columns of a flight CSV and drop rows with empty
+    cities/airports. `workers` defaults to LOAD_WORKERS. A ".parquet" path is
+    read with MyTable.from_parquet() instead (requires pyarrow).
+    """
+    if csv_path.endswith(".parquet"):
+        return MyTable.from_parquet(csv_path, columns=REQUIRED_COLUMNS).drop_missing(
+            columns=["city1", "city2", "airport_1", "airport_2"])
+    # One lazy query: only the required columns are parsed, and rows with
+    # empty cities/airports are dropped in the same pass
+    return (
+        MyTable.scan_file(csv_path, schema=FLIGHT_SCHEMA, workers=LOAD_WORKERS if workers is None else workers)
+        .select(REQUIRED_COLUMNS)
+        .drop_missing(columns=["city1", "city2", "airport_1", "airport_2"])
+        .collect()
+    )
+
+
+def load_flights(csv_path=CSV_PATH):
+    """
+    Load the selected, cleaned and typed flight table.
+    Reuses the binary cache while the CSV is unchanged; otherwise parses the CSV
+    and rewrites the cache. Raises FileNotFoundError if the CSV is missing.
+    """
+    cache_path = cache_path_for(csv_path)
+    try:
+        return MyTable.from_cache(cache_path, source=csv_path)
+    except (FileNotFoundError, ValueError):
+        # No cache yet, or the CSV changed since it was written
+        pass
+
+    flights = read_flights(csv_path)
+
+    try:
+        flights.to_cache(cache_path, source=csv_path)
+    except OSError:
+        # Read-only deployment: keep working from the parsed table
+        pass
+    return flights
+
+
+def load_flights_sqlite(csv_path=CSV_PATH):
+    """
+    The cleaned flight table as an SQLiteTable. Reuses the SQLite file while
+    the CSV is unchanged; otherwise bulk-loads the CSV into it again (rows
+    with empty cities/airports are skipped). Raises FileNotFoundError if the
+    CSV is missing.
+    """
+    db_path = sqlite_path_for(csv_path)
+    try:
+        return SQLiteTable.open(db_path, source=csv_path)
+    except (FileNotFoundError, ValueError):
+        # No file yet, or the CSV changed since it was written
+        pass
+    return SQLiteTable.from_file(csv_path, db_path, schema=FLIGHT_SCHEMA, usecols=REQUIRED_COLUMNS,
+                                 drop_missing=["city1", "city2", "airport_1", "airport_2"],
+                                 indexes=SQLITE_INDEXES)
+
+
+class FlightDataset:
+    """
+    Read-only bundle of the cleaned flight table and everything derived from it
+    that does not depend on user input: city option lists and route indexes.
+    One instance is shared by every Streamlit session in the process.
+    `flights` is a MyTable or an SQLiteTable (see DATA_BACKEND).
+    """
+
+    def __init__(self, flights, signature=None, projections=None, max_stops=2, results=None, partial=False):
+        self.flights = flights
+        self.signature = signature        # (mtime, size) of the CSV it was loaded from
+        self.projections = projections    # precomputed projection artifact, or None
+        # Most connections an itinerary search can answer from these rows
+        self.max_stops = max_stops
+        # True if `flights` holds only some cities' rows (see Flight_Shards), not all flights
+        self.partial = partial
+
+        # Persistent hash indexes for route lookups (cached on the table)
+        flights.create_index(["city1"])
+        flights.create_index(["city2"])
+        flights.create_index(["city1", "city2"])
+
+        # Option lists straight from the city dictionaries
+        self.origin_cities = sorted(flights.categories("city1"))
+        self.dest_cities = sorted(flights.categories("city2"))
+
+        # Connecting itineraries are searched on a graph built from the table on first use
+        self._graph = None
+
+        # Staleness marker: bumped by every append(); projection_versions maps
+        # each route whose projection an append changed to that version
+        self.version = 0
+        self.projection_versions = {}
+        # Version whose rows are those of the CSV `signature` describes (append_data
+        # appends to the CSV too; append() alone does not)
+        self.signature_version = 0
+        self._route_projections = None    # RouteProjections, created on the first append
+
+        # Per-route results shared by all sessions, keyed by (kind, route, ..., version);
+        # datasets over parts of one table can share a cache (see Flight_Shards)
+        if results is None:
+            results = LRUCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES, RESULT_CACHE_TTL)
+        self.results = results
+
+        # Stratified sample for approximate answers on very large tables (kept up to date by append)
+        self.sample = None
+        # SQLite answers route queries from its indexes: no sample needed
+        if SAMPLE_MIN_ROWS is not None and isinstance(flights, MyTable) and len(flights) >= SAMPLE_MIN_ROWS:
+            self.sample = flights.sample_by(["city1", "city2", "Year", "quarter"], size=SAMPLE_ROWS_PER_STRATUM)
+
+    def memory_usage(self):
+        """Bytes of the flight rows per column (MyTable.memory_usage), e.g. to size a cache of datasets."""
+        return self.flights.memory_usage()
+
+    @property
+    def graph(self):
+        """RouteGraph of the current table (built on first use)."""
+        graph = self._graph
+        if graph is None:
+            graph = self._graph = RouteGraph.from_table(self.flights)
+        return graph
+
+    def for_cities(self, origin, dest):
+        """The dataset answering questions about origin/dest: this one (see Flight_Shards.ShardStore)."""
+        return self
+
+    def departing(self, city):
+        """Rows with city1 == city."""
+        return self.flights.filter_eq(city1=city)
+
+    def arriving(self, city):
+        """Rows with city2 == city."""
+        return self.flights.filter_eq(city2=city)
+
+    def route(self, origin, dest):
+        """Direct rows from origin to dest."""
+        return self.flights.filter_eq(city1=origin, city2=dest)
+
+    def direct_projection(self, origin, dest):
+        """
+        Projected 2025/2026 fares per quarter for a direct route. Answered from the
+        precomputed artifact when it matches the CSV, otherwise computed live.
+        Results are cached (read-only, shared by all sessions).
+        """
+        return self.results.get_or_compute(
+            ("direct", origin, dest, self.version), lambda: self._direct_projection(origin, dest))
+
+    def _direct_projection(self, origin, dest):
+        if self._route_projections is not None:
+            updated = self._route_projections.projections.get((origin, dest))
+            if updated is not None:
+                return updated
+        if self.projections is not None:
+            return lookup_projection(self.projections, origin, dest)
+        return project_route(self.route(origin, dest))
+
+    def approximate_projection(self, origin, dest):
+        """
+        Direct projection estimated from the sample, with projected_fare_low/high
+        bounds (see project_sampled_route). None without a sample or direct rows.
+        """
+        if self.sample is None:
+            return None
+        return project_sampled_route(self.sample.filter_eq(city1=origin, city2=dest)) or None
+
+    def direct_projections(self, pairs):
+        """
+        {(origin, dest): direct projection} for many routes. Routes that are
+        neither cached nor answered by the artifact are projected together, in
+        one grouped pass over their rows gathered from the route index.
+        """
+        results = {}
+        live = []
+        for pair in dict.fromkeys(pairs):
+            cached = self.results.get(("direct", *pair, self.version), _MISSING)
+            if cached is not _MISSING:
+                results[pair] = cached
+            elif self.projections is not None or (
+                    self._route_projections is not None and pair in self._route_projections.projections):
+                results[pair] = self.direct_projection(*pair)
+            else:
+                live.append(pair)
+
+        if live:
+            index = self.flights.create_index(["city1", "city2"])
+            projected = project_routes(self.flights.take([i for pair in live for i in index.get(pair, [])]))
+            for pair in live:
+                results[pair] = projected.get(pair, [])
+                self.results.put(("direct", *pair, self.version), results[pair])
+        return results
+
+    def append(self, new_flights):
+        """
+        Add newly arrived rows (a table from read_flights) in place. Route
+        indexes and the running route/quarter fare averages are updated
+        incrementally and only the projections of routes in the new rows are
+        recomputed; the route graph is rebuilt on next use. Returns the set of
+        (city1, city2) routes whose projections changed.
+
+        The table is extended in place: tables returned earlier (route(),
+        departing(), ...) keep their rows, but reads of `flights` itself must
+        not overlap with an append. append_data() holds the registry lock;
+        callers of append() that share the dataset with readers must make
+        sure no request is being answered meanwhile.
+        """
+        if not isinstance(self.flights, MyTable):
+            raise TypeError("append() needs the in-memory backend (DATA_BACKEND = \"memory\")")
+        if self._route_projections is None:
+            self._route_projections = RouteProjections(self.flights)
+        self.flights.append_rows(new_flights)
+        routes = self._route_projections.refresh()
+
+        self.version += 1
+        self.results.clear()          # results of the previous version are never asked for again
+        for route in routes:
+            self.projection_versions[route] = self.version
+        self.origin_cities = sorted(self.flights.categories("city1"))
+        self.dest_cities = sorted(self.flights.categories("city2"))
+        self._graph = None            # rebuilt with the new rows on next use
+        return routes
+
+    def projections_changed(self, origin, dest, since_version):
+        """True if an append after `since_version` changed the direct projection of origin -> dest."""
+        return self.projection_versions.get((origin, dest), 0) > since_version
+
+    def projection_table(self):
+        """The projection artifact with every route recomputed by append() replaced, or None without one."""
+        if self.projections is None:
+            return None
+        if self._route_projections is None:
+            return self.projections
+        return merge_projections(self.projections, self._route_projections.projections)
+
+    def connections(self, origin, dest, stops=1, by="distance"):
+        """
+        Best itinerary with `stops` connections per (Year, quarter), in
+        chronological order, as display rows: Year, quarter, origin_city,
+        connecting_city, connecting_airport, destination_city, nsmiles_total
+        and fare_total. With two stops the connecting cities and airports are
+        joined with " → ".
+        """
+        itineraries = self.graph.best_per_period(origin, dest, stops=stops, by=by)
+        # Only the arrival airports of the connecting legs are read (and decoded)
+        legs = [leg for itinerary in itineraries for leg in itinerary['legs'][:-1]]
+        airports = dict(zip(legs, self.flights.take(legs).column("airport_2")))
+        rows = []
+        for itinerary in itineraries:
+            cities = itinerary['cities']
+            rows.append({
+                'Year': itinerary['Year'],
+                'quarter': itinerary['quarter'],
+                'origin_city': cities[0],
+                'connecting_city': " → ".join(cities[1:-1]),
+                # Arrival airport of every leg but the last
+                'connecting_airport': " → ".join(airports[leg] for leg in itinerary['legs'][:-1]),
+                'destination_city': cities[-1],
+                'nsmiles_total': itinerary['nsmiles_total'],
+                'fare_total': itinerary['fare_total']
+            })
+        return rows
+
+    def connection_count(self, origin, dest, stops=1):
+        """Number of itineraries with `stops` connections over all periods."""
+        return self.graph.count(origin, dest, stops=stops)
+
+    def connection_projection(self, origin, dest, stops=1, by="distance"):
+        """Projected 2025/2026 fares per quarter for the best connecting itinerary (cached)."""
+        return self.results.get_or_compute(
+            ("connection", origin, dest, stops, by, self.version),
+            lambda: project_connections(self.connections(origin, dest, stops=stops, by=by)))
+
+    def projection(self, origin, dest):
+        """
+        Projection the FAQ answers use (cached): the direct route's, or the best
+        1-stop itinerary's when there is no direct projection. None if neither exists.
+        """
+        return self.route_projections([(origin, dest)])[(origin, dest)]
+
+    def cached_projection(self, origin, dest):
+        """(projection(),) if the route's projection is in the result cache, else None."""
+        cached = self.results.get(("projection", origin, dest, self.version), _MISSING)
+        return None if cached is _MISSING else (cached,)
+
+    def route_projections(self, pairs, search=None):
+        """
+        projection() for many routes: {(origin, dest): projection or None}.
+        The direct projections are computed together (see direct_projections).
+        `search`, if given, answers the routes without one instead of this
+        process' route graph (e.g. in worker processes): it is called with a
+        list of (origin, dest) pairs and returns their connection projections
+        (or None where there is no itinerary) in the same order.
+        """
+        results = {}
+        missing = []
+        for pair in dict.fromkeys(pairs):
+            cached = self.results.get(("projection", *pair, self.version), _MISSING)
+            if cached is _MISSING:
+                missing.append(pair)
+            else:
+                results[pair] = cached
+
+        direct = self.direct_projections(missing) if missing else {}
+        indirect = [pair for pair in missing if not direct[pair]]
+        if search is None:
+            searched = [self.connection_projection(*pair) if self.connection_count(*pair) else None
+                        for pair in indirect]
+        else:
+            searched = search(indirect) if indirect else []
+        connecting = dict(zip(indirect, searched))
+        for pair in missing:
+            projection = direct[pair] or connecting[pair]
+            self.results.put(("projection", *pair, self.version), projection)
+            results[pair] = projection
+        return results
+
+    def best_quarter(self, origin, dest, year=PROJECTION_YEARS[-1]):
+        """Quarter with the lowest projected fare in `year` for the route (cached), or None."""
+        def compute():
+            projection = self.projection(origin, dest)
+            return best_quarter(projection, year) if projection else None
+        return self.results.get_or_compute(("best_quarter", origin, dest, year, self.version), compute)
+
+
+# Process-wide registry: Streamlit re-executes the main script on every rerun,
+# but imported modules (and so this state) live for the whole server process.
+_dataset = None
+_dataset_key = None              # (csv_path, backend) of _dataset
+_lock = threading.Lock()
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def get_dataset(csv_path=CSV_PATH, check_source=True, backend=None):
+    """
+    Return the shared FlightDataset, loading it on first use.
+    With check_source, a CSV whose mtime/size changed is reloaded automatically.
+    `backend` ("memory" or "sqlite") defaults to DATA_BACKEND.
+    Raises FileNotFoundError if the CSV is missing.
+    """
+    global _dataset, _dataset_key
+    backend = backend or DATA_BACKEND
+    if backend not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown backend: {backend!r} (expected 'memory' or 'sqlite')")
+    key = (csv_path, backend)
+    dataset = _dataset
+    if dataset is not None and _dataset_key == key:
+        if not check_source:
+            return dataset
+        try:
+            if dataset.signature == _signature(csv_path):
+                return dataset
+        except FileNotFoundError:
+            # CSV removed after loading: keep serving what we have
+            return dataset
+
+    with _lock:
+        # Another thread may have finished loading while we waited
+        dataset = _dataset
+        if dataset is not None and _dataset_key == key:
+            try:
+                fresh = not check_source or dataset.signature == _signature(csv_path)
+            except FileNotFoundError:
+                fresh = True
+            if fresh:
+                return dataset
+
+        signature = _signature(csv_path)
+        flights = load_flights(csv_path) if backend == "memory" else load_flights_sqlite(csv_path)
+        dataset = FlightDataset(flights, signature, load_projections(csv_path))
+        _dataset, _dataset_key = dataset, key
+        return dataset
+
+
+def invalidate_dataset():
+    """Drop the shared dataset; the next get_dataset() call loads it again."""
+    global _dataset, _dataset_key
+    with _lock:
+        _dataset = None
+        _dataset_key = None
+
+
+def reload_dataset(csv_path=CSV_PATH):
+    """
+    Load the dataset again now (e.g. after replacing the CSV or rebuilding the
+    projection artifact with `python -m Fare_Projection`) and return it.
+    """
+    invalidate_dataset()
+    return get_dataset(csv_path)
+
+
+def _append_csv(new_path, csv_path):
+    """Append the data rows of new_path to csv_path, in csv_path's column order."""
+    with open(csv_path, "r", newline="") as f:
+        header = next(row for row in csv.reader(f) if any(h.strip() for h in row))
+    with open(csv_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        needs_newline = False
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    with open(new_path, "r", newline="") as src, open(csv_path, "a", newline="") as dst:
+        if needs_newline:
+            dst.write("\n")
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=header, restval="", extrasaction="ignore", lineterminator="\n")
+        for row in reader:
+            writer.writerow(row)
+
+
+def append_data(new_csv_path, csv_path=CSV_PATH):
+    """
+    Ingest a new quarterly data drop into the shared dataset without a full
+    reload: its rows are appended in memory (see FlightDataset.append) and to
+    the CSV, and the binary cache and projection artifact are rewritten so the
+    next process start picks them up. Returns the routes whose projections
+    changed. Requests being answered from the shared dataset must not
+    overlap with it (see FlightDataset.append).
+
+    Raises ValueError with the "sqlite" backend, before anything is changed:
+    append the rows to the CSV instead (a stale SQLite file is rebuilt on load).
+    """
+    dataset = get_dataset(csv_path)
+    if not isinstance(dataset.flights, MyTable):
+        raise ValueError("append_data() needs the in-memory backend (DATA_BACKEND = \"memory\"); with \"sqlite\", "
+                         "append the rows to the CSV instead and the SQLite file is rebuilt on next load")
+    new_flights = read_flights(new_csv_path)
+    with _lock:
+        routes = dataset.append(new_flights)
+        _append_csv(new_csv_path, csv_path)
+        # The in-memory dataset already has the new rows: do not reload it
+        dataset.signature = _signature(csv_path)
+        dataset.signature_version = dataset.version
+        try:
+            # Let go of the mapped cache files before they are replaced
+            dataset.flights.close()
+            dataset.flights.to_cache(cache_path_for(csv_path), source=csv_path)
+            projections = dataset.projection_table()
+            if projections is not None:
+                projections.close()
+                projections.to_cache(projections_path_for(csv_path), source=csv_path)
+        except OSError:
+            # Read-only deployment: the CSV is the source of truth
+            pass
+    return routes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append a new flight data drop to the dataset")
+    parser.add_argument("new_csv", help="CSV with the new rows (same columns as the dataset)")
+    parser.add_argument("--csv", default=CSV_PATH, help="Flight fare CSV to append to")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    routes = append_data(args.new_csv, args.csv)
+    print(f"Appended {args.new_csv}; recomputed projections for {len(routes)} routes "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+On-demand sharded flight data. The table is repartitioned once into one shard
+per origin city (the rows departing it) and one reverse shard per destination
+city (the rows arriving there), each a MyTable binary cache:
+
+    python -m Flight_Shards --csv "US Airline Flight Routes and Fares 1993-2024.csv"
+
+A session only reads rows with city1 == origin or city2 == destination, so
+with the shards in place the app loads the manifest (the city lists) at start
+and, per selection, only the two shards it needs (ShardStore.for_cities), with
+recently used shards kept in an LRU. The shards are ignored once the CSV
+changes (e.g. after Flight_Dataset.append_data); run the command again then.
+
+Sharded answers are not always those of the full table: connecting routes are
+searched with at most 1 stop (2-stop itineraries need legs between other
+cities), and with no city selected there are no rows to list.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from Fare_Projection import load_projections
+from Flight_Dataset import (CSV_PATH, RESULT_CACHE_BYTES, RESULT_CACHE_ENTRIES, RESULT_CACHE_TTL, FlightDataset,
+                            load_flights)
+from Mini_DataFrame import MyTable, col
+from Result_Cache import LRUCache
+
+
+# Loaded shards kept per process, least recently used evicted first
+SHARD_CACHE_SHARDS = 64
+SHARD_CACHE_BYTES = 256 * 1024 * 1024
+
+# (origin, destination) datasets kept per process for the sessions' selections,
+# least recently used evicted first; their per-route results share one cache
+# (RESULT_CACHE_* in Flight_Dataset)
+SESSION_DATASETS = 16
+SESSION_DATASETS_BYTES = 256 * 1024 * 1024
+
+MANIFEST = "manifest.json"
+
+# File in the shard directory naming the shard set in use (a subdirectory)
+CURRENT = "CURRENT"
+
+
+def shards_path_for(csv_path):
+    """Shard directory, written next to the CSV."""
+    return csv_path + ".shards"
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _shard_file(kind, city):
+    """Relative path of a city's shard: a readable slug plus a hash, so distinct names never collide."""
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", city).strip("_")[:48]
+    digest = hashlib.sha1(city.encode("utf-8")).hexdigest()[:10]
+    return f"{kind}/{slug}-{digest}.mytable"
+
+
+def repartition(flights, csv_path, out_dir=None):
+    """
+    Write the origin and destination shards of a flight table loaded from
+    `csv_path`, plus a manifest of cities, files and row counts, as a new
+    shard set (subdirectory) of `out_dir`. The CURRENT file is then switched
+    to it with an atomic rename, so readers see either the previous set or
+    the new one, and a crash leaves the previous set in use. The previous set
+    is kept for readers still loading from it; older ones are deleted.
+    Returns (shard set directory, number of origin shards, number of destination shards).
+    """
+    out_dir = out_dir or shards_path_for(csv_path)
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    set_dir = os.path.join(out_dir, version)
+    manifest = {
+        "source": _source_signature(csv_path),
+        "rows": len(flights),
+        "columns": list(flights.columns),
+        "origins": {},
+        "destinations": {},
+    }
+    for kind, column in (("origins", "city1"), ("destinations", "city2")):
+        os.makedirs(os.path.join(set_dir, kind), exist_ok=True)
+        for city, positions in flights.create_index([column]).items():
+            path = _shard_file(kind, city)
+            flights.take(positions).to_cache(os.path.join(set_dir, path))
+            manifest[kind][city] = {"file": path, "rows": len(positions)}
+    with open(os.path.join(set_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+
+    previous = _current_set(out_dir)
+    pointer = os.path.join(out_dir, f"{CURRENT}.tmp{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(out_dir, CURRENT))
+
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if name not in (version, previous) and name.startswith("v") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+    return set_dir, len(manifest["origins"]), len(manifest["destinations"])
+
+
+def _current_set(directory):
+    """Name of the shard set CURRENT points to, or None."""
+    try:
+        with open(os.path.join(directory, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class ShardStore:
+    """
+    Reads the current shard set of one repartitioned CSV on demand. Raises
+    FileNotFoundError without a shard set and ValueError if `csv_path` changed
+    since the shards were written (a missing CSV is not checked, so the shards
+    can be deployed without it).
+    """
+
+    def __init__(self, directory, csv_path=None, max_shards=SHARD_CACHE_SHARDS, max_bytes=SHARD_CACHE_BYTES):
+        self.directory = directory
+        self.csv_path = csv_path
+        self.version = _current_set(directory)
+        if self.version is None:
+            raise FileNotFoundError(f"{directory} has no {CURRENT} shard set")
+        self.set_dir = os.path.join(directory, self.version)
+        with open(os.path.join(self.set_dir, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        if not self.is_fresh():
+            raise ValueError(f"{directory} is stale: {csv_path} has changed")
+        self.origin_cities = sorted(self.manifest["origins"])
+        self.dest_cities = sorted(self.manifest["destinations"])
+        self.shards = LRUCache(max_shards, max_bytes)
+        self._datasets = LRUCache(SESSION_DATASETS, SESSION_DATASETS_BYTES)
+        # One result cache for every (origin, destination) dataset: their
+        # answers for a route are the same (see for_cities)
+        self.results = LRUCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_BYTES, RESULT_CACHE_TTL)
+        self._projections = None
+        self._projections_loaded = False
+
+    def is_fresh(self):
+        """False once the CSV the shards were written from has changed, or the shards were rewritten."""
+        if _current_set(self.directory) != self.version:
+            return False
+        if self.csv_path is None:
+            return True
+        try:
+            return _source_signature(self.csv_path) == self.manifest["source"]
+        except FileNotFoundError:
+            return True
+
+    @property
+    def projections(self):
+        """The CSV's precomputed projection artifact (loaded on first use), or None, as for the full dataset."""
+        if not self._projections_loaded:
+            if self.csv_path is not None:
+                self._projections = load_projections(self.csv_path)
+            self._projections_loaded = True
+        return self._projections
+
+    def _shard(self, kind, city):
+        entry = self.manifest[kind].get(city)
+        if entry is None:
+            return None
+        return self.shards.get_or_compute(
+            (kind, city), lambda: MyTable.from_cache(os.path.join(self.set_dir, entry["file"])))
+
+    def departing(self, city):
+        """Rows with city1 == city (its origin shard), or None for an unknown city."""
+        return self._shard("origins", city)
+
+    def arriving(self, city):
+        """Rows with city2 == city (its destination shard), or None for an unknown city."""
+        return self._shard("destinations", city)
+
+    def for_cities(self, origin, dest):
+        """
+        FlightDataset over the rows departing `origin` and arriving at `dest`
+        (either may be ""): enough for the origin's and destination's flights,
+        the direct route and 1-stop itineraries, so its max_stops is 1. It is
+        `partial`: with neither city given it has no rows, not all flights.
+        Cached per (origin, dest), within SESSION_DATASETS_BYTES of rows.
+        """
+        return self._datasets.get_or_compute((origin, dest), lambda: self._load(origin, dest))
+
+    def _load(self, origin, dest):
+        tables = []
+        departing = self.departing(origin) if origin else None
+        if departing is not None:
+            tables.append(departing)
+        arriving = self.arriving(dest) if dest else None
+        if arriving is not None:
+            if departing is not None:
+                # The direct route's rows are in both shards
+                arriving = arriving.filter(col("city1") != origin)
+            tables.append(arriving)
+        if tables:
+            flights = MyTable.concat(tables)
+        else:
+            flights = MyTable(self.manifest["columns"], [])
+        # Itineraries with 2 stops need legs between other cities: not in these rows
+        return FlightDataset(flights, projections=self.projections, max_stops=1, results=self.results, partial=True)
+
+
+# Process-wide store, like Flight_Dataset.get_dataset()
+_store = None
+_store_path = None
+_lock = threading.Lock()
+
+
+def get_shards(csv_path=CSV_PATH):
+    """The shared ShardStore of the CSV's shards, or None if there are none or they are stale."""
+    global _store, _store_path
+    with _lock:
+        if _store is not None and _store_path == csv_path and _store.is_fresh():
+            return _store
+        try:
+            _store = ShardStore(shards_path_for(csv_path), csv_path)
+        except (FileNotFoundError, ValueError):
+            _store = None
+        _store_path = csv_path
+        return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repartition the flight data into origin and destination shards")
+    parser.add_argument("--csv", default=CSV_PATH, help="Flight fare CSV")
+    parser.add_argument("--out", help="Shard directory (default: next to the CSV)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    directory, n_origins, n_dests = repartition(load_flights(args.csv), args.csv, args.out)
+    print(f"Wrote {n_origins} origin and {n_dests} destination shards to {directory} "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
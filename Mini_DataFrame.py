@@ -1,64 +1,1374 @@
+import bisect
+import csv
+import io
+import json
+import math
+import mmap
+import operator
+import os
+import random
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+from Streaming_Agg import StreamingAgg
+from Table_Profiler import profiled
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional: GroupBy.agg falls back to the pure-Python path
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # pyarrow is optional: only Parquet / Arrow IPC import and export need it
+    pa = pq = None
+
+
+# values treated as "missing" by drop_missing()
+MISSING_INDICATORS = {"", None, "NA", "N/A", "null", "NaN"}
+
+# aggregation functions supported by GroupBy.agg
+AGG_FUNCS = ("sum", "mean", "count", "min", "max", "median")
+
+# aggregation functions SampledGroupBy.agg estimates, with confidence intervals
+SAMPLE_AGG_FUNCS = ("mean", "median")
+
+# column of a StratifiedSample's table holding each sampled row's stratum number
+STRATUM_COLUMN = "__stratum__"
+
+# tables smaller than this aggregate in pure Python even when NumPy is installed
+NUMPY_MIN_ROWS = 5000
+
+# NumPy median: groups larger than this use np.partition, smaller ones a batched sort
+MEDIAN_PARTITION_MIN = 64
+
+# from_file(workers=...) gives each worker process at least this many bytes of the file
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+# agg_file() parses and aggregates a CSV in byte ranges of about this size
+STREAM_CHUNK_BYTES = PARALLEL_MIN_BYTES
+
+# rows per Parquet row group written by to_parquet(); smaller groups prune more finely
+PARQUET_ROW_GROUP_ROWS = 32 * 1024
+
+# first bytes of a MyTable binary cache file (see MyTable.to_cache)
+CACHE_MAGIC = b"MYTABLE1"
+
+# bounds of a signed 64-bit array('q') slot
+_INT_MIN = -(2 ** 63)
+_INT_MAX = 2 ** 63 - 1
+
+# schema type for dictionary-encoded text columns (see Categories)
+CATEGORY = "category"
+
+
+class Categories:
+    """
+    Dictionary of a categorical column: `values` maps code -> string and
+    `codes` string -> code. Append-only, so the columns derived from one parse
+    (take, filter, join, ...) all share it and their codes stay valid.
+    """
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values=()):
+        self.values = [sys.intern(v) if v.__class__ is str else v for v in values]
+        self.codes = {v: code for code, v in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        """Code of `value`, adding it to the dictionary if it is new."""
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(sys.intern(value) if value.__class__ is str else value)
+        return code
+
+
+class _Decoded:
+    """Indexable view of a categorical column's values (codes looked up in its dictionary)."""
+    __slots__ = ("codes", "categories")
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+
+    def __getitem__(self, i):
+        return self.categories.values[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self.categories.values.__getitem__, self.codes)
+
+
+class Column:
+    """
+    Typed storage for a single column of a MyTable.
+
+    kind is one of:
+      "int"    -> array('q')
+      "float"  -> array('d')
+      "str"    -> list of interned strings (each distinct city/airport name is stored once)
+      "object" -> plain list (mixed values)
+      "cat"    -> array('i') of codes into `categories`, a Categories dictionary
+                  (schema type CATEGORY); equality filters, grouping and joins
+                  compare the codes, values are decoded when read
+
+    Numeric columns keep their non-numeric cells (e.g. "" for missing data) in
+    a sparse `missing` dict {row index: original value}, so a few blanks do not
+    force the whole column back into boxed Python objects.
+    Numeric data and categorical codes loaded by MyTable.from_cache are a
+    read-only memoryview over the mmap'd cache file instead of an array.
+    """
+    __slots__ = ("kind", "data", "missing", "categories")
+
+    def __init__(self, kind, data, missing=None, categories=None):
+        self.kind = kind
+        self.data = data
+        self.missing = missing or {}
+        self.categories = categories
+
+    @classmethod
+    def from_values(cls, values):
+        """Build a Column from a list of Python values, picking the most compact kind."""
+        has_int = has_float = has_other = False
+        non_numeric = 0
+        for v in values:
+            if v.__class__ is int:
+                has_int = True
+            elif v.__class__ is float:
+                has_float = True
+            elif v is None or isinstance(v, str):
+                non_numeric += 1
+            else:
+                has_other = True
+                break
+
+        if has_other:
+            return cls("object", list(values))
+
+        if not has_int and not has_float:
+            return cls("str", [sys.intern(v) if v.__class__ is str else v for v in values])
+
+        # Mostly text with a few numbers: not worth a typed array
+        if non_numeric * 2 > len(values):
+            return cls("object", list(values))
+
+        if has_float:
+            kind, typecode, fill = "float", "d", 0.0
+        else:
+            kind, typecode, fill = "int", "q", 0
+
+        if non_numeric == 0:
+            if kind == "int" and not all(_INT_MIN <= v <= _INT_MAX for v in values):
+                return cls("object", list(values))
+            return cls(kind, array(typecode, values))
+
+        missing = {}
+        data = array(typecode)
+        append = data.append
+        for i, v in enumerate(values):
+            if v is None or isinstance(v, str):
+                missing[i] = v
+                append(fill)
+            else:
+                append(v)
+        return cls(kind, data, missing)
+
+    @classmethod
+    def from_categorical(cls, values, categories):
+        """
+        Build a "cat" Column of `values` coded in `categories` (values it lacks
+        are added), or fall back to from_values() if some cannot be coded.
+        """
+        try:
+            codes = array("i", [categories.encode(v) for v in values])
+        except TypeError:
+            return cls.from_values(values)
+        return cls("cat", codes, categories=categories)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        missing = self.missing
+        if missing and i in missing:
+            return missing[i]
+        if self.categories is not None:
+            return self.categories.values[self.data[i]]
+        return self.data[i]
+
+    def __iter__(self):
+        if self.categories is not None:
+            return map(self.categories.values.__getitem__, self.data)
+        if not self.missing:
+            return iter(self.data)
+        return iter(self.to_list())
+
+    def getter(self):
+        """Return an indexable object for fast per-row reads."""
+        if self.categories is not None:
+            return _Decoded(self.data, self.categories)
+        return self if self.missing else self.data
+
+    def to_list(self):
+        if self.categories is not None:
+            return list(self)
+        values = list(self.data)
+        for i, v in self.missing.items():
+            values[i] = v
+        return values
+
+    def take(self, indices):
+        """Return a new Column holding the rows at `indices` (in that order)."""
+        data = self.data
+        if isinstance(data, array):
+            new_data = array(data.typecode, [data[i] for i in indices])
+        elif isinstance(data, memoryview):
+            # mmap-backed column (see from_cache): the copy is a regular array
+            new_data = array(data.format, [data[i] for i in indices])
+        else:
+            new_data = [data[i] for i in indices]
+
+        new_missing = None
+        missing = self.missing
+        if missing:
+            new_missing = {}
+            for new_i, old_i in enumerate(indices):
+                if old_i in missing:
+                    new_missing[new_i] = missing[old_i]
+        return Column(self.kind, new_data, new_missing, self.categories)
+
+    def copy(self):
+        """A Column with its own (mutable) copy of the data, e.g. before extend()."""
+        data = self.data
+        if isinstance(data, array):
+            data = array(data.typecode, data)
+        elif isinstance(data, memoryview):
+            data = array(data.format, data)
+        else:
+            data = list(data)
+        return Column(self.kind, data, dict(self.missing), self.categories)
+
+    def extend(self, values):
+        """
+        Append values in place if they fit this column's kind. Returns False
+        (without changing anything) if they do not, e.g. a float in an int
+        column; the caller then rebuilds the column with from_values().
+        """
+        kind = self.kind
+        if kind == "object":
+            self.data.extend(values)
+            return True
+        if kind == "str":
+            if not all(v is None or v.__class__ is str for v in values):
+                return False
+            self.data.extend([sys.intern(v) if v.__class__ is str else v for v in values])
+            return True
+        if kind == "cat":
+            try:
+                codes = [self.categories.encode(v) for v in values]
+            except TypeError:
+                # Unhashable values (lists, ...) cannot be coded
+                return False
+            self.data.extend(codes)
+            return True
+
+        # Numeric: blanks go to the sparse `missing` dict, as in from_values()
+        fill = 0 if kind == "int" else 0.0
+        start = len(self.data)
+        numbers = []
+        missing = {}
+        for j, v in enumerate(values):
+            if v is None or isinstance(v, str):
+                missing[start + j] = v
+                numbers.append(fill)
+            elif v.__class__ is int and (kind == "float" or _INT_MIN <= v <= _INT_MAX):
+                numbers.append(v)
+            elif v.__class__ is float and kind == "float":
+                numbers.append(v)
+            else:
+                return False
+        self.data.extend(numbers)
+        if missing:
+            self.missing.update(missing)
+        return True
+
+    def nbytes(self):
+        """Approximate memory footprint of the column storage in bytes."""
+        data = self.data
+        if isinstance(data, array):
+            size = sys.getsizeof(data)
+        elif isinstance(data, memoryview):
+            # Pages of the mmap'd cache file, shared between processes
+            size = data.nbytes
+        else:
+            size = sys.getsizeof(data)
+            seen = set()
+            for v in data:
+                if id(v) not in seen:
+                    seen.add(id(v))
+                    size += sys.getsizeof(v)
+        if self.missing:
+            size += sys.getsizeof(self.missing)
+        if self.categories is not None:
+            # The dictionary is shared with derived columns but counted for each
+            values = self.categories.values
+            size += sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+        return size
+
+
+class _TakenColumn(Column):
+    """
+    Column holding `source[indices]` without copying: the values are gathered
+    the first time the column is read. MyTable.take() (and so filter, join,
+    drop_missing, ...) returns these, so columns nobody reads are never copied.
+    """
+    __slots__ = ("_pending", "_column")
+
+    def __init__(self, source, indices):
+        self.kind = source.kind
+        self.categories = source.categories
+        # (source, indices) until resolved; read and cleared as one attribute so
+        # concurrent readers of a shared table never see half of it
+        self._pending = (source, indices)
+        self._column = None
+
+    def _resolve(self):
+        column = self._column
+        if column is None:
+            pending = self._pending
+            if pending is None:
+                # Resolved by another thread in the meantime
+                return self._column
+            column = self._column = Column.take(*pending)
+            self._pending = None
+        return column
+
+    @property
+    def data(self):
+        return self._resolve().data
+
+    @property
+    def missing(self):
+        return self._resolve().missing
+
+    def __len__(self):
+        pending = self._pending
+        if pending is not None:
+            return len(pending[1])
+        return len(self._column.data)
+
+    def take(self, indices):
+        pending = self._pending
+        if pending is not None:
+            # Compose the positions instead of gathering twice
+            source, own = pending
+            return _TakenColumn(source, [own[i] for i in indices])
+        return _TakenColumn(self._column, indices)
+
+    def nbytes(self):
+        pending = self._pending
+        if pending is not None:
+            return sys.getsizeof(pending[1])
+        return self._column.nbytes()
+
+def _guess_value(v):
+    """Convert a raw CSV cell to int/float where possible (empty strings stay as-is)."""
+    if v == "":
+        # Keep empty strings as-is (for later cleaning)
+        return v
+    if v.isdigit():
+        return int(v)
+    try:
+        return float(v)
+    except ValueError:
+        return v
+
+
+class _ColumnBuilder:
+    """
+    Accumulates the cells of one CSV column while parsing.
+    int/float columns are written straight into a typed array; str columns are
+    interned; columns without a declared type are guessed cell by cell.
+    """
+    __slots__ = ("kind", "data", "missing", "categories", "add")
+
+    def __init__(self, col_type=None):
+        self.missing = {}
+        self.categories = None
+        if col_type is int or col_type is float:
+            self.kind = "int" if col_type is int else "float"
+            self.data = array("q" if col_type is int else "d")
+            self.add = self._typed_adder(col_type)
+        elif col_type is str:
+            self.kind = "str"
+            self.data = []
+            append = self.data.append
+            intern = sys.intern
+            self.add = lambda v: append(intern(v))
+        elif col_type == CATEGORY:
+            self.kind = "cat"
+            self.data = array("i")
+            self.categories = Categories()
+            self.add = self._category_adder()
+        elif col_type is None:
+            self.kind = None
+            self.data = []
+            append = self.data.append
+            self.add = lambda v: append(_guess_value(v))
+        else:
+            raise ValueError(f"Unsupported column type: {col_type!r} (use int, float, str or {CATEGORY!r})")
+
+    def _typed_adder(self, convert):
+        data = self.data
+        missing = self.missing
+        append = data.append
+        fill = convert(0)
+
+        def add(v):
+            try:
+                append(convert(v))
+            except (ValueError, OverflowError):
+                # Not a number (e.g. "" for missing data): keep the raw string
+                missing[len(data)] = v
+                append(fill)
+        return add
+
+    def _category_adder(self):
+        append = self.data.append
+        codes = self.categories.codes
+        encode = self.categories.encode
+
+        def add(v):
+            code = codes.get(v)
+            append(encode(v) if code is None else code)
+        return add
+
+    def build(self):
+        if self.kind is None:
+            return Column.from_values(self.data)
+        return Column(self.kind, self.data, self.missing, self.categories)
+
+
+class _RowProxy:
+    """
+    Read-only dict-like view of one row, used to run row lambdas on columnar data.
+    filter() moves a single proxy from row to row, so call .copy() to keep a row.
+    """
+    __slots__ = ("_getters", "_i")
+
+    def __init__(self, getters, i):
+        self._getters = getters
+        self._i = i
+
+    def __getitem__(self, key):
+        return self._getters[key][self._i]
+
+    def get(self, key, default=None):
+        getter = self._getters.get(key)
+        if getter is None:
+            return default
+        return getter[self._i]
+
+    def __contains__(self, key):
+        return key in self._getters
+
+    def __iter__(self):
+        return iter(self._getters)
+
+    def __len__(self):
+        return len(self._getters)
+
+    def keys(self):
+        return self._getters.keys()
+
+    def items(self):
+        i = self._i
+        return [(k, g[i]) for k, g in self._getters.items()]
+
+    def values(self):
+        i = self._i
+        return [g[i] for g in self._getters.values()]
+
+    def copy(self):
+        return dict(self.items())
+
+
+class _Constant:
+    """Indexable that reads the same value for every row (e.g. a column filled by select())."""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, i):
+        return self.value
+
+
+# comparison operators of Expr
+_COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _safe_compare(compare, a, b):
+    try:
+        return compare(a, b)
+    except TypeError:
+        # e.g. a missing "" in a numeric column compared with a number
+        return False
+
+
+def _is_missing(value):
+    try:
+        return value in MISSING_INDICATORS
+    except TypeError:
+        # unhashable cell (object column)
+        return False
+
+
+class Expr:
+    """
+    Declarative column expression for filters, built with col(), e.g.
+    (col("city1") == "Chicago, IL") & (col("fare") > 100).
+
+    MyTable.filter() and LazyTable.filter() accept an Expr in place of a row
+    lambda. Unlike a lambda, the planner can see which columns it reads and
+    answer equality tests from an index. Combine expressions with &, | and ~;
+    a comparison between values of different types (e.g. a missing "" in a
+    numeric column and a number) is False instead of raising.
+    """
+    __slots__ = ("op", "args")
+    __hash__ = None
+
+    def __init__(self, op, args):
+        self.op = op          # "col", a comparison, "isin", "missing", "and", "or" or "not"
+        self.args = args
+
+    def _compare(self, op, other):
+        if self.op != "col":
+            raise TypeError("Only col() expressions can be compared")
+        if isinstance(other, Expr) and other.op != "col":
+            raise TypeError("A column can only be compared with a value or another col()")
+        return Expr(op, (self, other))
+
+    def __eq__(self, other):
+        return self._compare("==", other)
+
+    def __ne__(self, other):
+        return self._compare("!=", other)
+
+    def __lt__(self, other):
+        return self._compare("<", other)
+
+    def __le__(self, other):
+        return self._compare("<=", other)
+
+    def __gt__(self, other):
+        return self._compare(">", other)
+
+    def __ge__(self, other):
+        return self._compare(">=", other)
+
+    def isin(self, values):
+        """True where the column value is one of `values`."""
+        if self.op != "col":
+            raise TypeError("isin() needs a col() expression")
+        return Expr("isin", (self, frozenset(values)))
+
+    def is_missing(self):
+        """True where the column value is in MISSING_INDICATORS (see drop_missing)."""
+        if self.op != "col":
+            raise TypeError("is_missing() needs a col() expression")
+        return Expr("missing", (self,))
+
+    def __and__(self, other):
+        return Expr("and", (self, other))
+
+    def __or__(self, other):
+        return Expr("or", (self, other))
+
+    def __invert__(self):
+        return Expr("not", (self,))
+
+    def __bool__(self):
+        raise TypeError("Combine expressions with &, | and ~ instead of and, or, not")
+
+    def __repr__(self):
+        op, args = self.op, self.args
+        if op == "col":
+            return f"col({args[0]!r})"
+        if op == "not":
+            return f"~{args[0]!r}"
+        if op == "missing":
+            return f"{args[0]!r}.is_missing()"
+        if op == "isin":
+            return f"{args[0]!r}.isin({sorted(args[1], key=repr)!r})"
+        symbol = {"and": "&", "or": "|"}.get(op, op)
+        return f"({args[0]!r} {symbol} {args[1]!r})"
+
+    def __call__(self, row):
+        """Evaluate on one row (any mapping with .get), so an Expr also works as a row lambda."""
+        return bool(self._select(lambda name: _Constant(row.get(name)), [0]))
+
+    def columns(self):
+        """Set of column names the expression reads."""
+        if self.op == "col":
+            return {self.args[0]}
+        names = set()
+        for arg in self.args:
+            if isinstance(arg, Expr):
+                names |= arg.columns()
+        return names
+
+    def conjuncts(self):
+        """The expression split on top-level &, e.g. [a, b, c] for a & (b & c)."""
+        if self.op == "and":
+            return self.args[0].conjuncts() + self.args[1].conjuncts()
+        return [self]
+
+    def _select(self, resolve, positions):
+        """
+        The positions (in order) for which the expression is true.
+        resolve(name) returns an indexable of the column's values.
+        """
+        op, args = self.op, self.args
+        if op == "and":
+            return args[1]._select(resolve, args[0]._select(resolve, positions))
+        if op == "or":
+            keep = set(args[0]._select(resolve, positions))
+            keep.update(args[1]._select(resolve, [i for i in positions if i not in keep]))
+            return [i for i in positions if i in keep]
+        if op == "not":
+            drop = set(args[0]._select(resolve, positions))
+            if not drop:
+                return positions
+            return [i for i in positions if i not in drop]
+        if op == "col":
+            raise TypeError(f"{self!r} is not a condition; compare it with a value")
+
+        values = resolve(args[0].args[0])
+        if isinstance(values, _Decoded) and op in ("missing", "isin", "=="):
+            # Categorical column: find the matching codes once, then compare codes
+            if op == "missing":
+                wanted = {code for code, v in enumerate(values.categories.values) if _is_missing(v)}
+            else:
+                choices = args[1] if op == "isin" else (args[1],)
+                if op == "==" and isinstance(args[1], Expr):
+                    wanted = None
+                else:
+                    codes = values.categories.codes
+                    try:
+                        wanted = {codes[v] for v in choices if v in codes}
+                    except TypeError:
+                        wanted = None
+            if wanted is not None:
+                if not wanted:
+                    return []
+                codes = values.codes
+                if len(wanted) == 1:
+                    (code,) = wanted
+                    return [i for i in positions if codes[i] == code]
+                return [i for i in positions if codes[i] in wanted]
+        if op == "missing":
+            if isinstance(values, (array, memoryview)):
+                # Typed numeric column without blanks: never missing
+                return []
+            if isinstance(values, Column) and values.kind in ("int", "float"):
+                # Only the sparse non-numeric cells can be missing
+                missing = {i for i, v in values.missing.items() if v in MISSING_INDICATORS}
+                return [i for i in positions if i in missing]
+            if isinstance(values, list):
+                try:
+                    if MISSING_INDICATORS.isdisjoint(values):
+                        return []
+                except TypeError:
+                    pass
+            return [i for i in positions if _is_missing(values[i])]
+        if op == "isin":
+            choices = args[1]
+            try:
+                return [i for i in positions if values[i] in choices]
+            except TypeError:
+                return [i for i in positions if _safe_compare(operator.contains, choices, values[i])]
+
+        other = args[1]
+        compare = _COMPARISONS[op]
+        if isinstance(other, Expr):
+            others = resolve(other.args[0])
+            try:
+                return [i for i in positions if compare(values[i], others[i])]
+            except TypeError:
+                return [i for i in positions if _safe_compare(compare, values[i], others[i])]
+        if op == "==":
+            return [i for i in positions if values[i] == other]
+        try:
+            return [i for i in positions if compare(values[i], other)]
+        except TypeError:
+            return [i for i in positions if _safe_compare(compare, values[i], other)]
+
+
+def col(name):
+    """Reference to a column, for building filter expressions: col("fare") > 100."""
+    return Expr("col", (name,))
+
+
 class MyTable:
+    _mapping = None                       # mmap of a table loaded by from_cache(), see close()
+
     def __init__(self, columns, rows):
         self.columns = columns            # ["name", "age", "city"]
-        self.rows = rows                  # list of dicts
+        self._set_rows(rows)              # list of dicts, stored column by column
+
+    @classmethod
+    def _from_columns(cls, columns, data, length):
+        """Build a table directly from {name: Column} storage (no row dicts)."""
+        table = cls.__new__(cls)
+        table.columns = list(columns)
+        table._data = data
+        table._length = length
+        table._rows = None
+        table._indexes = {}
+        table._running = []
+        table._owned = set()
+        return table
+
+    def _set_rows(self, rows):
+        rows = list(rows)
+        self._data = {
+            col: Column.from_values([row.get(col) for row in rows])
+            for col in self.columns
+        }
+        self._length = len(rows)
+        self._rows = None
+        self._indexes = {}               # (col, ...) -> {key: [row positions]}, see create_index
+        self._running = []               # RunningAgg objects kept up to date by append_rows
+        self._owned = set()              # columns not shared with other tables, safe to extend in place
+
+    @property
+    def rows(self):
+        """
+        List of dicts view of the table, built lazily on first access.
+        Kept for compatibility; edits to these dicts are not written back.
+        """
+        if self._rows is None:
+            columns = self.columns
+            values = [self._data[col] for col in columns]
+            self._rows = [dict(zip(columns, row_values)) for row_values in zip(*values)] if columns else []
+        return self._rows
+
+    @rows.setter
+    def rows(self, rows):
+        self._set_rows(rows)
+
+    def __len__(self):
+        return self._length
+
+    def column(self, name):
+        """Return the values of one column as a list."""
+        return self._data[name].to_list()
+
+    def categories(self, name):
+        """
+        Distinct values of a column in first-appearance order. For a categorical
+        column they come from its dictionary (leaving out values no row of this
+        table uses, e.g. after drop_missing), without decoding any rows.
+        """
+        column = self._data[name]
+        if column.categories is None:
+            return list(dict.fromkeys(column))
+        values = column.categories.values
+        used = set(column.data)
+        if len(used) == len(values):
+            return list(values)
+        return [v for code, v in enumerate(values) if code in used]
+
+    def memory_usage(self):
+        """Approximate bytes used by each column, e.g. {"fare": 1960064, ...}."""
+        return {col: self._data[col].nbytes() for col in self.columns}
+
+    def _getters(self):
+        return {col: self._data[col].getter() for col in self.columns}
+
+    def take(self, indices):
+        """
+        Return a new MyTable with the rows at positions `indices` (in that order).
+        Columns are gathered lazily, on first read.
+        """
+        indices = indices if isinstance(indices, list) else list(indices)
+        data = {col: _TakenColumn(self._data[col], indices) for col in self.columns}
+        return MyTable._from_columns(self.columns, data, len(indices))
 
     #parse data
     #default delimiter is ","
+
     @classmethod
-    def from_file(cls,path, delimiter=","):
-        lines = []
-        with open(path, "r") as f:
-            for line in f:
-                if line.strip():
-                    lines.append(line.strip())
-        
-        # First line: headers
+    @profiled("from_file", rows_in=None)
+    def from_file(cls, path, delimiter=",", schema=None, usecols=None, workers=1):
+        """
+        Stream a CSV file into a MyTable in a single pass.
+
+        Args:
+            path (str): CSV file with a header row.
+            delimiter (str): Field separator.
+            schema (dict | None): Optional {column: int | float | str | CATEGORY}.
+                Typed columns skip per-cell type guessing; cells that do not
+                convert (e.g. "") are kept as strings. CATEGORY columns are
+                dictionary-encoded (see Column). Columns not in the schema are
+                guessed as before.
+            usecols (list | None): Only parse and keep these columns (in this order).
+            workers (int | None): Parse newline-aligned byte ranges of the file in
+                this many processes (None: one per CPU). Files smaller than
+                PARALLEL_MIN_BYTES per worker use fewer workers. The result is the
+                same as with workers=1.
+        """
+        schema = schema or {}
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+
+            columns = _read_header(reader, path)
+
+            if usecols is None:
+                keep = columns
+            else:
+                unknown = [c for c in usecols if c not in columns]
+                if unknown:
+                    raise ValueError(f"Columns not found in {path}: {unknown}")
+                keep = list(usecols)
+
+            if workers is None:
+                workers = os.cpu_count() or 1
+            if workers > 1:
+                # Lines up to and including the header; data line numbers in warnings start after them
+                header_lines = reader.line_num
+                ranges = _byte_ranges(path, header_lines, workers)
+                if len(ranges) > 1:
+                    return cls._from_ranges(path, f.encoding, delimiter, schema, columns, keep, ranges, header_lines)
+
+            # One builder per kept column, fed from that column's position in each line
+            builders = {col: _ColumnBuilder(schema.get(col)) for col in keep}
+            plan = [(columns.index(col), builders[col].add) for col in keep]
+
+            # Remaining lines: data rows
+            n_columns = len(columns)
+            warn = lambda line, n_values: print(_truncation_warning(line, n_values, n_columns))
+            length = _parse_rows(reader, plan, n_columns, warn)
+
+        data = {col: builders[col].build() for col in keep}
+        return cls._from_columns(keep, data, length)
+
+    @classmethod
+    def _from_ranges(cls, path, encoding, delimiter, schema, columns, keep, ranges, header_lines):
+        """Parse byte ranges of a CSV in worker processes and concatenate their columns."""
+        types = [schema.get(col) for col in keep]
+        positions = [columns.index(col) for col in keep]
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [
+                pool.submit(_parse_range, path, start, end, encoding, delimiter, len(columns), positions, types)
+                for start, end in ranges
+            ]
+            chunks = [future.result() for future in futures]
+
+        # Warnings are reported in file order with the line numbers a serial parse gives
+        line_offset = header_lines
+        for _, _, lines, warnings in chunks:
+            for line, n_values in warnings:
+                print(_truncation_warning(line_offset + line, n_values, len(columns)))
+            line_offset += lines
+
+        data = {}
+        for j, col in enumerate(keep):
+            data[col] = _concat_columns([chunk[0][j] for chunk in chunks])
+        return cls._from_columns(keep, data, sum(chunk[1] for chunk in chunks))
+
+    @classmethod
+    @profiled("agg_file", rows_in=None)
+    def agg_file(cls, path, by, agg_map, delimiter=",", schema=None, workers=1, chunk_bytes=STREAM_CHUNK_BYTES):
+        """
+        groupby(by).agg(agg_map) over a CSV without loading it: the file is
+        parsed in newline-aligned byte ranges of about `chunk_bytes`, each range
+        is aggregated into mergeable states (see Streaming_Agg) and dropped, and
+        the states are merged in file order. Memory is one range per worker
+        plus the states, whatever the size of the file.
+
+        Supports the functions of GroupBy.agg plus "var", "std" and percentiles
+        ("p90", ...). Results equal GroupBy.agg's except for medians/percentiles
+        of groups with more than TDIGEST_BUFFER values, which are t-digest
+        estimates. `schema` is as in from_file(); `workers` > 1 (None: one per
+        CPU) aggregates the ranges in that many processes.
+        """
+        state = StreamingAgg(by, agg_map)
+        keep = list(dict.fromkeys(state.by + list(state.agg_map)))
+        schema = schema or {}
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            columns = _read_header(reader, path)
+            unknown = [c for c in keep if c not in columns]
+            if unknown:
+                raise ValueError(f"Columns not found in {path}: {unknown}")
+            header_lines = reader.line_num
+            encoding = f.encoding
+        ranges = _byte_ranges(path, header_lines, os.path.getsize(path) // chunk_bytes, min_bytes=chunk_bytes)
+        if not ranges:
+            # At most 2 * chunk_bytes of data: one chunk
+            chunk = cls.from_file(path, delimiter=delimiter, schema=schema, usecols=keep)
+            return state.add_table(chunk).result()
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        args = (encoding, delimiter, len(columns), [columns.index(c) for c in keep],
+                [schema.get(c) for c in keep], keep, state.by, state.agg_map)
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges))) if workers > 1 else None
+        try:
+            jobs = [(path, start, end) + args for start, end in ranges]
+            partials = pool.map(_agg_range, *zip(*jobs)) if pool else (_agg_range(*job) for job in jobs)
+            line_offset = header_lines
+            for partial, lines, warnings in partials:
+                for line, n_values in warnings:
+                    print(_truncation_warning(line_offset + line, n_values, len(columns)))
+                line_offset += lines
+                state.merge(partial)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return state.result()
+
+    @classmethod
+    def scan_file(cls, path, delimiter=",", schema=None, workers=1):
+        """
+        Lazy counterpart of from_file(): returns a LazyTable whose collect()
+        parses only the columns the query needs (with `workers` processes).
+        """
+        return LazyTable(path=path, delimiter=delimiter, schema=schema, workers=workers)
+
+    def lazy(self):
+        """Start a LazyTable query on this table (see LazyTable)."""
+        return LazyTable(self)
+
+    def to_cache(self, path, source=None):
+        """
+        Write a binary snapshot of this table to `path`.
+
+        Numeric columns are stored as fixed-width native arrays and text columns as
+        a string dictionary plus int32 codes, so from_cache() can map the file back
+        without parsing (categorical columns keep their codes mapped). If `source` (e.g. the CSV path) is given, its mtime and
+        size are recorded and from_cache() rejects the snapshot once they change.
+        """
+        header = {
+            "length": self._length,
+            "byteorder": sys.byteorder,
+            "source": _file_signature(source) if source else None,
+            "columns": [],
+        }
+        blobs = []
+        offset = 0
+        for col in self.columns:
+            column = self._data[col]
+            meta = {"name": col, "kind": column.kind}
+            if column.kind in ("int", "float"):
+                blob = array("q" if column.kind == "int" else "d", column.data).tobytes()
+                meta["missing"] = [[i, v] for i, v in column.missing.items()]
+            elif column.kind == "cat":
+                codes = column.data
+                dictionary = column.categories.values
+                used = sorted(set(codes))
+                if len(used) < len(dictionary):
+                    # Only the values this table uses (e.g. a shard of a larger table's rows)
+                    recode = dict(zip(used, range(len(used))))
+                    codes = [recode[code] for code in codes]
+                    dictionary = [dictionary[code] for code in used]
+                blob = array("i", codes).tobytes()
+                meta["dictionary"] = dictionary
+            elif column.kind == "str":
+                dictionary = list(dict.fromkeys(column.data))
+                lookup = {v: code for code, v in enumerate(dictionary)}
+                blob = array("i", [lookup[v] for v in column.data]).tobytes()
+                meta["dictionary"] = dictionary
+            else:
+                blob = b""
+                meta["values"] = column.to_list()
+            meta["offset"] = offset
+            meta["nbytes"] = len(blob)
+            header["columns"].append(meta)
+            # Keep every block 8-byte aligned so it can be cast in place
+            padding = -len(blob) % 8
+            blobs.append(blob + b"\0" * padding)
+            offset += len(blob) + padding
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        header_bytes += b" " * (-len(header_bytes) % 8)
+
+        # Write to a temp file and swap it in, so readers never see a half-written cache
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(CACHE_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_cache(cls, path, source=None):
+        """
+        Load a table written by to_cache() through mmap.
+
+        Numeric columns stay in the mapped pages (no copy), so several processes
+        loading the same cache share memory. Raises FileNotFoundError if the cache
+        does not exist and ValueError if it is unreadable or older than `source`.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < 16:
+                raise ValueError(f"{path} is not a MyTable cache")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapped)
+        if bytes(view[:8]) != CACHE_MAGIC:
+            raise ValueError(f"{path} is not a MyTable cache")
+        header_size = int.from_bytes(view[8:16], "little")
+        header = json.loads(bytes(view[16:16 + header_size]).decode("utf-8"))
+
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a machine with a different byte order")
+        if source is not None and header["source"] != _file_signature(source):
+            raise ValueError(f"{path} is stale: {source} has changed")
+
+        base = 16 + header_size
+        length = header["length"]
         columns = []
-        for c in lines[0].split(delimiter):
-            columns.append(c.strip())
-        
-        # Remaining lines: data rows
-        rows = []
-        for i, line in enumerate(lines[1:], start=2):
-            values = [v.strip() for v in split_csv_line(line, delimiter)]
-    
-            # Adjust number of values to match columns
-            if len(values) < len(columns):
-                # Fill missing columns with empty strings
-                values += [""] * (len(columns) - len(values))
-            elif len(values) > len(columns):
-                # Truncate extra values (warn but keep the row)
-                print(f" Line {i} has {len(values)} values (expected {len(columns)}). Truncating extras.")
-                values = values[:len(columns)]
-    
-            row = dict(zip(columns, values))
-    
-            # Convert numeric values where possible
-            for k, v in row.items():
-                if isinstance(v, str) and v.strip() == "":
-                    # Keep empty strings as-is (for later cleaning)
-                    continue
-                elif v.isdigit():
-                    row[k] = int(v)
-                else:
-                    try:
-                        row[k] = float(v)
-                    except ValueError:
-                        pass
-    
-            rows.append(row)
-        return cls(columns, rows)
+        data = {}
+        for meta in header["columns"]:
+            name, kind = meta["name"], meta["kind"]
+            block = view[base + meta["offset"]: base + meta["offset"] + meta["nbytes"]]
+            if kind in ("int", "float"):
+                values = block.cast("q" if kind == "int" else "d")
+                data[name] = Column(kind, values, {i: v for i, v in meta["missing"]})
+            elif kind == "cat":
+                # The codes stay in the mapped pages, like numeric data
+                data[name] = Column(kind, block.cast("i"), categories=Categories(meta["dictionary"]))
+            elif kind == "str":
+                dictionary = [sys.intern(v) if isinstance(v, str) else v for v in meta["dictionary"]]
+                data[name] = Column(kind, [dictionary[code] for code in block.cast("i")])
+            else:
+                data[name] = Column(kind, meta["values"])
+            columns.append(name)
+
+        table = cls._from_columns(columns, data, length)
+        # Closed by close(), or freed (and so closed) with the last column viewing it
+        table._mapping = mapped
+        return table
+
+    def close(self):
+        """
+        Close the memory map of a table loaded by from_cache(), e.g. before its
+        cache file is replaced (Windows refuses while it is mapped). Mapped
+        columns are copied into memory first, so this table and the tables
+        sharing its columns keep working. Does nothing for other tables.
+        """
+        mapping, self._mapping = self._mapping, None
+        if mapping is None:
+            return
+        for column in self._data.values():
+            # Lazily taken columns gather from these same Column objects
+            if type(column) is Column and isinstance(column.data, memoryview):
+                column.data = array(column.data.format, column.data.tobytes())
+        try:
+            mapping.close()
+        except BufferError:
+            # A view is still held elsewhere (e.g. a getter): it closes when that goes
+            pass
 
+    @classmethod
+    def concat(cls, tables):
+        """
+        A new table with the rows of `tables` (same columns) one after the
+        other. Categorical columns are re-coded into one dictionary.
+        """
+        tables = list(tables)
+        columns = list(tables[0].columns)
+        data = {}
+        for name in columns:
+            # _concat_columns extends its first chunk: give it a copy (with its own dictionary)
+            first = tables[0]._data[name].copy()
+            if first.categories is not None:
+                first.categories = Categories(first.categories.values)
+            data[name] = _concat_columns([first] + [table._data[name] for table in tables[1:]])
+        return cls._from_columns(columns, data, sum(len(table) for table in tables))
+
+    def to_arrow(self):
+        """
+        This table as a pyarrow.Table: int/float columns become int64/float64
+        (their non-numeric cells null), categorical columns dictionary arrays
+        and text columns strings. Object columns of numbers and blanks are
+        numeric too (and read back as int/float columns); other mixed columns
+        are stored as text.
+        """
+        _require_pyarrow("to_arrow()")
+        arrays = [_column_to_arrow(self._data[col]) for col in self.columns]
+        return pa.Table.from_arrays(arrays, names=list(self.columns))
+
+    @classmethod
+    def from_arrow(cls, table):
+        """
+        MyTable from a pyarrow.Table. Integer and float columns are copied into
+        typed arrays (nulls become "" cells, as blank CSV cells do), dictionary
+        columns become categorical and string columns text (nulls as "").
+        """
+        _require_pyarrow("from_arrow()")
+        table = table.unify_dictionaries()
+        columns = list(table.column_names)
+        data = {name: _column_from_arrow(table.column(name)) for name in columns}
+        return cls._from_columns(columns, data, table.num_rows)
+
+    def to_parquet(self, path, row_group_size=PARQUET_ROW_GROUP_ROWS, sort_by=None, compression="snappy"):
+        """
+        Write this table to a Parquet file (requires pyarrow) in row groups of
+        `row_group_size` rows, each with min/max statistics. `sort_by` (columns)
+        writes the rows in that order first, so from_parquet(ranges=...) can
+        skip whole row groups, e.g. sort_by=["Year", "quarter"].
+        """
+        _require_pyarrow("to_parquet()")
+        table = self
+        if sort_by:
+            keys = list(self._keys(list(sort_by)))
+            table = self.take(sorted(range(self._length), key=keys.__getitem__))
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        pq.write_table(table.to_arrow(), tmp_path, row_group_size=row_group_size, compression=compression)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    @profiled("from_parquet", rows_in=None)
+    def from_parquet(cls, path, columns=None, ranges=None):
+        """
+        Load a Parquet file (requires pyarrow).
+
+        Args:
+            columns (list | None): Only read these columns (in this order).
+            ranges (dict | None): {column: (low, high)} inclusive bounds, or
+                {column: value}. Row groups whose min/max statistics fall outside
+                a range are not read at all; the rows of the remaining groups
+                are filtered exactly. E.g. {"Year": (2019, 2024)} reads only the
+                row groups holding those years.
+        """
+        _require_pyarrow("from_parquet()")
+        ranges = {name: bound if isinstance(bound, tuple) else (bound, bound) for name, bound in (ranges or {}).items()}
+        parquet = pq.ParquetFile(path)
+        names = parquet.schema_arrow.names
+        unknown = [c for c in list(columns or []) + list(ranges) if c not in names]
+        if unknown:
+            raise ValueError(f"Columns not found in {path}: {unknown}")
+        keep = list(columns) if columns is not None else names
+        read = keep + [c for c in ranges if c not in keep]
+
+        groups = _parquet_row_groups(parquet.metadata, ranges)
+        table = cls.from_arrow(parquet.read_row_groups(groups, columns=read))
+        if not ranges:
+            return table
+        condition = None
+        for name, (low, high) in ranges.items():
+            term = (col(name) >= low) & (col(name) <= high)
+            condition = term if condition is None else condition & term
+        table = table.filter(condition)
+        return table.select(keep) if read != keep else table
+
+    def to_arrow_ipc(self, path):
+        """Write this table to an Arrow IPC (Feather v2) file (requires pyarrow)."""
+        _require_pyarrow("to_arrow_ipc()")
+        table = self.to_arrow()
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    @profiled("from_arrow_ipc", rows_in=None)
+    def from_arrow_ipc(cls, path, columns=None):
+        """Load an Arrow IPC file through a memory map, optionally only `columns` (requires pyarrow)."""
+        _require_pyarrow("from_arrow_ipc()")
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                unknown = [c for c in columns if c not in table.column_names]
+                if unknown:
+                    raise ValueError(f"Columns not found in {path}: {unknown}")
+                table = table.select(list(columns))
+            # Copies the values out of the mapped file before it is closed
+            return cls.from_arrow(table)
+
+    @profiled("append_rows", rows_in=None)
+    def append_rows(self, rows):
+        """
+        Append rows in place: a list of dicts or another MyTable (columns it
+        lacks read as None, extra ones are ignored).
+
+        Cached indexes (create_index) and running aggregates (running_agg) are
+        updated with only the new rows, so ingesting a new data drop costs time
+        proportional to its size. Returns the positions of the new rows.
+        """
+        new = rows if isinstance(rows, MyTable) else MyTable(self.columns, rows)
+        start = self._length
+        n_new = len(new)
+        positions = range(start, start + n_new)
+        if not n_new:
+            return positions
+
+        for col in self.columns:
+            values = new._data[col].to_list() if col in new._data else [None] * n_new
+            column = self._data[col]
+            if col not in self._owned:
+                # Columns may be shared with derived tables (select, ...): copy once
+                column = column.copy()
+            if not column.extend(values):
+                column = Column.from_values(column.to_list() + values)
+            self._data[col] = column
+            self._owned.add(col)
+        self._length += n_new
+        self._rows = None
+
+        for name, index in self._indexes.items():
+            getters = [self._data[col].getter() for col in name]
+            if len(getters) == 1:
+                keys = (getters[0][i] for i in positions)
+            else:
+                keys = (tuple(g[i] for g in getters) for i in positions)
+            added = _positions_by_key(keys, start)
+            # Replace the position lists instead of extending them: tables
+            # taken from the index earlier (filter_eq, ...) still hold the old ones
+            for key, group in added.items():
+                old = index.get(key)
+                index[key] = group if old is None else old + group
+
+        for running in self._running:
+            running._add(self, positions)
+        return positions
+
+    def append_file(self, path, delimiter=",", schema=None):
+        """
+        Append the rows of another CSV file with the same columns (see
+        append_rows). Only this table's columns are parsed; ones the file
+        lacks are filled with "". Returns the positions of the new rows.
+        """
+        new = MyTable.scan_file(path, delimiter=delimiter, schema=schema).select(self.columns).collect()
+        return self.append_rows(new)
+
+    def running_agg(self, by, agg_map):
+        """
+        Like groupby(by).agg(agg_map), but returns a RunningAgg that
+        append_rows keeps up to date incrementally (sum, count, mean, min and
+        max only).
+        """
+        if isinstance(by, str):
+            by = [by]
+        running = RunningAgg(self, by, agg_map)
+        self._running.append(running)
+        return running
+
+    def sample_by(self, by, size=100, seed=0):
+        """
+        Stratified reservoir sample: up to `size` random rows per distinct value
+        of the `by` columns (a stratum), returned as a StratifiedSample whose
+        groupby().agg() estimates means and medians with confidence intervals.
+        append_rows keeps the sample up to date like a running_agg.
+        """
+        if isinstance(by, str):
+            by = [by]
+        sample = StratifiedSample(self, by, size, seed)
+        self._running.append(sample)
+        return sample
+
+    def create_index(self, columns):
+        """
+        Build (or reuse) a hash index on one or more columns and return it as
+        {key: [row positions]}. Keys are scalars for one column and tuples for
+        several, like groupby(). The index is cached on this table; derived
+        tables (filter, select, join, ...) start without indexes.
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        name = tuple(columns)
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._group_positions(list(name))
+            self._indexes[name] = index
+        return index
+
+    def index_lookup(self, key, columns=None):
+        """
+        Return the rows whose indexed columns equal `key`.
+        `columns` picks the index; it may be omitted when the table has only one.
+        """
+        if columns is None:
+            if len(self._indexes) != 1:
+                raise ValueError("index_lookup() needs `columns` unless the table has exactly one index")
+            index = next(iter(self._indexes.values()))
+        else:
+            index = self.create_index(columns)
+        return self.take(index.get(key, []))
+
+    @profiled("filter_eq")
+    def filter_eq(self, conditions=None, **kwargs):
+        """
+        Return the rows where every given column equals its value, e.g.
+        filter_eq(city1="Chicago, IL", city2="Boston, MA").
+
+        Uses the cached index covering the most condition columns (creating one
+        on all of them if none exists), so repeated lookups cost time
+        proportional to the number of matches instead of a full scan.
+        """
+        conditions = dict(conditions or {}, **kwargs)
+        if not conditions:
+            return self.take(range(self._length))
+
+        best = None
+        for name in self._indexes:
+            if set(name) <= conditions.keys() and (best is None or len(name) > len(best)):
+                best = name
+        if best is None:
+            best = tuple(conditions)
+
+        index = self.create_index(list(best))
+        key = conditions[best[0]] if len(best) == 1 else tuple(conditions[col] for col in best)
+        positions = index.get(key, [])
+
+        # Check any conditions the chosen index does not cover
+        rest = [(self._data[col], value) for col, value in conditions.items() if col not in best]
+        if rest:
+            positions = [i for i in positions if all(column[i] == value for column, value in rest)]
+        return self.take(positions)
+
+    @profiled("filter")
     def filter(self, condition_fn):
-        filtered = []
-        for row in self.rows:
-            result = condition_fn(row)
-            if result:
-                filtered.append(row)
-        
-        return MyTable(self.columns, filtered)
+        """
+        Return the rows where condition_fn(row) is true. condition_fn is a row
+        lambda or an Expr such as col("fare") > 100 (evaluated column by column).
+        """
+        if isinstance(condition_fn, Expr):
+            data = self._data
+            resolve = lambda name: data[name].getter() if name in data else _Constant(None)
+            return self.take(condition_fn._select(resolve, range(self._length)))
+        row = _RowProxy(self._getters(), 0)
+        indices = []
+        for i in range(self._length):
+            row._i = i
+            if condition_fn(row):
+                indices.append(i)
+        return self.take(indices)
 
+    @profiled("select")
     def select(self, columns):
         """
         Return a new MyTable containing only the specified columns.
@@ -70,127 +1380,365 @@ class MyTable:
         else:
             selected_columns = columns
 
-        new_rows = []
-        for row in self.rows:
-            # only keep the selected keys
-            new_row = {col: row.get(col, "") for col in selected_columns}
-            new_rows.append(new_row)
+        # Columns are shared with this table, not copied; unknown columns are filled with ""
+        data = {}
+        for col in selected_columns:
+            if col in self._data:
+                data[col] = self._data[col]
+                self._owned.discard(col)
+            else:
+                data[col] = Column("str", [""] * self._length)
 
-        return MyTable(selected_columns, new_rows)
+        return MyTable._from_columns(selected_columns, data, self._length)
 
 
     def head(self, n=5):
         for row in self.rows[:n]:
             print(row)
     
+    @profiled("drop_missing")
     def drop_missing(self, columns=None):
         """
         Remove rows with missing values.
         If `columns` is None, check all columns.
         Otherwise, only check the specified columns.
         """
-        cleaned_rows = []
-        missing_indicators = {"", None, "NA", "N/A", "null", "NaN"}
-    
-        for row in self.rows:
-            # Choose which columns to check
-            cols_to_check = columns or self.columns
-    
-            # Check if any column has a missing value
-            has_missing = any(
-                (row.get(col) in missing_indicators)
-                for col in cols_to_check
-            )
-    
-            # Keep the row only if it's fully valid
-            if not has_missing:
-                cleaned_rows.append(row)
-    
-        return MyTable(self.columns, cleaned_rows)
+        # Choose which columns to check
+        cols_to_check = columns or self.columns
+
+        # Collect the positions of rows that have a missing value in any checked column
+        missing_rows = set()
+        for col in cols_to_check:
+            column = self._data.get(col)
+            if column is None:
+                # Unknown column reads as None -> every row is missing
+                return self.take([])
+            if column.kind in ("int", "float"):
+                # Numbers are never missing; only the sparse non-numeric cells can be
+                for i, v in column.missing.items():
+                    if v in MISSING_INDICATORS:
+                        missing_rows.add(i)
+            elif column.kind == "cat":
+                # Check the dictionary, then only scan the codes if a missing value is in it
+                missing_codes = {code for code, v in enumerate(column.categories.values) if v in MISSING_INDICATORS}
+                if missing_codes:
+                    for i, code in enumerate(column.data):
+                        if code in missing_codes:
+                            missing_rows.add(i)
+            elif column.kind == "str" and MISSING_INDICATORS.isdisjoint(column.data):
+                # Fast C-level check: nothing to drop in this column
+                continue
+            else:
+                for i, v in enumerate(column.data):
+                    if v in MISSING_INDICATORS:
+                        missing_rows.add(i)
+
+        # Keep the row only if it's fully valid
+        if not missing_rows:
+            self._owned.clear()
+            return MyTable._from_columns(self.columns, dict(self._data), self._length)
+        return self.take([i for i in range(self._length) if i not in missing_rows])
     
+    def _keys(self, by):
+        """Per-row key values for `by` (scalars for one column, tuples for several)."""
+        if len(by) == 1:
+            return iter(self._data[by[0]])
+        return zip(*(self._data[col] for col in by))
+
+    def _group_positions(self, by):
+        """{key: [row positions]} for the columns `by` (reusing a cached index if there is one)."""
+        index = self._indexes.get(tuple(by))
+        if index is not None:
+            return index
+        columns = [self._data[col] for col in by]
+        if all(column.categories is None for column in columns):
+            return _positions_by_key(self._keys(by))
+
+        # Categorical columns are grouped by their codes; keys are decoded once per group
+        groups = _positions_by_key(_zip_keys([
+            column.data if column.categories is not None else column for column in columns
+        ]))
+        decoders = [column.categories.values if column.categories is not None else None for column in columns]
+        if len(decoders) == 1:
+            values = decoders[0]
+            return {values[code]: positions for code, positions in groups.items()}
+        return {
+            tuple(values[k] if values is not None else k for values, k in zip(decoders, key)): positions
+            for key, positions in groups.items()
+        }
+
+    @profiled("groupby", rows_out=None)
     def groupby(self, by):
         """Group rows by one or more columns and return a GroupBy object."""
         if isinstance(by, str):
             by = [by]
 
-        groups = {}
-        for row in self.rows:
-            key = tuple(row[col] for col in by)
-            if len(by) == 1:
-                key = key[0]
-            groups.setdefault(key, []).append(row)
+        # Groups are resolved lazily: the NumPy agg path never needs the Python dict
+        return GroupBy(None, by, table=self)
 
-        return GroupBy(groups, by)
-
-    def join(self, other, on, how="inner"):
+    @profiled("join")
+    def join(self, other, on=None, how="inner", left_on=None, right_on=None, strategy="auto"):
         """
         Join this table with another MyTable.
         
         Args:
             other (MyTable): The other table to join with.
-            on (str | list): Column(s) to join on.
+            on (str | list): Column(s) to join on (same names in both tables).
             how (str): Join type: 'inner', 'left', 'right', 'outer'
+            left_on / right_on (str | list): Join columns when the names differ,
+                e.g. left_on=['connecting_city', 'Year', 'quarter'],
+                right_on=['city1', 'Year', 'quarter']. Keys are compared as
+                tuples, so no combined string key is needed.
+            strategy (str): 'hash', 'merge' (sort-merge) or 'auto'. For inner
+                joins 'auto' merges when both inputs are already sorted by the
+                key, and otherwise hashes the smaller table. Outer joins hash.
+
+        Rows come out in left-table order (matches in right-table order), whatever
+        the strategy. When a column name is in both tables, the value from `other`
+        wins. Result columns reference the inputs and are only gathered when read.
+        """
+        left_on, right_on = _join_columns(on, left_on, right_on)
+        if strategy not in ("auto", "hash", "merge"):
+            raise ValueError(f"Unknown join strategy: {strategy}")
+
+        if how == "inner":
+            encoded = _join_key_columns(self, other, left_on, right_on)
+            if encoded is None:
+                left_keys = list(self._keys(left_on))
+                right_keys = list(other._keys(right_on))
+            else:
+                left_keys = list(_zip_keys(encoded[0]))
+                right_keys = list(_zip_keys(encoded[1]))
+            if strategy == "auto":
+                strategy = "merge" if _is_sorted(left_keys) and _is_sorted(right_keys) else "hash"
+            if strategy == "merge":
+                left_idx, right_idx = _merge_join(left_keys, right_keys)
+            else:
+                left_idx, right_idx = _hash_join(left_keys, right_keys)
+        else:
+            left_idx, right_idx = self._outer_join_positions(other, left_on, right_on, how)
+
+        # Resolve final columns (combine and deduplicate); values from `other` win on name clashes
+        all_columns = list(dict.fromkeys(self.columns + other.columns))
+        data = {}
+        if how == "inner":
+            for col in all_columns:
+                if col in other._data:
+                    data[col] = _TakenColumn(other._data[col], right_idx)
+                else:
+                    data[col] = _TakenColumn(self._data[col], left_idx)
+        else:
+            for col in all_columns:
+                self_col = self._data.get(col)
+                other_col = other._data.get(col)
+                values = []
+                for i, j in zip(left_idx, right_idx):
+                    if j is not None and other_col is not None:
+                        values.append(other_col[j])
+                    elif i is not None and self_col is not None:
+                        values.append(self_col[i])
+                    else:
+                        values.append(None)
+                sources = [c for c in (other_col, self_col) if c is not None]
+                if all(c.kind == "cat" for c in sources):
+                    # Keep the dictionary: the fill values are coded into it
+                    data[col] = Column.from_categorical(values, sources[0].categories)
+                else:
+                    data[col] = Column.from_values(values)
+
+        return MyTable._from_columns(all_columns, data, len(left_idx))
+
+    def join_count(self, other, on=None, left_on=None, right_on=None):
+        """Number of rows an inner join would produce, without building it."""
+        left_on, right_on = _join_columns(on, left_on, right_on)
+        right_groups = other._group_positions(right_on)
+        left_groups = self._group_positions(left_on)
+        return sum(len(rows) * len(right_groups.get(key, ())) for key, rows in left_groups.items())
+
+    @profiled("join_reduce")
+    def join_reduce(self, other, on=None, left_on=None, right_on=None, key_fn=None, order_by=None,
+                    k=1, where=None, suffixes=None):
+        """
+        Inner join fused with a per-group top-k reduction.
+
+        Streams through the join matches and keeps, for every group
+        key_fn(left, right), only the k matches with the smallest
+        order_by(left, right), so the full join is never held in memory.
+        `left`/`right` are read-only row views of the two input rows, valid only
+        during the call. `where(left, right)` can skip matches. Ties keep the
+        match that comes first in join order.
+
+        Returns a MyTable of the kept matches (groups in order of first match,
+        best first within a group). Columns are named as in join(); with
+        suffixes=("_leg1", "_leg2"), columns present in both tables are kept
+        from both sides with those suffixes instead (shared key columns stay
+        as they are).
         """
-        if isinstance(on, str):
-            on = [on]
+        if order_by is None:
+            raise ValueError("join_reduce() needs order_by")
+        left_on, right_on = _join_columns(on, left_on, right_on)
+        encoded = _join_key_columns(self, other, left_on, right_on)
+        if encoded is None:
+            # Plain value keys: a cached index on `other` can be reused
+            left_keys = self._keys(left_on)
+            right_groups = other._group_positions(right_on)
+        else:
+            left_keys = _zip_keys(encoded[0])
+            right_groups = _positions_by_key(_zip_keys(encoded[1]))
+
+        left_row = _RowProxy(self._getters(), 0)
+        right_row = _RowProxy(other._getters(), 0)
+
+        best = {}        # group key -> sorted [(score, sequence, i, j)], at most k entries
+        sequence = 0
+        for i, key in enumerate(left_keys):
+            matches = right_groups.get(key)
+            if not matches:
+                continue
+            left_row._i = i
+            for j in matches:
+                right_row._i = j
+                if where is not None and not where(left_row, right_row):
+                    continue
+                group_key = key_fn(left_row, right_row) if key_fn is not None else None
+                entry = (order_by(left_row, right_row), sequence, i, j)
+                sequence += 1
+
+                kept = best.get(group_key)
+                if kept is None:
+                    best[group_key] = [entry]
+                elif len(kept) < k or entry < kept[-1]:
+                    bisect.insort(kept, entry)
+                    if len(kept) > k:
+                        kept.pop()
+
+        left_idx = []
+        right_idx = []
+        for kept in best.values():
+            for _, _, i, j in kept:
+                left_idx.append(i)
+                right_idx.append(j)
+
+        data = {}
+        if suffixes is None:
+            # Same columns as join(): values from `other` win on name clashes
+            for col in dict.fromkeys(self.columns + other.columns):
+                if col in other._data:
+                    data[col] = _TakenColumn(other._data[col], right_idx)
+                else:
+                    data[col] = _TakenColumn(self._data[col], left_idx)
+        else:
+            shared_keys = {l for l, r in zip(left_on, right_on) if l == r}
+            for col in self.columns:
+                name = col + suffixes[0] if col in other._data and col not in shared_keys else col
+                data[name] = _TakenColumn(self._data[col], left_idx)
+            for col in other.columns:
+                if col in shared_keys:
+                    continue
+                name = col + suffixes[1] if col in self._data else col
+                data[name] = _TakenColumn(other._data[col], right_idx)
+
+        return MyTable._from_columns(list(data), data, len(left_idx))
 
+    def _outer_join_positions(self, other, left_on, right_on, how):
+        """Matched (self position, other position) pairs for left/right/outer joins; None marks "no row on this side"."""
         # Index other table by join key
-        other_index = {}
-        for row in other.rows:
-            key = tuple(row[col] for col in on)
-            other_index.setdefault(key, []).append(row)
+        other_index = other._group_positions(right_on)
 
-        joined_rows = []
+        left_idx = []
+        right_idx = []
         self_keys_seen = set()
-        other_keys_seen = set()
 
-        for row in self.rows:
-            key = tuple(row[col] for col in on)
+        for i, key in enumerate(self._keys(left_on)):
             self_keys_seen.add(key)
 
-            if key in other_index:
+            matches = other_index.get(key)
+            if matches:
                 # Matching rows found → combine all
-                for other_row in other_index[key]:
-                    combined = {**row, **other_row}
-                    joined_rows.append(combined)
-                other_keys_seen.add(key)
+                for j in matches:
+                    left_idx.append(i)
+                    right_idx.append(j)
             elif how in ("left", "outer"):
                 # Left/Outer join keeps left row even if no match
-                combined = {**row}
-                for col in other.columns:
-                    if col not in combined:
-                        combined[col] = None
-                joined_rows.append(combined)
+                left_idx.append(i)
+                right_idx.append(None)
 
         # Handle right/outer join for rows in 'other' not matched
         if how in ("right", "outer"):
-            for row in other.rows:
-                key = tuple(row[col] for col in on)
+            for j, key in enumerate(other._keys(right_on)):
                 if key not in self_keys_seen:
-                    combined = {**row}
-                    for col in self.columns:
-                        if col not in combined:
-                            combined[col] = None
-                    joined_rows.append(combined)
-
-        # Resolve final columns (combine and deduplicate)
-        all_columns = list(dict.fromkeys(self.columns + other.columns))
-        return MyTable(all_columns, joined_rows)
+                    left_idx.append(None)
+                    right_idx.append(j)
 
+        return left_idx, right_idx
 
 class GroupBy:
-    def __init__(self, groups, columns):
-        self.groups = groups  # dict: key -> list of rows
+    def __init__(self, groups, columns, table=None):
         self.columns = columns
+        if table is None:
+            # Legacy form: dict of key -> list of row dicts
+            rows = []
+            index_groups = {}
+            for key, group_rows in groups.items():
+                index_groups[key] = list(range(len(rows), len(rows) + len(group_rows)))
+                rows.extend(group_rows)
+            names = list(dict.fromkeys(k for row in rows for k in row))
+            table = MyTable(names, rows)
+            groups = index_groups
+        self._table = table
+        self._groups = groups          # dict: key -> list of row positions in table (None until needed)
+        self._row_groups = None
+
+    def _positions(self):
+        if self._groups is None:
+            self._groups = self._table._group_positions(self.columns)
+        return self._groups
+
+    @property
+    def groups(self):
+        """dict: key -> list of row dicts (built lazily from the row positions)."""
+        if self._row_groups is None:
+            rows = self._table.rows
+            self._row_groups = {
+                key: [rows[i] for i in indices]
+                for key, indices in self._positions().items()
+            }
+        return self._row_groups
 
-    def agg(self, agg_map):
+    @profiled("agg", rows_in=lambda grouped: len(grouped._table))
+    def agg(self, agg_map, engine="auto"):
         """
         Perform aggregation on grouped data.
         Example: {"price": "mean"} or {"price": "median"}
+
+        engine: "python", "numpy", "streaming" or "auto" (NumPy when it is
+        installed and the table has at least NUMPY_MIN_ROWS rows). "python" and
+        "numpy" give the same results; float sums/means may differ in the last
+        digits. "streaming" aggregates row by row into mergeable states (see
+        Streaming_Agg) without building the groups' row lists; it also supports
+        "var", "std" and percentiles ("p90", ...), which "auto" hands to it.
+        Its medians are t-digest estimates for groups over TDIGEST_BUFFER values.
         """
+        if engine == "auto" and any(func not in AGG_FUNCS for func in agg_map.values()):
+            engine = "streaming"
+        if engine == "streaming":
+            return StreamingAgg(self.columns, agg_map).add_table(self._table).result()
+        for func in agg_map.values():
+            if func not in AGG_FUNCS:
+                raise ValueError(f"Unknown aggregation: {func}")
+        if engine == "auto":
+            engine = "numpy" if np is not None and len(self._table) >= NUMPY_MIN_ROWS else "python"
+        if engine == "numpy":
+            if np is None:
+                raise ImportError("engine='numpy' requires NumPy (pip install numpy)")
+            return self._agg_numpy(agg_map)
+        if engine != "python":
+            raise ValueError(f"Unknown engine: {engine}")
+
         results = []
+        data = self._table._data
 
-        for key, rows in self.groups.items():
+        for key, indices in self._positions().items():
             result_row = {}
 
             # handle group keys (single or multiple)
@@ -202,7 +1750,12 @@ class GroupBy:
 
             # perform aggregation per column
             for col, func in agg_map.items():
-                values = [r[col] for r in rows if isinstance(r[col], (int, float))]
+                column = data[col]
+                if column.kind in ("int", "float") and not column.missing:
+                    # Typed numeric column: every value is a number
+                    values = [column.data[i] for i in indices]
+                else:
+                    values = [v for v in (column[i] for i in indices) if isinstance(v, (int, float))]
 
                 if not values:
                     result = None
@@ -224,8 +1777,6 @@ class GroupBy:
                         result = (sorted_vals[mid - 1] + sorted_vals[mid]) / 2
                     else:
                         result = sorted_vals[mid]
-                else:
-                    raise ValueError(f"Unknown aggregation: {func}")
 
                 result_row[col + "_" + func] = result
 
@@ -234,6 +1785,1025 @@ class GroupBy:
         new_columns = list(results[0].keys()) if results else []
         return MyTable(new_columns, results)
 
+    def _group_codes(self):
+        """
+        Factorize the group keys once: returns (codes, key_columns) where codes[i]
+        is the group number of row i and key_columns holds one Column per `by`
+        column with the key of every group, in first-appearance order like the
+        Python path.
+        """
+        if self._groups is not None:
+            # Groups already resolved (legacy form, .groups or a cached index)
+            codes = np.empty(len(self._table), dtype=np.int64)
+            keys = []
+            for g, (key, indices) in enumerate(self._groups.items()):
+                codes[indices] = g
+                keys.append(key if isinstance(key, tuple) else (key,))
+            return codes, [Column.from_values(list(values)) for values in zip(*keys)]
+
+        data = self._table._data
+        combined = None
+        for col in self.columns:
+            column = data[col]
+            if column.kind in ("int", "float") and not column.missing:
+                _, col_codes = np.unique(_as_numpy(column), return_inverse=True)
+            elif column.kind == "cat":
+                # Dictionary codes are already dense integers
+                col_codes = np.frombuffer(column.data, dtype=np.intc).astype(np.int64)
+            else:
+                values = column.to_list() if column.missing else column.data
+                lookup = {v: code for code, v in enumerate(dict.fromkeys(values))}
+                col_codes = np.fromiter(map(lookup.__getitem__, values), dtype=np.int64, count=len(values))
+            if combined is None:
+                combined = col_codes
+            else:
+                # Re-densify after every column so the combined code cannot overflow
+                combined = combined * (int(col_codes.max()) + 1) + col_codes
+                _, combined = np.unique(combined, return_inverse=True)
+
+        _, first_rows, inverse = np.unique(combined, return_index=True, return_inverse=True)
+        order = np.argsort(first_rows, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        codes = rank[inverse.reshape(-1)]
+
+        # One Column per key column, holding each group's key (taken at its first row)
+        first_rows = first_rows[order].tolist()
+        return codes, [data[col].take(first_rows) for col in self.columns]
+
+    def _agg_numpy(self, agg_map):
+        """Vectorized agg(): segmented reductions over rows sorted by group code."""
+        data = self._table._data
+        codes, key_columns = self._group_codes()
+        n_groups = len(key_columns[0]) if key_columns else 0
+        if not n_groups:
+            return MyTable([], [])
+
+        out = dict(zip(self.columns, key_columns))
+
+        for col, func in agg_map.items():
+            column = data[col]
+            if column.kind not in ("int", "float"):
+                # Text/mixed columns: let the Python path pick out the numbers
+                python_result = self.agg({col: func}, engine="python")
+                out[col + "_" + func] = python_result._data[col + "_" + func]
+                continue
+
+            values = _as_numpy(column)
+            group = codes
+            if column.missing:
+                valid = np.ones(len(values), dtype=bool)
+                valid[list(column.missing)] = False
+                values = values[valid]
+                group = codes[valid]
+
+            # Sort rows by group so each group is one contiguous segment
+            order = np.argsort(group, kind="stable")
+            sorted_group = group[order]
+            sorted_values = values[order]
+            present, starts, counts = np.unique(sorted_group, return_index=True, return_counts=True)
+
+            if not len(starts):
+                reduced = []
+            elif func == "count":
+                reduced = counts
+            elif func == "sum":
+                reduced = np.add.reduceat(sorted_values, starts)
+            elif func == "mean":
+                reduced = np.add.reduceat(sorted_values, starts) / counts
+            elif func == "min":
+                reduced = np.minimum.reduceat(sorted_values, starts)
+            elif func == "max":
+                reduced = np.maximum.reduceat(sorted_values, starts)
+            else:
+                reduced = _segment_medians(sorted_values, starts, counts)
+            reduced = reduced.tolist() if hasattr(reduced, "tolist") else reduced
+
+            if len(present) == n_groups:
+                result = reduced
+            else:
+                # Groups with no numeric values aggregate to None, as in the Python path
+                result = [None] * n_groups
+                for g, value in zip(present.tolist(), reduced):
+                    result[g] = value
+            out[col + "_" + func] = Column.from_values(result)
+
+        return MyTable._from_columns(list(out), out, n_groups)
+
+
+class RunningAgg:
+    """
+    Group aggregates maintained as rows are appended (see MyTable.running_agg).
+    Keeps a count, sum, min and max per group and column, so sum, count, mean,
+    min and max can be read at any time; median cannot be maintained this way.
+    Values that are not numbers are skipped, as in GroupBy.agg.
+    """
+    FUNCS = ("sum", "count", "mean", "min", "max")
+
+    def __init__(self, table, by, agg_map):
+        for func in agg_map.values():
+            if func not in self.FUNCS:
+                raise ValueError(f"Aggregation {func!r} cannot be maintained incrementally")
+        self.by = list(by)
+        self.agg_map = dict(agg_map)
+        self._state = {}          # key -> [[count, sum, min, max] per agg_map column]
+        self._changed = set()
+        self._add(table, range(len(table)))
+        self._changed.clear()
+
+    def _add(self, table, positions):
+        keys = [table._data[col].getter() for col in self.by]
+        values = [table._data[col].getter() for col in self.agg_map]
+        state = self._state
+        changed = self._changed
+        single = len(keys) == 1
+        for i in positions:
+            key = keys[0][i] if single else tuple(k[i] for k in keys)
+            group = state.get(key)
+            if group is None:
+                group = state[key] = [[0, 0, None, None] for _ in values]
+            for acc, column in zip(group, values):
+                v = column[i]
+                if isinstance(v, (int, float)):
+                    acc[0] += 1
+                    acc[1] += v
+                    if acc[2] is None or v < acc[2]:
+                        acc[2] = v
+                    if acc[3] is None or v > acc[3]:
+                        acc[3] = v
+            changed.add(key)
+
+    def __len__(self):
+        return len(self._state)
+
+    def keys(self):
+        """Group keys, in order of first appearance."""
+        return self._state.keys()
+
+    def get(self, key):
+        """{"<col>_<func>": value} of one group (values are None if the group has no numbers)."""
+        group = self._state[key]
+        result = {}
+        for acc, (col, func) in zip(group, self.agg_map.items()):
+            count, total, low, high = acc
+            if not count:
+                value = None
+            elif func == "sum":
+                value = total
+            elif func == "mean":
+                value = total / count
+            elif func == "count":
+                value = count
+            elif func == "min":
+                value = low
+            else:
+                value = high
+            result[col + "_" + func] = value
+        return result
+
+    def pop_changed(self):
+        """Keys of the groups that received rows since the last call."""
+        changed = self._changed
+        self._changed = set()
+        return changed
+
+    def result(self):
+        """Current aggregates as a MyTable, like GroupBy.agg()."""
+        rows = []
+        for key in self._state:
+            row = dict(zip(self.by, key if len(self.by) > 1 else (key,)))
+            row.update(self.get(key))
+            rows.append(row)
+        columns = self.by + [col + "_" + func for col, func in self.agg_map.items()]
+        return MyTable(columns, rows)
+
+
+class StratifiedSample:
+    """
+    Reservoir sample of up to `size` rows per stratum (distinct value of the
+    `by` columns) of a MyTable, with every stratum's row count, so aggregates
+    over the sample can be weighted back to the whole table (see
+    MyTable.sample_by). Strata with at most `size` rows are kept whole, and
+    their estimates are exact.
+
+    filter_eq(), select() and groupby() work on the sampled rows like on a
+    MyTable; groupby().agg() returns estimates with confidence intervals.
+    """
+
+    def __init__(self, table, by, size, seed=0, _strata=None):
+        self.by = list(by)
+        self.size = size
+        self._rng = random.Random(seed)
+        if _strata is not None:
+            # Derived sample (filter_eq, select): shares the population counts
+            self._strata = _strata
+            self._table = table
+            return
+        self._source = table
+        # Stratum number -> [rows in the table, reservoir of row positions]
+        self._strata = []
+        self._numbers = {}      # stratum key -> stratum number
+        for key, positions in table._group_positions(self.by).items():
+            reservoir = sorted(self._rng.sample(positions, size)) if len(positions) > size else list(positions)
+            self._numbers[key] = len(self._strata)
+            self._strata.append([len(positions), reservoir])
+        self._table = None
+
+    def _add(self, table, positions):
+        """Algorithm R over appended rows (called by MyTable.append_rows)."""
+        keys = [table._data[col].getter() for col in self.by]
+        single = len(keys) == 1
+        for i in positions:
+            key = keys[0][i] if single else tuple(k[i] for k in keys)
+            number = self._numbers.get(key)
+            if number is None:
+                number = self._numbers[key] = len(self._strata)
+                self._strata.append([0, []])
+            stratum = self._strata[number]
+            stratum[0] += 1
+            reservoir = stratum[1]
+            if len(reservoir) < self.size:
+                reservoir.append(i)
+            else:
+                j = self._rng.randrange(stratum[0])
+                if j < self.size:
+                    reservoir[j] = i
+        self._table = None
+
+    @property
+    def table(self):
+        """The sampled rows as a MyTable, with their stratum number in STRATUM_COLUMN."""
+        if self._table is None:
+            positions = []
+            numbers = []
+            for number, (_, reservoir) in enumerate(self._strata):
+                positions.extend(reservoir)
+                numbers.extend([number] * len(reservoir))
+            sampled = self._source.take(positions)
+            data = dict(sampled._data)
+            data[STRATUM_COLUMN] = Column("int", array("q", numbers))
+            self._table = MyTable._from_columns(sampled.columns + [STRATUM_COLUMN], data, len(positions))
+        return self._table
+
+    def __len__(self):
+        """Number of sampled rows."""
+        return len(self.table)
+
+    def population(self):
+        """Number of rows of the sampled table."""
+        return sum(count for count, _ in self._strata)
+
+    def _derive(self, table):
+        return StratifiedSample(table, self.by, self.size, _strata=self._strata)
+
+    def filter_eq(self, conditions=None, **kwargs):
+        """Sampled rows where every given column equals its value (see MyTable.filter_eq)."""
+        return self._derive(self.table.filter_eq(conditions, **kwargs))
+
+    def select(self, columns):
+        """Sampled rows with only `columns` (the stratum numbers are kept)."""
+        return self._derive(self.table.select(list(columns) + [STRATUM_COLUMN]))
+
+    def groupby(self, by):
+        if isinstance(by, str):
+            by = [by]
+        return SampledGroupBy(self, by)
+
+
+class SampledGroupBy:
+    """Groups of a StratifiedSample; agg() estimates the full table's group aggregates."""
+
+    def __init__(self, sample, columns):
+        self.sample = sample
+        self.columns = columns
+
+    def agg(self, agg_map, confidence=0.95):
+        """
+        Estimate agg(agg_map) of the full table from the sample, e.g.
+        {"fare": "mean"} or {"fare": "median"}. Next to "<col>_<func>" every
+        result row has "<col>_<func>_low" and "<col>_<func>_high": a normal
+        approximation `confidence` interval.
+
+        The mean is the stratified estimate (strata weighted by their row
+        counts, with the finite population correction, so strata sampled whole
+        contribute no error). The median is the weighted sample median, with an
+        interval from the weighted quantiles around it. Both are exact, with an
+        empty interval, when every stratum in the group was sampled whole.
+        """
+        for func in agg_map.values():
+            if func not in SAMPLE_AGG_FUNCS:
+                raise ValueError(f"Aggregation {func!r} cannot be estimated from a sample")
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        table = self.sample.table
+        strata = self.sample._strata
+        number_of = table._data[STRATUM_COLUMN].getter()
+
+        results = []
+        for key, indices in table._group_positions(self.columns).items():
+            result_row = dict(zip(self.columns, key if isinstance(key, tuple) else (key,)))
+            for col, func in agg_map.items():
+                column = table._data[col].getter()
+                by_stratum = {}
+                for i in indices:
+                    v = column[i]
+                    if isinstance(v, (int, float)):
+                        by_stratum.setdefault(number_of[i], []).append(v)
+                if not by_stratum:
+                    estimate = low = high = None
+                elif func == "mean":
+                    estimate, low, high = _stratified_mean(by_stratum, strata, z)
+                else:
+                    estimate, low, high = _weighted_median(by_stratum, strata, z)
+                name = col + "_" + func
+                result_row[name] = estimate
+                result_row[name + "_low"] = low
+                result_row[name + "_high"] = high
+            results.append(result_row)
+
+        columns = list(self.columns)
+        for col, func in agg_map.items():
+            name = col + "_" + func
+            columns += [name, name + "_low", name + "_high"]
+        return MyTable(columns, results)
+
+
+def _stratified_mean(by_stratum, strata, z):
+    """(estimate, low, high) of a mean from {stratum number: sampled values}."""
+    # Rows of each stratum the sampled values stand for
+    weights = {h: strata[h][0] * len(values) / len(strata[h][1]) for h, values in by_stratum.items()}
+    total = sum(weights.values())
+    estimate = 0.0
+    variance = 0.0
+    for h, values in by_stratum.items():
+        n = len(values)
+        mean = sum(values) / n
+        share = weights[h] / total
+        estimate += share * mean
+        if n > 1 and n < weights[h]:
+            s2 = sum((v - mean) ** 2 for v in values) / (n - 1)
+            variance += share * share * (1 - n / weights[h]) * s2 / n
+    half = z * math.sqrt(variance)
+    return estimate, estimate - half, estimate + half
+
+
+def _weighted_median(by_stratum, strata, z):
+    """(estimate, low, high) of a median from {stratum number: sampled values}."""
+    if all(len(strata[h][1]) == strata[h][0] for h in by_stratum):
+        # Every stratum sampled whole: the exact median
+        values = sorted(v for vs in by_stratum.values() for v in vs)
+        n = len(values)
+        mid = n // 2
+        median = (values[mid - 1] + values[mid]) / 2 if n % 2 == 0 else values[mid]
+        return median, median, median
+
+    pairs = sorted((v, strata[h][0] / len(strata[h][1])) for h, vs in by_stratum.items() for v in vs)
+    total = sum(w for _, w in pairs)
+    effective = total * total / sum(w * w for _, w in pairs)
+    spread = z * math.sqrt(0.25 / effective)
+
+    def quantile(p):
+        target = p * total
+        cumulative = 0.0
+        for v, w in pairs:
+            cumulative += w
+            if cumulative >= target:
+                return v
+        return pairs[-1][0]
+
+    return quantile(0.5), quantile(max(0.0, 0.5 - spread)), quantile(min(1.0, 0.5 + spread))
+
+
+class LazyTable:
+    """
+    Deferred query over a MyTable (MyTable.lazy()) or a CSV file
+    (MyTable.scan_file()). filter(), filter_eq(), select() and drop_missing()
+    only record steps; collect() plans and runs them at once:
+
+      - all filters (and drop_missing) are fused into one predicate and
+        narrow a single list of row positions; no intermediate tables are built.
+        Expr conditions run before row lambdas, which keep their order;
+      - equality tests on columns with a cached index (see create_index)
+        start from the index lookup instead of a full scan;
+      - a CSV source parses only the columns the plan reads or returns.
+
+    The result is the same as running the steps eagerly on the source.
+    """
+
+    def __init__(self, source=None, path=None, delimiter=",", schema=None, steps=(), workers=1):
+        self._source = source          # MyTable, or None for a CSV scan
+        self._path = path
+        self._delimiter = delimiter
+        self._schema = schema
+        self._steps = tuple(steps)     # ("filter", condition) / ("select", columns) / ("drop_missing", columns)
+        self._workers = workers        # from_file(workers=...) of a CSV scan
+
+    def _then(self, *step):
+        return LazyTable(self._source, self._path, self._delimiter, self._schema, self._steps + (step,),
+                         workers=self._workers)
+
+    def filter(self, condition):
+        """Keep rows where `condition` (an Expr or a row lambda) is true."""
+        return self._then("filter", condition)
+
+    def filter_eq(self, conditions=None, **kwargs):
+        """Keep rows where every given column equals its value (see MyTable.filter_eq)."""
+        conditions = dict(conditions or {}, **kwargs)
+        plan = self
+        for name, value in conditions.items():
+            plan = plan._then("filter", col(name) == value)
+        return plan
+
+    def select(self, columns):
+        """Keep only `columns` (names or positions), like MyTable.select."""
+        return self._then("select", list(columns))
+
+    def drop_missing(self, columns=None):
+        """Drop rows with a missing value in `columns` (all columns if None), like MyTable.drop_missing."""
+        return self._then("drop_missing", None if columns is None else list(columns))
+
+    def _plan(self):
+        """
+        Resolve the steps into the plan collect() runs: returns a dict with the
+        source columns to load, the output columns, the index to start from
+        and the conditions to apply, each with the columns visible at its step.
+        """
+        if self._source is not None:
+            source_columns = self._source.columns
+        else:
+            with open(self._path, "r", newline="") as f:
+                source_columns = _read_header(csv.reader(f, delimiter=self._delimiter), self._path)
+
+        scope = list(source_columns)
+        filled = set()           # visible columns that select() filled with "" (not read from the source)
+        exprs = []               # (Expr, scope, filled)
+        lambdas = []             # (row lambda, scope, filled)
+        for step in self._steps:
+            kind, arg = step
+            if kind == "select":
+                if all(isinstance(c, int) for c in arg):
+                    arg = [scope[i] for i in arg]
+                scope_set = set(scope)
+                filled = {c for c in arg if c in filled or c not in scope_set}
+                scope = list(arg)
+            elif kind == "drop_missing":
+                for name in (scope if arg is None else arg):
+                    exprs.append((~col(name).is_missing(), frozenset(scope), frozenset(filled)))
+            elif isinstance(arg, Expr):
+                for conjunct in arg.conjuncts():
+                    exprs.append((conjunct, frozenset(scope), frozenset(filled)))
+            else:
+                lambdas.append((arg, list(scope), frozenset(filled)))
+
+        # Columns read from the source: the output plus everything a condition can see
+        needed = {c for c in scope if c not in filled}
+        for expr, visible, blank in exprs:
+            needed |= {c for c in expr.columns() if c in visible and c not in blank}
+        for _, visible, blank in lambdas:
+            needed |= {c for c in visible if c not in blank}
+        load = [c for c in source_columns if c in needed]
+
+        # Equality tests that an existing index can answer
+        index = None
+        if self._source is not None and self._source._indexes:
+            equal = {}
+            for expr, visible, blank in exprs:
+                if expr.op == "==" and not isinstance(expr.args[1], Expr):
+                    name = expr.args[0].args[0]
+                    if name in visible and name not in blank and name not in equal:
+                        equal[name] = expr
+            for name in self._source._indexes:
+                if set(name) <= equal.keys() and (index is None or len(name) > len(index)):
+                    index = name
+            if index is not None:
+                covered = [equal[name] for name in index]
+                exprs = [entry for entry in exprs if not any(entry[0] is expr for expr in covered)]
+                key = [expr.args[1] for expr in covered]
+                index = (index, key[0] if len(key) == 1 else tuple(key))
+
+        return {
+            "load": load,
+            "columns": scope,
+            "filled": filled,
+            "index": index,
+            "exprs": exprs,
+            "lambdas": lambdas,
+        }
+
+    def explain(self):
+        """Describe the optimized plan as text."""
+        plan = self._plan()
+        if self._source is not None:
+            lines = [f"source: table ({len(self._source)} rows), columns {plan['load']}"]
+        else:
+            lines = [f"source: {self._path}, parse columns {plan['load']}"]
+        if plan["index"] is not None:
+            lines.append(f"index lookup: {list(plan['index'][0])} == {plan['index'][1]!r}")
+        for expr, _, _ in plan["exprs"]:
+            lines.append(f"filter: {expr!r}")
+        for fn, _, _ in plan["lambdas"]:
+            lines.append(f"filter: {getattr(fn, '__name__', 'row function')}")
+        lines.append(f"output: {plan['columns']}")
+        return "\n".join(lines)
+
+    @profiled("collect", rows_in=None)
+    def collect(self):
+        """Run the plan and return a MyTable."""
+        plan = self._plan()
+        if self._source is not None:
+            table = self._source
+        else:
+            table = MyTable.from_file(self._path, delimiter=self._delimiter, schema=self._schema,
+                                      usecols=plan["load"], workers=self._workers)
+        data = table._data
+
+        def resolver(visible, blank):
+            def resolve(name):
+                if name not in visible:
+                    return _Constant(None)
+                if name in blank:
+                    return _Constant("")
+                return data[name].getter()
+            return resolve
+
+        if plan["index"] is not None:
+            columns, key = plan["index"]
+            positions = table._indexes[columns].get(key, [])
+        else:
+            positions = range(len(table))
+        for expr, visible, blank in plan["exprs"]:
+            positions = expr._select(resolver(visible, blank), positions)
+        for fn, visible, blank in plan["lambdas"]:
+            resolve = resolver(set(visible), blank)
+            row = _RowProxy({name: resolve(name) for name in visible}, 0)
+            kept = []
+            for i in positions:
+                row._i = i
+                if fn(row):
+                    kept.append(i)
+            positions = kept
+
+        everything = isinstance(positions, range) and len(positions) == len(table)
+        if not everything:
+            positions = list(positions)
+        out = {}
+        for name in plan["columns"]:
+            if name in plan["filled"]:
+                out[name] = Column("str", [""] * len(positions))
+            elif everything:
+                out[name] = data[name]
+                table._owned.discard(name)
+            else:
+                out[name] = _TakenColumn(data[name], positions)
+        return MyTable._from_columns(plan["columns"], out, len(positions))
+
+
+def _join_columns(on, left_on, right_on):
+    """Normalize join()'s `on` / `left_on` + `right_on` arguments to two column lists."""
+    if on is not None:
+        left_on = right_on = on
+    if left_on is None or right_on is None:
+        raise ValueError("join needs `on`, or both `left_on` and `right_on`")
+    if isinstance(left_on, str):
+        left_on = [left_on]
+    if isinstance(right_on, str):
+        right_on = [right_on]
+    if len(left_on) != len(right_on):
+        raise ValueError("left_on and right_on must have the same number of columns")
+    return left_on, right_on
+
+
+def _zip_keys(columns):
+    """Per-row keys from per-column sequences (scalars for one column, tuples for several)."""
+    if len(columns) == 1:
+        return iter(columns[0])
+    return zip(*columns)
+
+
+def _positions_by_key(keys, start=0):
+    """{key: [positions]} in first-appearance order; positions count from `start`."""
+    groups = {}
+    for i, key in enumerate(keys, start):
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [i]
+        else:
+            group.append(i)
+    return groups
+
+
+def _join_key_columns(left, right, left_on, right_on):
+    """
+    Per-column key sequences for joining `left` and `right` on dictionary codes,
+    or None if no key column is categorical on both sides. Right codes are
+    translated into the left dictionary (values it lacks get negative codes
+    no left row has); other key columns compare their values.
+    """
+    pairs = [(left._data[l], right._data[r]) for l, r in zip(left_on, right_on)]
+    if all(lc.categories is None or rc.categories is None for lc, rc in pairs):
+        return None
+    left_columns, right_columns = [], []
+    for lc, rc in pairs:
+        if lc.categories is None or rc.categories is None:
+            left_columns.append(lc)
+            right_columns.append(rc)
+        elif lc.categories is rc.categories:
+            left_columns.append(lc.data)
+            right_columns.append(rc.data)
+        else:
+            codes = lc.categories.codes
+            translate = [codes.get(v, -1 - code) for code, v in enumerate(rc.categories.values)]
+            left_columns.append(lc.data)
+            right_columns.append(list(map(translate.__getitem__, rc.data)))
+    return left_columns, right_columns
+
+
+def _hash_join(left_keys, right_keys):
+    """
+    Inner hash join on key lists; builds the hash table on the smaller side.
+    Returns (left positions, right positions) in left-major order.
+    """
+    if len(left_keys) <= len(right_keys):
+        # Build on the left, probe with the right, then restore left-major order
+        index = {}
+        for i, key in enumerate(left_keys):
+            index.setdefault(key, []).append(i)
+        pairs = []
+        for j, key in enumerate(right_keys):
+            matches = index.get(key)
+            if matches:
+                pairs.extend((i, j) for i in matches)
+        pairs.sort()
+        return [i for i, _ in pairs], [j for _, j in pairs]
+
+    index = {}
+    for j, key in enumerate(right_keys):
+        index.setdefault(key, []).append(j)
+    left_idx = []
+    right_idx = []
+    for i, key in enumerate(left_keys):
+        matches = index.get(key)
+        if matches:
+            left_idx.extend([i] * len(matches))
+            right_idx.extend(matches)
+    return left_idx, right_idx
+
+
+def _merge_join(left_keys, right_keys):
+    """
+    Inner sort-merge join on key lists. Inputs that are not sorted are ordered
+    first. Returns (left positions, right positions) in left-major order.
+    """
+    left_order = range(len(left_keys)) if _is_sorted(left_keys) else sorted(range(len(left_keys)), key=left_keys.__getitem__)
+    right_order = range(len(right_keys)) if _is_sorted(right_keys) else sorted(range(len(right_keys)), key=right_keys.__getitem__)
+
+    pairs = []
+    a = b = 0
+    n_left, n_right = len(left_order), len(right_order)
+    while a < n_left and b < n_right:
+        left_key = left_keys[left_order[a]]
+        right_key = right_keys[right_order[b]]
+        if left_key < right_key:
+            a += 1
+        elif right_key < left_key:
+            b += 1
+        else:
+            # Runs of equal keys on both sides: emit their cross product
+            a_end = a
+            while a_end < n_left and left_keys[left_order[a_end]] == left_key:
+                a_end += 1
+            b_end = b
+            while b_end < n_right and right_keys[right_order[b_end]] == right_key:
+                b_end += 1
+            for x in range(a, a_end):
+                i = left_order[x]
+                pairs.extend((i, right_order[y]) for y in range(b, b_end))
+            a, b = a_end, b_end
+
+    pairs.sort()
+    return [i for i, _ in pairs], [j for _, j in pairs]
+
+
+def _is_sorted(keys):
+    """True if keys are in non-decreasing order (False if they cannot be compared)."""
+    try:
+        return all(keys[k] <= keys[k + 1] for k in range(len(keys) - 1))
+    except TypeError:
+        return False
+
+
+def _as_numpy(column):
+    """Zero-copy NumPy view of a typed numeric Column (array or mmap memoryview)."""
+    return np.frombuffer(column.data, dtype=np.int64 if column.kind == "int" else np.float64)
+
+
+def _segment_medians(sorted_values, starts, counts):
+    """
+    Median of every group segment of `sorted_values` (rows ordered by group).
+    Large groups use partial selection (np.partition) one group at a time. The
+    many tiny groups of a route-level groupby are handled all at once by sorting
+    only their rows by (group, value) and picking the middle elements.
+    """
+    medians = np.empty(len(starts), dtype=object)
+
+    small = counts <= MEDIAN_PARTITION_MIN
+    if small.any():
+        in_small = np.repeat(small, counts)
+        values = sorted_values[in_small]
+        groups = np.repeat(np.arange(len(starts))[small], counts[small])
+        values = values[np.lexsort((values, groups))]
+        small_counts = counts[small]
+        small_starts = np.concatenate(([0], np.cumsum(small_counts)[:-1]))
+        lower = small_starts + (small_counts - 1) // 2
+        upper = small_starts + small_counts // 2
+        result = ((values[lower] + values[upper]) / 2).astype(object)
+        # Odd-sized groups return the middle value itself (ints stay ints, like the Python path)
+        odd = small_counts % 2 == 1
+        result[odd] = values[lower[odd]].astype(object)
+        medians[small] = result
+
+    for g in np.flatnonzero(~small).tolist():
+        start = int(starts[g])
+        medians[g] = _segment_median(sorted_values[start:start + int(counts[g])])
+    return medians
+
+def _segment_median(segment):
+    """Median of one group's values by partial selection (np.partition) instead of a full sort."""
+    n = len(segment)
+    mid = n // 2
+    if n % 2:
+        return np.partition(segment, mid)[mid].item()
+    part = np.partition(segment, [mid - 1, mid])
+    return (part[mid - 1].item() + part[mid].item()) / 2
+
+def _read_header(reader, path):
+    """Column names from the first non-blank line of a csv.reader."""
+    for header in reader:
+        if any(h.strip() for h in header):
+            return [c.strip() for c in header]
+    raise ValueError(f"{path} has no header row")
+
+
+def _truncation_warning(line, n_values, n_columns):
+    return f" Line {line} has {n_values} values (expected {n_columns}). Truncating extras."
+
+
+def _parse_rows(reader, plan, n_columns, warn):
+    """
+    Feed the data rows of a csv.reader to the (position, add) pairs of `plan`.
+    Calls warn(reader.line_num, number of values) for rows with extra values.
+    Returns the number of rows.
+    """
+    length = 0
+    for values in reader:
+        n_values = len(values)
+        if n_values != n_columns:
+            if n_values == 0 or (n_values == 1 and not values[0].strip()):
+                # Blank line
+                continue
+            if n_values < n_columns:
+                # Fill missing columns with empty strings
+                values += [""] * (n_columns - n_values)
+            else:
+                # Extra values are ignored (warn but keep the row)
+                warn(reader.line_num, n_values)
+
+        for j, add in plan:
+            add(values[j].strip())
+        length += 1
+    return length
+
+
+def _count_byte(mm, byte, start, end, block=16 * 1024 * 1024):
+    """Occurrences of `byte` in mm[start:end], counted block by block."""
+    total = 0
+    for offset in range(start, end, block):
+        total += mm[offset:min(offset + block, end)].count(byte)
+    return total
+
+
+def _byte_ranges(path, header_lines, workers, min_bytes=PARALLEL_MIN_BYTES):
+    """
+    Split the data lines of a CSV (after its first `header_lines` lines) into up
+    to `workers` (start, end) byte ranges of at least `min_bytes` that each
+    begin at the start of a record. A newline only ends a record outside double
+    quotes, tracked by the parity of the quotes before it, so quoted fields may
+    contain newlines. Returns [] when the file is too small to be worth splitting.
+    """
+    size = os.path.getsize(path)
+    if size < 2 * min_bytes:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        begin = 0
+        for _ in range(header_lines):
+            begin = mm.find(b"\n", begin) + 1
+            if not begin:
+                return []
+        n_ranges = min(workers, (size - begin) // min_bytes)
+        if n_ranges < 2:
+            return []
+        first = begin
+        step = (size - first) // n_ranges
+
+        ranges = []
+        scanned = begin         # quotes before this offset are counted ...
+        quoted = False          # ... and leave it inside a quoted field if odd
+        for k in range(1, n_ranges):
+            target = max(first + k * step, scanned)
+            end = None
+            while end is None:
+                newline = mm.find(b"\n", target)
+                if newline < 0:
+                    break
+                quoted ^= bool(_count_byte(mm, b'"', scanned, newline) & 1)
+                scanned = target = newline + 1
+                if not quoted:
+                    end = newline + 1
+            if end is None or end >= size:
+                break
+            ranges.append((begin, end))
+            begin = end
+        ranges.append((begin, size))
+    return ranges
+
+
+def _parse_range(path, start, end, encoding, delimiter, n_columns, positions, types):
+    """
+    Worker of MyTable.from_file(workers=...): parse the rows in bytes
+    start..end of a CSV. Returns (Columns in `positions` order, number of rows,
+    number of lines read, [(line within the range, number of values)] warnings).
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode(encoding)
+    reader = csv.reader(io.StringIO(text, newline=""), delimiter=delimiter)
+    builders = [_ColumnBuilder(col_type) for col_type in types]
+    plan = [(j, builder.add) for j, builder in zip(positions, builders)]
+    warnings = []
+    length = _parse_rows(reader, plan, n_columns, lambda line, n: warnings.append((line, n)))
+    return [builder.build() for builder in builders], length, reader.line_num, warnings
+
+
+def _agg_range(path, start, end, encoding, delimiter, n_columns, positions, types, keep, by, agg_map):
+    """
+    Worker of MyTable.agg_file(): parse bytes start..end of a CSV and aggregate
+    them. Returns (StreamingAgg, number of lines read, warnings as in _parse_range).
+    """
+    columns, length, lines, warnings = _parse_range(path, start, end, encoding, delimiter, n_columns, positions, types)
+    chunk = MyTable._from_columns(keep, dict(zip(keep, columns)), length)
+    return StreamingAgg(by, agg_map).add_table(chunk), lines, warnings
+
+
+def _concat_columns(chunks):
+    """
+    One Column from the per-range Columns of a parallel parse. Chunks of the
+    same int/float/str kind are joined as they are (typed arrays are extended
+    without boxing the values) and categorical codes are mapped into one
+    dictionary; otherwise the kind is picked again from all
+    values, as from_values would for the whole file.
+    """
+    kinds = {chunk.kind for chunk in chunks}
+    kind = kinds.pop() if len(kinds) == 1 else None
+    if kind == "cat":
+        # Every worker built its own dictionary: re-code into the first one
+        categories = chunks[0].categories
+        data = chunks[0].data
+        for chunk in chunks[1:]:
+            translate = [categories.encode(v) for v in chunk.categories.values]
+            data.extend(array("i", map(translate.__getitem__, chunk.data)))
+        return Column(kind, data, categories=categories)
+    if kind not in ("int", "float", "str"):
+        values = []
+        for chunk in chunks:
+            values.extend(chunk.to_list())
+        return Column.from_values(values)
+
+    data = chunks[0].data
+    missing = dict(chunks[0].missing)
+    for chunk in chunks[1:]:
+        offset = len(data)
+        for i, v in chunk.missing.items():
+            missing[offset + i] = v
+        data.extend(chunk.data)
+    if kind == "str":
+        # Strings from different workers arrive as separate objects: intern them again
+        data = list(map(sys.intern, data))
+    return Column(kind, data, missing)
+
+
+def _require_pyarrow(what):
+    if pa is None:
+        raise ImportError(f"{what} requires pyarrow (pip install pyarrow)")
+
+
+def _column_to_arrow(column):
+    """pyarrow Array of a Column (see MyTable.to_arrow)."""
+    n = len(column)
+    if column.kind in ("int", "float"):
+        arrow_type = pa.int64() if column.kind == "int" else pa.float64()
+        if column.missing:
+            missing = column.missing
+            return pa.array([None if i in missing else v for i, v in enumerate(column.data)], type=arrow_type)
+        # The typed array (or mmap'd cache block) is the Arrow values buffer as it is
+        return pa.Array.from_buffers(arrow_type, n, [None, pa.py_buffer(column.data)])
+    if column.kind == "cat":
+        codes = pa.Array.from_buffers(pa.int32(), n, [None, pa.py_buffer(column.data)])
+        return pa.DictionaryArray.from_arrays(codes, pa.array(column.categories.values))
+    values = column.to_list()
+    if column.kind == "object":
+        # Numbers with mostly blank cells (see Column.from_values): numeric with nulls, not text
+        numbers = [v for v in values if v is not None and v != ""]
+        if numbers and all(v.__class__ is int or v.__class__ is float for v in numbers):
+            arrow_type = pa.float64() if any(v.__class__ is float for v in numbers) else pa.int64()
+            try:
+                return pa.array([None if v is None or v == "" else v for v in values], type=arrow_type)
+            except (pa.ArrowInvalid, OverflowError):
+                pass
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed values: stored as their text
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def _typed_from_arrow(array_, typecode, size):
+    """array(typecode) of a non-chunked pyarrow Array's values buffer (nulls left as 0)."""
+    data = array(typecode)
+    buffer = array_.buffers()[1]
+    if buffer is not None:
+        data.frombytes(memoryview(buffer)[array_.offset * size:(array_.offset + len(array_)) * size])
+    return data
+
+
+def _null_positions(array_):
+    if not array_.null_count:
+        return []
+    return [i for i, valid in enumerate(array_.is_valid().to_pylist()) if not valid]
+
+
+def _column_from_arrow(chunked):
+    """Column of a pyarrow ChunkedArray (see MyTable.from_arrow)."""
+    arrow_type = chunked.type
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        if pa.types.is_integer(arrow_type):
+            kind, typecode, target = "int", "q", pa.int64()
+        else:
+            kind, typecode, target = "float", "d", pa.float64()
+        array_ = chunked.combine_chunks().cast(target)
+        data = _typed_from_arrow(array_, typecode, 8)
+        missing = {}
+        for i in _null_positions(array_):
+            data[i] = 0
+            missing[i] = ""
+        return Column(kind, data, missing)
+
+    if pa.types.is_dictionary(arrow_type):
+        # Chunks share one dictionary after Table.unify_dictionaries()
+        categories = Categories(chunked.chunk(0).dictionary.to_pylist() if chunked.num_chunks else [])
+        codes = array("i")
+        offset = 0
+        for chunk in chunked.chunks:
+            indices = chunk.indices.cast(pa.int32())
+            codes.extend(_typed_from_arrow(indices, "i", 4))
+            nulls = _null_positions(indices)
+            if nulls:
+                blank = categories.encode("")
+                for i in nulls:
+                    codes[offset + i] = blank
+            offset += len(chunk)
+        return Column("cat", codes, categories=categories)
+
+    values = chunked.to_pylist()
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return Column("str", ["" if v is None else sys.intern(v) for v in values])
+    return Column.from_values(values)
+
+
+def _parquet_row_groups(metadata, ranges):
+    """Indices of the row groups whose min/max statistics may hold rows within `ranges`."""
+    groups = []
+    for g in range(metadata.num_row_groups):
+        row_group = metadata.row_group(g)
+        stats = {}
+        for j in range(row_group.num_columns):
+            chunk = row_group.column(j)
+            if chunk.path_in_schema in ranges:
+                stats[chunk.path_in_schema] = chunk.statistics
+        keep = True
+        for name, (low, high) in ranges.items():
+            stat = stats.get(name)
+            if stat is not None and stat.has_min_max and (stat.max < low or stat.min > high):
+                keep = False
+                break
+        if keep:
+            groups.append(g)
+    return groups
+
+
+def _file_signature(path):
+    """(mtime, size) of a file, used to tell whether a cache is still valid."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
 
 # helper method to avoid separating location: eg. "Seattle,WA" to "Seattle" "WA"
 def split_csv_line(line, delimiter=","):
@@ -0,0 +1,124 @@
+"""
+Bounded, thread-safe LRU cache for computed results (per-route projections).
+
+Entries are evicted least recently used first once the cache holds more than
+`max_entries` results or more than `max_bytes` (estimated with sys.getsizeof
+over the value's lists, dicts and scalars). With a `ttl`, entries older than
+that many seconds count as misses. Hit, miss, eviction and expiry counters are
+kept for monitoring.
+
+Cached values are shared by every caller: treat them as read-only.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# approx_size() measures this many items of a longer list and extrapolates
+SIZE_SAMPLE = 4
+
+
+def approx_size(value):
+    """
+    Approximate memory of a value made of lists, tuples, dicts and scalars, in
+    bytes. Tables (anything with a MyTable-style memory_usage()) report their own.
+    """
+    memory_usage = getattr(value, "memory_usage", None)
+    if memory_usage is not None:
+        return sum(memory_usage().values())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        # Keys are left out: rows share their (interned) column names
+        for v in value.values():
+            size += approx_size(v)
+    elif isinstance(value, (list, tuple)) and len(value) > SIZE_SAMPLE:
+        # Projection rows all have the same shape
+        size += sum(approx_size(v) for v in value[:SIZE_SAMPLE]) * len(value) // SIZE_SAMPLE
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += approx_size(v)
+    return size
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()     # key -> (value, size, stored at), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Cached value of `key` (marked as recently used), or `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store `value`, evicting least recently used entries to stay within the limits."""
+        size = approx_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached value of `key`, or compute() stored under it. compute() runs
+        outside the lock, so two threads missing the same key may both run it.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters and current size, e.g. for a debug panel."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,280 @@
+"""
+Connecting-itinerary graph.
+
+Cities are nodes and every row of the cleaned flight table with a valid fare
+is an edge for its (Year, quarter). Edges are stored once, grouped by
+(Year, quarter, origin city), in flat adjacency arrays (CSR layout): the
+outgoing edges of city c in period p are positions
+offsets[p * n + c] .. offsets[p * n + c + 1] of targets/fares/miles/rows.
+An incoming adjacency with the same layout is kept for pruning.
+
+Searches answer 1-stop and 2-stop questions for one (Year, quarter) with a
+hop-layered Dijkstra that stops after the k best itineraries.
+"""
+import heapq
+from array import array
+
+
+# Itineraries with more stops are not searched
+MAX_STOPS = 2
+
+# Search orders: total nsmiles then total fare, or the other way round
+RANKINGS = ("distance", "fare")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _csr(slots, size, values):
+    """
+    Counting sort of edge ids by slot. Returns (offsets, order) where the
+    edges of slot s are order[offsets[s]:offsets[s + 1]].
+    """
+    offsets = array('q', bytes(8 * (size + 1)))
+    for slot in slots:
+        offsets[slot + 1] += 1
+    for s in range(size):
+        offsets[s + 1] += offsets[s]
+    cursor = array('q', offsets[:size])
+    order = array('q', bytes(8 * len(slots)))
+    for edge, slot in enumerate(slots):
+        order[cursor[slot]] = values[edge]
+        cursor[slot] += 1
+    return offsets, order
+
+
+class RouteGraph:
+    """
+    City graph over all (Year, quarter) periods of a flight table.
+    Edge rows refer to positions in the table the graph was built from.
+    """
+
+    def __init__(self, cities, periods, out_offsets, targets, fares, miles, rows,
+                 in_offsets, sources):
+        self.cities = cities                              # node id -> city name
+        self.city_ids = {city: i for i, city in enumerate(cities)}
+        self.periods = periods                            # period id -> (Year, quarter)
+        self.period_ids = {period: i for i, period in enumerate(periods)}
+        self._out_offsets = out_offsets
+        self._targets = targets
+        self._fares = fares
+        self._miles = miles
+        self._rows = rows
+        self._in_offsets = in_offsets
+        self._sources = sources
+
+    @classmethod
+    def from_table(cls, flights, city1="city1", city2="city2", fare="fare", nsmiles="nsmiles"):
+        """
+        Build the graph from a flight table. Rows without a positive fare and
+        same-city rows are skipped; a missing distance counts as 0 miles.
+        The fare rule is the one of the join_reduce() search this replaced;
+        skipping same-city rows is not (that join could connect through the
+        origin or destination over one).
+        """
+        years = flights.column("Year")
+        quarters = flights.column("quarter")
+        origins = flights.column(city1)
+        dests = flights.column(city2)
+        fare_values = flights.column(fare)
+        mile_values = flights.column(nsmiles)
+
+        cities = sorted(set(origins) | set(dests), key=str)
+        city_ids = {city: i for i, city in enumerate(cities)}
+        periods = sorted(set(zip(years, quarters)))
+        period_ids = {period: i for i, period in enumerate(periods)}
+        n = len(cities)
+
+        src, dst, out_slots, in_slots = [], [], [], []
+        edge_fares, edge_miles, edge_rows = array('d'), array('d'), array('q')
+        for i, (year, quarter, origin, dest, f, m) in enumerate(
+                zip(years, quarters, origins, dests, fare_values, mile_values)):
+            if origin == dest or not _is_number(f) or f <= 0:
+                continue
+            base = period_ids[(year, quarter)] * n
+            a = city_ids[origin]
+            b = city_ids[dest]
+            src.append(a)
+            dst.append(b)
+            out_slots.append(base + a)
+            in_slots.append(base + b)
+            edge_fares.append(f)
+            edge_miles.append(m if _is_number(m) else 0.0)
+            edge_rows.append(i)
+
+        size = len(periods) * n
+        out_offsets, out_order = _csr(out_slots, size, range(len(out_slots)))
+        in_offsets, sources = _csr(in_slots, size, src)
+        return cls(
+            cities,
+            periods,
+            out_offsets,
+            array('q', (dst[e] for e in out_order)),
+            array('d', (edge_fares[e] for e in out_order)),
+            array('d', (edge_miles[e] for e in out_order)),
+            array('q', (edge_rows[e] for e in out_order)),
+            in_offsets,
+            sources,
+        )
+
+    def __len__(self):
+        """Number of edges."""
+        return len(self._targets)
+
+    def _slot(self, city, period):
+        """Adjacency slot of a city in a period, or None if either is unknown."""
+        node = self.city_ids.get(city)
+        period_id = self.period_ids.get(period)
+        if node is None or period_id is None:
+            return None
+        return period_id * len(self.cities) + node
+
+    def _predecessors(self, node, base):
+        """Set of nodes with an edge into `node` in the period starting at slot `base`."""
+        slot = base + node
+        return set(self._sources[self._in_offsets[slot]:self._in_offsets[slot + 1]])
+
+    def search(self, origin, dest, year, quarter, stops=1, by="distance", k=1):
+        """
+        The k best itineraries from origin to dest with exactly `stops`
+        connections in one (Year, quarter), best first.
+
+        by="distance" ranks by total nsmiles, then total fare; by="fare" the
+        other way round. Connections never pass through the origin or the
+        destination, and with two stops the connecting cities differ.
+        Each itinerary is a dict with Year, quarter, cities (tuple of city
+        names), legs (tuple of row positions in the source table),
+        nsmiles_total and fare_total.
+        """
+        if by not in RANKINGS:
+            raise ValueError(f"Unknown ranking: {by!r}")
+        if not 0 <= stops <= MAX_STOPS:
+            raise ValueError(f"stops must be between 0 and {MAX_STOPS}")
+        start = self._slot(origin, (year, quarter))
+        end = self._slot(dest, (year, quarter))
+        if start is None or end is None or start == end or k <= 0:
+            return []
+
+        base = start - self.city_ids[origin]
+        source = self.city_ids[origin]
+        target = self.city_ids[dest]
+        legs = stops + 1
+        # Pruning: the node before the destination must have an edge into it
+        before_target = self._predecessors(target, base)
+        if not before_target:
+            return []
+
+        out_offsets = self._out_offsets
+        targets = self._targets
+        fares = self._fares
+        miles = self._miles
+        rows = self._rows
+        fare_first = by == "fare"
+
+        # Hop-layered Dijkstra: a label is (cost, tie-break, sequence, node, hops, path).
+        # Each (node, hops) state is expanded at most k times; weights are
+        # non-negative, so the first k labels reaching the target are the k best.
+        heap = [(0.0, 0.0, 0, source, 0, ())]
+        expanded = {}
+        sequence = 1
+        results = []
+        while heap:
+            cost, tie, _, node, hops, path = heapq.heappop(heap)
+            if hops == legs:
+                results.append((cost, tie, path))
+                if len(results) == k:
+                    break
+                continue
+            state = (node, hops)
+            count = expanded.get(state, 0)
+            if count == k:
+                continue
+            expanded[state] = count + 1
+
+            last_leg = hops == legs - 1
+            slot = base + node
+            for e in range(out_offsets[slot], out_offsets[slot + 1]):
+                nxt = targets[e]
+                if last_leg:
+                    if nxt != target:
+                        continue
+                else:
+                    if nxt == target or nxt == source:
+                        continue
+                    if hops == legs - 2 and nxt not in before_target:
+                        continue
+                if fare_first:
+                    step, step_tie = fares[e], miles[e]
+                else:
+                    step, step_tie = miles[e], fares[e]
+                heapq.heappush(heap, (cost + step, tie + step_tie, sequence, nxt, hops + 1, path + (e,)))
+                sequence += 1
+
+        itineraries = []
+        for cost, tie, path in results:
+            fare_total = cost if fare_first else tie
+            nsmiles_total = tie if fare_first else cost
+            itineraries.append({
+                'Year': year,
+                'quarter': quarter,
+                'cities': (origin,) + tuple(self.cities[targets[e]] for e in path),
+                'legs': tuple(rows[e] for e in path),
+                'nsmiles_total': nsmiles_total,
+                'fare_total': fare_total,
+            })
+        return itineraries
+
+    def best_per_period(self, origin, dest, stops=1, by="distance"):
+        """Best itinerary of every (Year, quarter) that has one, in chronological order."""
+        best = []
+        for year, quarter in self.periods:
+            found = self.search(origin, dest, year, quarter, stops=stops, by=by, k=1)
+            if found:
+                best.append(found[0])
+        return best
+
+    def count(self, origin, dest, stops=1, period=None):
+        """
+        Number of itineraries with exactly `stops` connections, over all periods
+        or one (Year, quarter), without enumerating them.
+        """
+        if not 0 <= stops <= MAX_STOPS:
+            raise ValueError(f"stops must be between 0 and {MAX_STOPS}")
+        source = self.city_ids.get(origin)
+        target = self.city_ids.get(dest)
+        if source is None or target is None or source == target:
+            return 0
+        if period is None:
+            period_ids = range(len(self.periods))
+        elif period in self.period_ids:
+            period_ids = [self.period_ids[period]]
+        else:
+            return 0
+
+        n = len(self.cities)
+        out_offsets = self._out_offsets
+        targets = self._targets
+        total = 0
+        for period_id in period_ids:
+            base = period_id * n
+            # ways[node]: number of paths from the origin to node with the legs so far
+            ways = {source: 1}
+            for hop in range(stops + 1):
+                last_leg = hop == stops
+                reached = {}
+                for node, paths in ways.items():
+                    slot = base + node
+                    for e in range(out_offsets[slot], out_offsets[slot + 1]):
+                        nxt = targets[e]
+                        if last_leg:
+                            if nxt != target:
+                                continue
+                        elif nxt == target or nxt == source:
+                            continue
+                        reached[nxt] = reached.get(nxt, 0) + paths
+                ways = reached
+                if not ways:
+                    break
+            total += ways.get(target, 0)
+        return total
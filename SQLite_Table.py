@@ -0,0 +1,675 @@
+"""
+SQLite storage for tables larger than we want to keep in RAM. SQLiteTable
+keeps its rows in a local SQLite file and has the read API of MyTable, with
+the work done by SQLite:
+
+    flights = SQLiteTable.from_file("flights.csv", "flights.sqlite", schema=FLIGHT_SCHEMA,
+                                    indexes=[["city1", "city2", "Year", "quarter"]])
+    route = flights.filter_eq(city1="Chicago, IL", city2="Boston, MA")
+    route.groupby(["Year", "quarter"]).agg({"fare": "mean"})      # a MyTable
+
+filter() with col() expressions, filter_eq(), select(), drop_missing() and
+join() return SQLiteTable views: queries over the file, run when their rows
+are read. groupby().agg() runs as one GROUP BY query and returns a MyTable,
+like take() and collect(). Lambda filters cannot be translated and run on
+the collected MyTable instead.
+
+Rows keep the file order and groups their first-appearance order, as in
+MyTable. Cells of int/float columns that are not numbers are stored as NULL
+and read back as "" (like blanks); float sums and means may differ from
+MyTable's in the last digits.
+"""
+import csv
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import weakref
+
+from Mini_DataFrame import (CATEGORY, MISSING_INDICATORS, Expr, MyTable, _file_signature, _guess_value,
+                            _join_columns, _read_header, col)
+from Streaming_Agg import Moments, check_funcs, quantile_of
+from Table_Profiler import profiled
+
+
+# rows inserted per executemany() call while bulk loading (all in one transaction)
+SQLITE_BATCH_ROWS = 100000
+
+# most values bound in one "IN (...)" list of take()
+SQLITE_MAX_PARAMS = 900
+
+# page cache of each connection, in KiB
+SQLITE_CACHE_KIB = 64 * 1024
+
+# hidden column of every table and view: the row's position in file order
+ROW = "_row"
+
+# table holding the columns, their types and the source signature
+_META = "_mytable_meta"
+
+_SQL_TYPES = {"int": "INTEGER", "float": "REAL", "text": "TEXT", None: ""}
+
+_JOINS = {"inner": "JOIN", "left": "LEFT JOIN", "right": "RIGHT JOIN", "outer": "FULL JOIN"}
+
+_COMPARISONS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def _q(name):
+    """A quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _kind_of(col_type):
+    """Storage kind of a from_file() schema type."""
+    if col_type is int:
+        return "int"
+    if col_type is float:
+        return "float"
+    if col_type is str or col_type == CATEGORY:
+        return "text"
+    if col_type is None:
+        return None
+    raise ValueError(f"Unsupported column type: {col_type!r} (use int, float, str or {CATEGORY!r})")
+
+
+def _converter(kind):
+    """Raw CSV cell -> stored value for a column kind; non-numbers in int/float columns become NULL."""
+    if kind in ("int", "float"):
+        convert = int if kind == "int" else float
+
+        def to_number(v):
+            try:
+                return convert(v)
+            except (ValueError, OverflowError):
+                return None
+        return to_number
+    if kind == "text":
+        return str
+    return _guess_value
+
+
+class _Quantile:
+    """SQL aggregate mt_quantile(value, q): exact quantile, interpolated like the streaming engine."""
+
+    def __init__(self):
+        self.values = []
+        self.q = None
+
+    def step(self, value, q):
+        self.q = q
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        values = sorted(self.values)
+        n = len(values)
+        if not n:
+            return None
+        if self.q == 0.5:
+            # Same arithmetic as GroupBy.agg's median
+            mid = n // 2
+            return (values[mid - 1] + values[mid]) / 2 if n % 2 == 0 else values[mid]
+        position = self.q * (n - 1)
+        i = int(position)
+        if i + 1 >= n:
+            return values[-1]
+        fraction = position - i
+        return values[i] + (values[i + 1] - values[i]) * fraction if fraction else values[i]
+
+
+class _Variance:
+    """SQL aggregates mt_var(value) / mt_std(value), with Streaming_Agg.Moments."""
+    func = "var"
+
+    def __init__(self):
+        self.moments = Moments()
+
+    def step(self, value):
+        if value is not None:
+            self.moments.add(value)
+
+    def finalize(self):
+        return self.moments.result(self.func)
+
+
+class _StdDev(_Variance):
+    func = "std"
+
+
+class _Database:
+    """
+    One SQLite connection per file, shared by a table and all its views.
+    Streamlit sessions run in threads: queries are serialized with a lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+        self.conn.create_aggregate("mt_quantile", 2, _Quantile)
+        self.conn.create_aggregate("mt_var", 1, _Variance)
+        self.conn.create_aggregate("mt_std", 1, _StdDev)
+        self.lock = threading.RLock()
+        self._temp_names = itertools.count()
+
+    def read(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def indexes(self, table):
+        """Column lists of the indexes on a table."""
+        with self.lock:
+            names = [row[1] for row in self.conn.execute(f"PRAGMA index_list({_q(table)})")]
+            return [[row[2] for row in self.conn.execute(f"PRAGMA index_info({_q(name)})")] for name in names]
+
+    def temp_table(self, table):
+        """A MyTable copied into a temporary table of this connection (dropped with the returned SQLiteTable)."""
+        name = f"_temp{next(self._temp_names)}"
+        kinds = {column: _column_kind(table, column) for column in table.columns}
+        with self.lock:
+            _write_rows(self.conn, "temp." + _q(name), table.columns, kinds, _table_rows(table, kinds))
+        copy = SQLiteTable(self, "temp." + _q(name), table.columns, kinds, (), base=name)
+        weakref.finalize(copy, self._drop, name)
+        return copy
+
+    def _drop(self, name):
+        with self.lock:
+            self.conn.execute(f"DROP TABLE IF EXISTS temp.{_q(name)}")
+
+
+def _column_kind(table, name):
+    """Storage kind of a MyTable column."""
+    kind = table._data[name].kind
+    if kind in ("int", "float"):
+        return kind
+    return "text" if kind in ("str", "cat") else None
+
+
+def _table_rows(table, kinds):
+    """Value tuples of a MyTable to store: missing numbers ("" in MyTable) become NULL."""
+    columns = []
+    for name in table.columns:
+        values = table.column(name)
+        if kinds[name] in ("int", "float"):
+            values = [v if isinstance(v, (int, float)) else None for v in values]
+        columns.append(values)
+    return zip(*columns)
+
+
+def _write_rows(conn, target, columns, kinds, rows):
+    """
+    Create table `target` (with the ROW position column) and insert `rows`
+    (tuples of stored values) with executemany(), in one transaction.
+    Returns the number of rows.
+    """
+    definitions = ", ".join(f"{_q(name)} {_SQL_TYPES[kinds[name]]}".rstrip() for name in columns)
+    conn.execute(f"CREATE TABLE {target} ({_q(ROW)} INTEGER PRIMARY KEY, {definitions})")
+    insert = f"INSERT INTO {target} VALUES ({', '.join('?' * (len(columns) + 1))})"
+    length = 0
+    conn.execute("BEGIN")
+    try:
+        rows = iter(rows)
+        while True:
+            batch = [(position, *values)
+                     for position, values in enumerate(itertools.islice(rows, SQLITE_BATCH_ROWS), length)]
+            if not batch:
+                break
+            conn.executemany(insert, batch)
+            length += len(batch)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return length
+
+
+class _SQLiteIndex:
+    """
+    Read-only {key: [row positions]} over an SQLite index, as returned by
+    MyTable.create_index(): every lookup is one indexed query.
+    """
+
+    def __init__(self, table, columns):
+        self._table = table
+        self._columns = columns
+
+    def get(self, key, default=None):
+        values = key if len(self._columns) > 1 else (key,)
+        where = " AND ".join(f"{_q(name)} = ?" for name in self._columns)
+        rows = self._table._db.read(
+            f"SELECT {_q(ROW)} FROM {self._table._from()} WHERE {where} ORDER BY {_q(ROW)}",
+            self._table._params + tuple(values))
+        return [position for (position,) in rows] if rows else default
+
+    def __getitem__(self, key):
+        positions = self.get(key)
+        if positions is None:
+            raise KeyError(key)
+        return positions
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+
+class SQLiteTable:
+    """
+    A table in an SQLite file, or a view (a query) over one; build it with
+    from_file(), from_table() or open(). Views share the file's connection.
+    """
+
+    def __init__(self, db, sql, columns, kinds, params=(), base=None):
+        self._db = db
+        self._sql = sql                 # table name, or a SELECT yielding ROW and the columns
+        self._params = tuple(params)
+        self.columns = list(columns)
+        self._kinds = kinds             # column -> "int", "float", "text" or None (any value)
+        self._base = base               # table name if this is a stored table (positions are ROW values)
+        self._length = None
+        self._rows = None
+
+    # ---- building and opening ---------------------------------------------
+
+    @classmethod
+    @profiled("sqlite_from_file", rows_in=None)
+    def from_file(cls, path, db_path, delimiter=",", schema=None, usecols=None, drop_missing=None,
+                  indexes=(), name="data", source=None):
+        """
+        Bulk-load a CSV into a new SQLite file at `db_path` (replacing it) and
+        open it. The CSV is streamed, so memory does not grow with its size.
+
+        Args:
+            schema, usecols, delimiter: as in MyTable.from_file(); int/float
+                columns are stored as INTEGER/REAL, str and CATEGORY as TEXT.
+            drop_missing (list | None): skip rows with a missing value in any
+                of these columns (see MyTable.drop_missing).
+            indexes (list): column lists to index once the rows are in.
+            source: file whose signature is stored, for open(source=...);
+                defaults to `path`.
+        """
+        schema = schema or {}
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            columns = _read_header(reader, path)
+            keep = columns if usecols is None else list(usecols)
+            unknown = [c for c in keep + list(drop_missing or ()) if c not in columns]
+            if unknown:
+                raise ValueError(f"Columns not found in {path}: {unknown}")
+            kinds = {column: _kind_of(schema.get(column)) for column in keep}
+            plan = [(columns.index(column), _converter(kinds[column])) for column in keep]
+            required = [columns.index(column) for column in drop_missing or ()]
+            n_columns = len(columns)
+
+            def rows():
+                for values in reader:
+                    if len(values) < n_columns:
+                        if not values or (len(values) == 1 and not values[0].strip()):
+                            # Blank line
+                            continue
+                        values += [""] * (n_columns - len(values))
+                    if required and any(values[j].strip() in MISSING_INDICATORS for j in required):
+                        continue
+                    yield tuple(convert(values[j].strip()) for j, convert in plan)
+
+            return cls._create(db_path, name, keep, kinds, rows(), indexes, source or path)
+
+    @classmethod
+    def from_table(cls, table, db_path, indexes=(), name="data", source=None):
+        """Write a MyTable into a new SQLite file at `db_path` (replacing it) and open it."""
+        kinds = {column: _column_kind(table, column) for column in table.columns}
+        return cls._create(db_path, name, table.columns, kinds, _table_rows(table, kinds), indexes, source)
+
+    @classmethod
+    def _create(cls, db_path, name, columns, kinds, rows, indexes, source):
+        tmp_path = f"{db_path}.tmp{os.getpid()}"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        try:
+            # A half-written file is never used: no journal needed while loading
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            _write_rows(conn, _q(name), columns, kinds, rows)
+            for index_columns in indexes:
+                index_name = f"{name}_by_" + "_".join(index_columns)
+                conn.execute(f"CREATE INDEX {_q(index_name)} ON {_q(name)} "
+                             f"({', '.join(map(_q, index_columns))})")
+            meta = {
+                "columns": list(columns),
+                "kinds": kinds,
+                "source": _file_signature(source) if source is not None else None,
+            }
+            conn.execute(f"CREATE TABLE {_q(_META)} (name TEXT PRIMARY KEY, meta TEXT)")
+            conn.execute(f"INSERT INTO {_q(_META)} VALUES (?, ?)", (name, json.dumps(meta)))
+            conn.execute("ANALYZE")
+        finally:
+            conn.close()
+        os.replace(tmp_path, db_path)
+        return cls.open(db_path, name=name)
+
+    @classmethod
+    def open(cls, db_path, source=None, name="data"):
+        """
+        Open a table written by from_file()/from_table(). Raises
+        FileNotFoundError if the file does not exist and ValueError if it is
+        not such a file or `source` changed since it was written.
+        """
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(db_path)
+        db = _Database(db_path)
+        try:
+            (meta,), = db.read(f"SELECT meta FROM {_q(_META)} WHERE name = ?", (name,))
+        except (sqlite3.DatabaseError, ValueError):
+            raise ValueError(f"{db_path} has no table {name!r}") from None
+        meta = json.loads(meta)
+        if source is not None and meta["source"] != _file_signature(source):
+            raise ValueError(f"{db_path} is stale: {source} has changed")
+        return cls(db, _q(name), meta["columns"], meta["kinds"], base=name)
+
+    # ---- reading ----------------------------------------------------------
+
+    def _from(self):
+        """The FROM item of a query over this table."""
+        return self._sql if self._base is not None else f"({self._sql})"
+
+    def _view(self, sql, columns, kinds, params=()):
+        return SQLiteTable(self._db, sql, columns, kinds, self._params + tuple(params))
+
+    def _decoders(self, columns):
+        """
+        Per column: None, or a function reading NULL back as "": stored NULL
+        numbers, and the cells an outer join leaves empty (untyped columns).
+        """
+        return [(lambda v: "" if v is None else v) if self._kinds.get(name) != "text" else None
+                for name in columns]
+
+    def _select_rows(self, columns, where="", params=()):
+        """Value tuples of `columns` in row order."""
+        names = ", ".join(map(_q, columns)) or "NULL"
+        rows = self._db.read(f"SELECT {names} FROM {self._from()} {where} ORDER BY {_q(ROW)}",
+                             self._params + tuple(params))
+        decoders = self._decoders(columns)
+        if any(decoders):
+            rows = [tuple(v if decode is None else decode(v) for decode, v in zip(decoders, row)) for row in rows]
+        return rows
+
+    def __len__(self):
+        if self._length is None:
+            (self._length,), = self._db.read(f"SELECT COUNT(*) FROM {self._from()}", self._params)
+        return self._length
+
+    @property
+    def rows(self):
+        """List of dicts of the rows (read once, on first access)."""
+        if self._rows is None:
+            columns = self.columns
+            self._rows = [dict(zip(columns, values)) for values in self._select_rows(columns)]
+        return self._rows
+
+    def column(self, name):
+        """Return the values of one column as a list."""
+        if name not in self.columns:
+            raise KeyError(name)
+        return [values[0] for values in self._select_rows([name])]
+
+    def collect(self):
+        """The rows as an in-memory MyTable."""
+        return MyTable(self.columns, self.rows)
+
+    def categories(self, name):
+        """Distinct values of a column in first-appearance order."""
+        rows = self._db.read(f"SELECT {_q(name)} FROM {self._from()} GROUP BY {_q(name)} "
+                             f"ORDER BY MIN({_q(ROW)})", self._params)
+        decode, = self._decoders([name])
+        return [value if decode is None else decode(value) for (value,) in rows]
+
+    def memory_usage(self):
+        """Bytes each column holds in memory: none, the rows stay in the SQLite file."""
+        return {name: 0 for name in self.columns}
+
+    def head(self, n=5):
+        for values in self._db.read(f"SELECT * FROM {self._from()} ORDER BY {_q(ROW)} LIMIT ?",
+                                    self._params + (n,)):
+            print(dict(zip(self.columns, values[1:])))
+
+    def take(self, indices):
+        """
+        Return a MyTable with the rows at positions `indices` (in that order).
+        On a stored table the rows are read by their ROW key; a view is
+        collected first.
+        """
+        indices = indices if isinstance(indices, list) else list(indices)
+        if self._base is None:
+            return self.collect().take(indices)
+        wanted = sorted(set(indices))
+        found = {}
+        for start in range(0, len(wanted), SQLITE_MAX_PARAMS):
+            chunk = wanted[start:start + SQLITE_MAX_PARAMS]
+            where = f"WHERE {_q(ROW)} IN ({', '.join('?' * len(chunk))})"
+            for values in self._select_rows([ROW] + self.columns, where, chunk):
+                found[values[0]] = dict(zip(self.columns, values[1:]))
+        return MyTable(self.columns, [found[i] for i in indices])
+
+    # ---- indexes ----------------------------------------------------------
+
+    def create_index(self, columns):
+        """
+        Make sure an SQLite index starts with `columns` (creating one if none
+        does) and return a {key: [row positions]} lookup over it. A view is
+        collected and indexed in memory (see MyTable.create_index).
+        """
+        if isinstance(columns, str):
+            columns = [columns]
+        columns = list(columns)
+        if self._base is None:
+            return self.collect().create_index(columns)
+        with self._db.lock:
+            if not any(index[:len(columns)] == columns for index in self._db.indexes(self._base)):
+                index_name = f"{self._base}_by_" + "_".join(columns)
+                try:
+                    self._db.conn.execute(f"CREATE INDEX IF NOT EXISTS {_q(index_name)} ON {self._sql} "
+                                          f"({', '.join(map(_q, columns))})")
+                except sqlite3.OperationalError:
+                    # Read-only file: lookups still work, by scanning
+                    pass
+        return _SQLiteIndex(self, columns)
+
+    def index_lookup(self, key, columns):
+        """Return the rows whose `columns` equal `key`, as a MyTable."""
+        return self.take(self.create_index(columns).get(key, []))
+
+    # ---- queries returning views ------------------------------------------
+
+    def _expr_sql(self, expr):
+        """
+        (SQL condition, parameters) of an Expr. A comparison with NULL counts
+        as False, as in MyTable: it does under AND, OR and WHERE, so only NOT
+        needs COALESCE, and plain comparisons can use the indexes.
+        """
+        op, args = expr.op, expr.args
+        if op in ("and", "or"):
+            left, left_params = self._expr_sql(args[0])
+            right, right_params = self._expr_sql(args[1])
+            return f"({left} {op.upper()} {right})", left_params + right_params
+        if op == "not":
+            condition, params = self._expr_sql(args[0])
+            return f"(NOT COALESCE({condition}, 0))", params
+        name = args[0].args[0]
+        column = _q(name) if name in self.columns else "NULL"
+        if op == "missing":
+            indicators = [v for v in MISSING_INDICATORS if v is not None]
+            return f"({column} IS NULL OR {column} IN ({', '.join('?' * len(indicators))}))", indicators
+        if op == "isin":
+            values = [v for v in args[1] if v is not None]
+            if not values:
+                return "0", []
+            return f"{column} IN ({', '.join('?' * len(values))})", values
+        if op in _COMPARISONS:
+            other = args[1]
+            if isinstance(other, Expr):
+                right, params = (_q(other.args[0]) if other.args[0] in self.columns else "NULL"), []
+            else:
+                right, params = "?", [other]
+            if op == "!=":
+                # A missing number reads as "" in MyTable, which differs from any number
+                return f"({column} != {right} OR {column} IS NULL)", params
+            return f"{column} {_COMPARISONS[op]} {right}", params
+        raise ValueError(f"Cannot translate {expr!r} to SQL")
+
+    @profiled("sqlite_filter", rows_in=None, rows_out=None)
+    def filter(self, condition_fn):
+        """
+        Return the rows where condition_fn is true: an SQLiteTable view for an
+        Expr such as col("fare") > 100, a MyTable for a row lambda (evaluated
+        in Python on the collected rows).
+        """
+        if not isinstance(condition_fn, Expr):
+            return self.collect().filter(condition_fn)
+        condition, params = self._expr_sql(condition_fn)
+        return self._view(f"SELECT * FROM {self._from()} WHERE {condition}", self.columns, self._kinds, params)
+
+    def filter_eq(self, conditions=None, **kwargs):
+        """Return the rows where every given column equals its value (answered from an index if one fits)."""
+        conditions = dict(conditions or {}, **kwargs)
+        if not conditions:
+            return self
+        expr = None
+        for name, value in conditions.items():
+            term = col(name) == value
+            expr = term if expr is None else expr & term
+        return self.filter(expr)
+
+    def select(self, columns):
+        """Return a view of the given columns (names or indices); unknown columns are filled with ""."""
+        if all(isinstance(c, int) for c in columns):
+            selected = [self.columns[i] for i in columns]
+        else:
+            selected = list(columns)
+        items = [_q(name) if name in self.columns else f"'' AS {_q(name)}" for name in selected]
+        kinds = {name: self._kinds[name] if name in self.columns else "text" for name in selected}
+        return self._view(f"SELECT {', '.join([_q(ROW)] + items)} FROM {self._from()}", selected, kinds)
+
+    def drop_missing(self, columns=None):
+        """Return a view without the rows that have a missing value in `columns` (default: all)."""
+        checks = []
+        params = []
+        for name in columns or self.columns:
+            if name not in self.columns:
+                # Unknown column reads as None -> every row is missing
+                checks = ["0"]
+                params = []
+                break
+            condition, condition_params = self._expr_sql(col(name).is_missing())
+            checks.append(f"NOT {condition}")
+            params.extend(condition_params)
+        if not checks:
+            return self
+        return self._view(f"SELECT * FROM {self._from()} WHERE {' AND '.join(checks)}",
+                          self.columns, self._kinds, params)
+
+    def join(self, other, on=None, how="inner", left_on=None, right_on=None, strategy="auto"):
+        """
+        Join with another table (an SQLiteTable of the same file, or any other
+        table, which is copied into a temporary table first) as in
+        MyTable.join(): rows in left-table order, matches in right-table order,
+        values from `other` win on name clashes. SQLite picks the join
+        algorithm; `strategy` is accepted for compatibility.
+        """
+        left_on, right_on = _join_columns(on, left_on, right_on)
+        if how not in _JOINS:
+            raise ValueError(f"Unknown join type: {how}")
+        if strategy not in ("auto", "hash", "merge"):
+            raise ValueError(f"Unknown join strategy: {strategy}")
+        if how in ("right", "outer") and sqlite3.sqlite_version_info < (3, 39):
+            # RIGHT and FULL joins need SQLite 3.39
+            return self.collect().join(other if isinstance(other, MyTable) else other.collect(),
+                                       left_on=left_on, right_on=right_on, how=how)
+        if not isinstance(other, SQLiteTable) or other._db is not self._db:
+            other = self._db.temp_table(other if isinstance(other, MyTable) else other.collect())
+
+        l_row, r_row = f"l.{_q(ROW)}", f"r.{_q(ROW)}"
+        columns = list(dict.fromkeys(self.columns + other.columns))
+        items, kinds = [], {}
+        for name in columns:
+            if name in other.columns and (name not in self.columns or how == "inner"):
+                items.append(f"r.{_q(name)} AS {_q(name)}")
+                kinds[name] = other._kinds[name] if how in ("inner", "right") else None
+            elif name not in other.columns:
+                items.append(f"l.{_q(name)} AS {_q(name)}")
+                kinds[name] = self._kinds[name] if how in ("inner", "left") else None
+            else:
+                items.append(f"CASE WHEN {r_row} IS NULL THEN l.{_q(name)} ELSE r.{_q(name)} END AS {_q(name)}")
+                kinds[name] = None
+        condition = " AND ".join(f"l.{_q(a)} = r.{_q(b)}" for a, b in zip(left_on, right_on))
+        # Unmatched rows of `other` come last
+        order = f"{l_row} IS NULL, {l_row}, {r_row}" if how in ("right", "outer") else f"{l_row}, {r_row}"
+        sql = (f"SELECT ROW_NUMBER() OVER (ORDER BY {order}) - 1 AS {_q(ROW)}, {', '.join(items)} "
+               f"FROM {self._from()} AS l {_JOINS[how]} {other._from()} AS r ON {condition}")
+        view = SQLiteTable(self._db, sql, columns, kinds, self._params + other._params)
+        view._inputs = (self, other)      # keeps temporary tables alive while the view is
+        return view
+
+    def groupby(self, by):
+        """Group rows by one or more columns and return an SQLiteGroupBy."""
+        if isinstance(by, str):
+            by = [by]
+        return SQLiteGroupBy(self, list(by))
+
+
+class SQLiteGroupBy:
+    """groupby() of an SQLiteTable: agg() runs as one GROUP BY query."""
+
+    def __init__(self, table, columns):
+        self._table = table
+        self.columns = columns
+
+    def _value(self, name):
+        """SQL of a column's numeric values: other values are skipped, as in GroupBy.agg."""
+        kind = self._table._kinds.get(name)
+        if name not in self._table.columns:
+            raise KeyError(name)
+        if kind in ("int", "float"):
+            return _q(name)
+        return f"CASE WHEN typeof({_q(name)}) IN ('integer', 'real') THEN {_q(name)} END"
+
+    @profiled("sqlite_agg", rows_in=None)
+    def agg(self, agg_map, engine="auto"):
+        """
+        Aggregate like GroupBy.agg() and return a MyTable with the group
+        columns and "<col>_<func>" columns, groups in first-appearance order.
+        Supports the functions of the streaming engine; medians and
+        percentiles are exact. `engine` is accepted for compatibility.
+        """
+        if engine not in ("auto", "python", "numpy", "streaming"):
+            raise ValueError(f"Unknown engine: {engine}")
+        check_funcs(agg_map)
+        table = self._table
+        items, params = [], []
+        for name, func in agg_map.items():
+            value = self._value(name)
+            q = quantile_of(func)
+            if q is not None:
+                items.append(f"mt_quantile({value}, ?)")
+                params.append(q)
+            elif func in ("var", "std"):
+                items.append(f"mt_{func}({value})")
+            elif func == "count":
+                # None for a group without numbers, like the other functions
+                items.append(f"NULLIF(COUNT({value}), 0)")
+            else:
+                items.append(f"{'AVG' if func == 'mean' else func.upper()}({value})")
+
+        keys = ", ".join(map(_q, self.columns))
+        sql = (f"SELECT {', '.join([keys] + items)} FROM {table._from()} "
+               f"GROUP BY {keys} ORDER BY MIN({_q(ROW)})")
+        # Parameters of the aggregates come before the table's in the SQL text
+        rows = table._db.read(sql, tuple(params) + table._params)
+
+        names = self.columns + [name + "_" + func for name, func in agg_map.items()]
+        decoders = table._decoders(self.columns)
+        results = []
+        for values in rows:
+            keys = [v if decode is None else decode(v) for decode, v in zip(decoders, values)]
+            results.append(dict(zip(names, keys + list(values[len(keys):]))))
+        return MyTable(names, results)
+
@@ -0,0 +1,336 @@
+"""
+Mergeable aggregate states: group aggregates that are updated row by row and
+combined across chunks of a file or worker processes, without keeping the
+rows of any group.
+
+    state = StreamingAgg(["Year", "quarter"], {"fare": "median", "nsmiles": "std"})
+    state.add_table(chunk)          # any number of MyTable chunks
+    state.merge(other_state)        # e.g. partial states from worker processes
+    state.result()                  # MyTable like GroupBy.agg()
+
+sum, count, mean, min and max are exact (merging adds counts and sums; float
+sums may differ from GroupBy.agg's in the last digits).
+var and std use Welford's updates, merged with Chan et al.'s formula. median
+and percentiles ("p90", "p99.5", ...) come from a t-digest: exact while a
+group has at most TDIGEST_BUFFER values, otherwise within a rank error of
+about 1/TDIGEST_COMPRESSION (smaller towards the tails).
+"""
+import math
+import re
+from bisect import bisect_right
+from itertools import accumulate, islice
+from operator import mul
+
+
+# aggregation functions StreamingAgg supports, besides percentiles "p<0-100>"
+STREAM_AGG_FUNCS = ("sum", "count", "mean", "min", "max", "var", "std", "median")
+
+# t-digest size parameter: more centroids, smaller quantile error
+TDIGEST_COMPRESSION = 100
+
+# values a t-digest keeps as they are before it starts merging them into centroids
+TDIGEST_BUFFER = 5 * TDIGEST_COMPRESSION
+
+# add_table() groups this many rows at a time and updates each group's states once per batch
+BATCH_ROWS = 64 * 1024
+
+_PERCENTILE = re.compile(r"p(\d+(?:\.\d+)?)$")
+
+
+def quantile_of(func):
+    """Quantile (0..1) a median/percentile function asks for, or None for other functions."""
+    if func == "median":
+        return 0.5
+    match = _PERCENTILE.match(func)
+    if match and float(match.group(1)) <= 100:
+        return float(match.group(1)) / 100
+    return None
+
+
+def check_funcs(agg_map):
+    """Raise ValueError for aggregation functions StreamingAgg cannot compute."""
+    for func in agg_map.values():
+        if func not in STREAM_AGG_FUNCS and quantile_of(func) is None:
+            raise ValueError(f"Unknown aggregation: {func}")
+
+
+class Moments:
+    """Count, sum, min, max and Welford's mean/M2 of a stream of numbers."""
+    __slots__ = ("count", "total", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, v):
+        self.count += 1
+        self.total += v
+        delta = v - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (v - self.mean)
+        if self.min is None or v < self.min:
+            self.min = v
+        if self.max is None or v > self.max:
+            self.max = v
+
+    def update(self, values):
+        """Add a list of numbers (two-pass moments of the batch, then merged)."""
+        if not values:
+            return
+        batch = Moments()
+        batch.count = len(values)
+        batch.total = sum(values)
+        batch.mean = mean = batch.total / batch.count
+        batch.m2 = sum((v - mean) * (v - mean) for v in values)
+        batch.min = min(values)
+        batch.max = max(values)
+        self.merge(batch)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        if not self.count:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def result(self, func):
+        if not self.count:
+            return None
+        if func == "sum":
+            return self.total
+        if func == "count":
+            return self.count
+        if func == "mean":
+            # From the sum, like GroupBy.agg (Welford's mean only feeds M2)
+            return self.total / self.count
+        if func == "min":
+            return self.min
+        if func == "max":
+            return self.max
+        if self.count < 2:
+            return None
+        variance = self.m2 / (self.count - 1)
+        return variance if func == "var" else math.sqrt(variance)
+
+
+class TDigest:
+    """
+    Merging t-digest (Dunning): a quantile sketch of sorted (mean, weight)
+    centroids, small near the tails (k1 scale function). Values are buffered
+    and merged into centroids only when the buffer fills up.
+    """
+    __slots__ = ("compression", "means", "weights", "buffer")
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.buffer = []
+
+    def add(self, v):
+        self.buffer.append(v)
+        if len(self.buffer) >= TDIGEST_BUFFER:
+            self._compress()
+
+    def update(self, values):
+        self.buffer.extend(values)
+        if len(self.buffer) >= TDIGEST_BUFFER:
+            self._compress()
+
+    def merge(self, other):
+        if other.weights:
+            self.means.extend(other.means)
+            self.weights.extend(other.weights)
+            self.buffer.extend(other.buffer)
+            self._compress()
+        else:
+            self.buffer.extend(other.buffer)
+            if len(self.buffer) >= TDIGEST_BUFFER:
+                self._compress()
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        if self.weights:
+            points = sorted(zip(self.means + self.buffer, self.weights + [1] * len(self.buffer)))
+            values = [v for v, _ in points]
+            weights = [w for _, w in points]
+        else:
+            values = sorted(self.buffer)
+            weights = [1] * len(values)
+        self.buffer = []
+        cumulative = list(accumulate(weights))
+        total = cumulative[-1]
+        means, sizes = [], []
+        # Each centroid takes the next points while its cumulative weight stays
+        # within one step of the scale function (at least one point)
+        i = done = 0
+        while i < len(values):
+            limit = self._k_inverse(self._k(done / total) + 1) * total
+            j = max(i + 1, bisect_right(cumulative, limit, i))
+            weight = cumulative[j - 1] - done
+            means.append(sum(map(mul, values[i:j], weights[i:j])) / weight)
+            sizes.append(weight)
+            done = cumulative[j - 1]
+            i = j
+        self.means, self.weights = means, sizes
+
+    def quantile(self, q, low=None, high=None):
+        """Estimate of the q quantile (0..1); `low`/`high` are the exact min and max to clamp to."""
+        if not self.weights:
+            # Still exact: linear interpolation between order statistics
+            values = sorted(self.buffer)
+            if not values:
+                return None
+            position = q * (len(values) - 1)
+            i = int(position)
+            if i + 1 >= len(values):
+                return values[-1]
+            fraction = position - i
+            return values[i] + (values[i + 1] - values[i]) * fraction if fraction else values[i]
+
+        if self.buffer:
+            self._compress()
+        means, weights = self.means, self.weights
+        total = sum(weights)
+        target = q * total
+        # Each centroid stands at the middle of its weight
+        center = weights[0] / 2
+        if target <= center:
+            return means[0] if low is None else low + (means[0] - low) * (target / center if center else 0)
+        for i in range(1, len(means)):
+            next_center = center + (weights[i - 1] + weights[i]) / 2
+            if target <= next_center:
+                return means[i - 1] + (means[i] - means[i - 1]) * (target - center) / (next_center - center)
+            center = next_center
+        last = total - center
+        if high is None or not last:
+            return means[-1]
+        return means[-1] + (high - means[-1]) * (target - center) / last
+
+
+class _ColumnState:
+    """Moments (and a t-digest when a quantile is asked for) of one column in one group."""
+    __slots__ = ("moments", "digest")
+
+    def __init__(self, digest):
+        self.moments = Moments()
+        self.digest = TDigest() if digest else None
+
+    def add(self, v):
+        self.moments.add(v)
+        if self.digest is not None:
+            self.digest.add(v)
+
+    def update(self, values):
+        self.moments.update(values)
+        if self.digest is not None:
+            self.digest.update(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        if self.digest is not None:
+            self.digest.merge(other.digest)
+
+    def result(self, func):
+        q = quantile_of(func)
+        if q is None:
+            return self.moments.result(func)
+        if not self.moments.count:
+            return None
+        return self.digest.quantile(q, self.moments.min, self.moments.max)
+
+
+class StreamingAgg:
+    """
+    groupby(by).agg(agg_map) as mergeable per-group states. Values that are
+    not numbers are skipped, as in GroupBy.agg; groups keep first-appearance
+    order (merged states add their new groups after the existing ones).
+    """
+
+    def __init__(self, by, agg_map):
+        check_funcs(agg_map)
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.agg_map = dict(agg_map)
+        # One state per aggregated column (agg_map has one function per column)
+        self._columns = list(self.agg_map)
+        self._digest = {col: quantile_of(self.agg_map[col]) is not None for col in self._columns}
+        self._groups = {}       # key -> [_ColumnState per aggregated column]
+
+    def __len__(self):
+        return len(self._groups)
+
+    def _new_group(self):
+        return [_ColumnState(self._digest[col]) for col in self._columns]
+
+    def add_table(self, table):
+        """Add the rows of a MyTable, BATCH_ROWS at a time."""
+        data = table._data
+        if len(self.by) == 1:
+            keys = iter(data[self.by[0]])
+        else:
+            keys = zip(*(data[col] for col in self.by))
+        columns = [data[col] for col in self._columns]
+        # Typed numeric columns hold only numbers; others are filtered like GroupBy.agg
+        typed = [column.kind in ("int", "float") and not column.missing for column in columns]
+        values = [column.getter() for column in columns]
+        for start in range(0, len(table), BATCH_ROWS):
+            batch = {}
+            for i, key in enumerate(islice(keys, BATCH_ROWS), start):
+                rows = batch.get(key)
+                if rows is None:
+                    batch[key] = [i]
+                else:
+                    rows.append(i)
+            for key, rows in batch.items():
+                group = self._groups.get(key)
+                if group is None:
+                    group = self._groups[key] = self._new_group()
+                for state, column, numeric in zip(group, values, typed):
+                    if numeric:
+                        state.update([column[i] for i in rows])
+                    else:
+                        state.update([v for v in (column[i] for i in rows) if isinstance(v, (int, float))])
+        return self
+
+    def merge(self, other):
+        """Combine another StreamingAgg over the same by/agg_map (e.g. of another chunk) into this one."""
+        if other.by != self.by or other.agg_map != self.agg_map:
+            raise ValueError("Only StreamingAgg states with the same `by` and `agg_map` can be merged")
+        for key, other_group in other._groups.items():
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = self._new_group()
+            for state, other_state in zip(group, other_group):
+                state.merge(other_state)
+        return self
+
+    def result(self):
+        """The aggregates as a MyTable with the `by` columns and "<col>_<func>" columns."""
+        from Mini_DataFrame import MyTable
+
+        slot = {col: j for j, col in enumerate(self._columns)}
+        rows = []
+        for key, group in self._groups.items():
+            row = dict(zip(self.by, key if len(self.by) > 1 else (key,)))
+            for col, func in self.agg_map.items():
+                row[col + "_" + func] = group[slot[col]].result(func)
+            rows.append(row)
+        return MyTable(self.by + [col + "_" + func for col, func in self.agg_map.items()], rows)
@@ -0,0 +1,186 @@
+"""
+Opt-in profiling of MyTable / GroupBy operations.
+
+Operations decorated with @profiled (from_file, filter, select, drop_missing,
+groupby, agg, join, ...) run inside a span that records wall time, input and
+output row counts and, when memory tracing is on, the bytes allocated during
+the call. Finished spans go to an in-process ring buffer and, optionally, to a
+JSON-lines file. While the profiler is disabled a decorated call costs one
+attribute check.
+
+Enable it in code with `profiler.enable()`, or for the Streamlit app with
+environment variables:
+
+    MYTABLE_PROFILE=1                   ring buffer only
+    MYTABLE_PROFILE=profile.jsonl       ring buffer and JSON-lines sink
+    MYTABLE_PROFILE_MEMORY=1            also trace allocations (slower)
+"""
+import collections
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Number of finished spans kept in memory
+RING_SIZE = 5000
+
+
+class Span:
+    """One profiled operation. rows_out is set by the caller before the span ends."""
+    __slots__ = ("op", "run", "depth", "started", "seconds", "rows_in", "rows_out", "bytes")
+
+    def __init__(self, op, run, depth, rows_in):
+        self.op = op
+        self.run = run
+        self.depth = depth
+        self.started = time.time()
+        self.seconds = None
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """
+    Collects Spans. Spans are tagged with the run (see start_run) and nesting
+    depth of the thread that recorded them, so concurrent Streamlit sessions
+    can each read back their own rerun.
+    """
+
+    def __init__(self, size=RING_SIZE):
+        self.enabled = False
+        self.memory = False
+        self.spans = collections.deque(maxlen=size)
+        self._sink = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run_ids = itertools.count(1)
+
+    def enable(self, sink=None, memory=False):
+        """
+        Start recording. `sink` is a JSON-lines path that every finished span
+        is appended to; memory=True traces allocations with tracemalloc.
+        """
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+            self._sink = open(sink, "a") if sink else None
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording and close the sink (recorded spans are kept)."""
+        self.enabled = False
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def clear(self):
+        self.spans.clear()
+
+    def start_run(self):
+        """Start a new run (e.g. one Streamlit rerun) on this thread; returns its id."""
+        run = next(self._run_ids)
+        self._local.run = run
+        return run
+
+    @contextmanager
+    def span(self, op, rows_in=None):
+        """Time the body as operation `op`; set .rows_out on the yielded Span."""
+        local = self._local
+        depth = getattr(local, "depth", 0)
+        span = Span(op, getattr(local, "run", None), depth, rows_in)
+        memory = self.memory and tracemalloc.is_tracing()
+        if memory:
+            allocated = tracemalloc.get_traced_memory()[0]
+        local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            local.depth = depth
+            if memory:
+                # Net growth of traced memory: approximate, other threads count too
+                span.bytes = max(tracemalloc.get_traced_memory()[0] - allocated, 0)
+            self._record(span)
+
+    def _record(self, span):
+        self.spans.append(span)
+        if self._sink is not None:
+            line = json.dumps(span.to_dict()) + "\n"
+            with self._lock:
+                if self._sink is not None:
+                    self._sink.write(line)
+                    self._sink.flush()
+
+    def records(self, run=None):
+        """Recorded spans, oldest first (only those of `run` if given)."""
+        spans = list(self.spans)
+        if run is not None:
+            spans = [s for s in spans if s.run == run]
+        return spans
+
+    def slowest(self, n=10, run=None):
+        """The n slowest spans (of `run` if given), slowest first."""
+        return sorted(self.records(run), key=lambda s: s.seconds, reverse=True)[:n]
+
+    def summary(self, run=None):
+        """{op: {"calls", "seconds", "rows_in", "rows_out"}} totals, slowest op first."""
+        totals = {}
+        for s in self.records(run):
+            total = totals.setdefault(s.op, {"calls": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0})
+            total["calls"] += 1
+            total["seconds"] += s.seconds
+            total["rows_in"] += s.rows_in or 0
+            total["rows_out"] += s.rows_out or 0
+        return dict(sorted(totals.items(), key=lambda item: item[1]["seconds"], reverse=True))
+
+
+# Process-wide profiler used by the @profiled operations
+profiler = Profiler()
+
+
+def _table_rows(table):
+    return len(table)
+
+
+def profiled(op, rows_in=_table_rows, rows_out=_table_rows):
+    """
+    Decorator recording calls of a method as spans of `op`. rows_in(self) and
+    rows_out(result) give the row counts (None to skip one).
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if not profiler.enabled:
+                return fn(self, *args, **kwargs)
+            with profiler.span(op, rows_in(self) if rows_in else None) as span:
+                result = fn(self, *args, **kwargs)
+                if rows_out:
+                    span.rows_out = rows_out(result)
+            return result
+        return wrapper
+    return decorate
+
+
+_setting = os.environ.get("MYTABLE_PROFILE", "")
+if _setting and _setting != "0":
+    profiler.enable(
+        sink=None if _setting == "1" else _setting,
+        memory=os.environ.get("MYTABLE_PROFILE_MEMORY", "") not in ("", "0"),
+    )
@@ -0,0 +1,74 @@
+"""
+Ingesting a new quarter: full reload (parse + projections for every route)
+vs. FlightDataset.append (incremental indexes, running averages, affected
+routes only).
+
+    python benchmarks/bench_append.py --rows 245000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Projection import build_projection_table  # noqa: E402
+from Flight_Dataset import FlightDataset, read_flights  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def split_last_quarter(path, old_path, new_path):
+    """Write the rows of the latest (Year, quarter) to new_path and the rest to old_path."""
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    header = rows[0]
+    year, quarter = header.index("Year"), header.index("quarter")
+    last = max((int(r[year]), int(r[quarter])) for r in rows[1:])
+    with open(old_path, "w", newline="") as old, open(new_path, "w", newline="") as new:
+        old_writer, new_writer = csv.writer(old), csv.writer(new)
+        old_writer.writerow(header)
+        new_writer.writerow(header)
+        for r in rows[1:]:
+            (new_writer if (int(r[year]), int(r[quarter])) == last else old_writer).writerow(r)
+    return last
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full_path = os.path.join(tmp, "full.csv")
+        old_path = os.path.join(tmp, "old.csv")
+        new_path = os.path.join(tmp, "new.csv")
+        write_csv(full_path, args.rows, args.cities, seed=args.seed)
+        last = split_last_quarter(full_path, old_path, new_path)
+
+        dataset = FlightDataset(read_flights(old_path))
+        new_flights = read_flights(new_path)
+        half = len(new_flights) // 2
+        # The first append also builds the running averages; time the second, steady-state one
+        first_time, _ = timed(lambda: dataset.append(new_flights.take(range(half))))
+        rest = new_flights.take(range(half, len(new_flights)))
+        append_time, routes = timed(lambda: dataset.append(rest))
+        reload_time, _ = timed(lambda: build_projection_table(read_flights(full_path)))
+
+    print(f"new quarter {last}: {len(new_flights)} rows in two appends, {len(routes)} routes re-projected by the second")
+    print(f"  full reload + all projections  {reload_time * 1000:8.1f} ms")
+    print(f"  first append (builds averages) {first_time * 1000:8.1f} ms")
+    print(f"  second append                  {append_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
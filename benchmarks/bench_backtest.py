@@ -0,0 +1,48 @@
+"""
+Backtest of the fare forecast models (Fare_Backtest) on synthetic data: time
+with one process vs. --workers processes, and the accuracy/cost report.
+
+    python benchmarks/bench_backtest.py --rows 1000000 --workers 4 --holdout 2
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Backtest import backtest, format_report  # noqa: E402
+from Flight_Dataset import read_flights  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--holdout", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-stale", action="store_true", help="leave out stale or sparse quarters")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+        flights = read_flights(path)
+
+    timings = {}
+    for workers in (1, args.workers):
+        start = time.perf_counter()
+        results = backtest(flights, holdout_years=args.holdout, workers=workers, skip_stale=args.skip_stale)
+        timings[workers] = time.perf_counter() - start
+        print(f"{workers} worker(s): {timings[workers]:.2f} s")
+    if args.workers > 1:
+        print(f"speedup {timings[1] / timings[args.workers]:.1f}x")
+    print(f"{results[0]['routes']} routes, held out {results[0]['test_years']}")
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
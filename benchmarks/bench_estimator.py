@@ -0,0 +1,61 @@
+"""
+FareEstimator batch calls vs. answering routes one at a time, without
+Streamlit: projections and best months for many city pairs.
+
+    python benchmarks/bench_estimator.py --rows 245000 --routes 500
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Estimator import FareEstimator  # noqa: E402
+from Fare_Projection import project_route  # noqa: E402
+from Flight_Dataset import FlightDataset, read_flights  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--routes", type=int, default=500, help="direct city pairs asked per call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+        # Same table as the app: required columns, typed, cities dictionary-encoded
+        flights = read_flights(path)
+    dataset = FlightDataset(flights)
+    estimator = FareEstimator(dataset)
+
+    routes = sorted(dataset.flights.create_index(["city1", "city2"]))
+    pairs = random.Random(args.seed).sample(routes, min(args.routes, len(routes)))
+
+    one_time, one = timed(lambda: {pair: project_route(dataset.route(*pair)) for pair in pairs})
+    batch_time, batch = timed(lambda: estimator.project_routes(pairs))
+    assert batch == one
+    warm_time, _ = timed(lambda: estimator.project_routes(pairs))
+    best_time, best = timed(lambda: estimator.best_months(pairs))
+
+    print(f"rows: {len(flights)}   routes: {len(pairs)}")
+    print(f"one route at a time      {one_time * 1000:9.1f} ms")
+    print(f"project_routes (batch)   {batch_time * 1000:9.1f} ms   ({one_time / batch_time:.1f}x)")
+    print(f"project_routes (cached)  {warm_time * 1000:9.1f} ms")
+    print(f"best_months (cached)     {best_time * 1000:9.1f} ms   ({sum(1 for m in best.values() if m)} answered)")
+
+
+if __name__ == "__main__":
+    main()
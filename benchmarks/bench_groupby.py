@@ -0,0 +1,74 @@
+"""
+GroupBy.agg: pure-Python path vs. the NumPy path, grouped by
+(Year, quarter, city1, city2) like the projection batch job. Also checks that
+both engines return the same groups and values.
+
+    python benchmarks/bench_groupby.py --rows 245000
+    python benchmarks/bench_groupby.py --csv "US Airline Flight Routes and Fares 1993-2024.csv"
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import Mini_DataFrame  # noqa: E402
+from Mini_DataFrame import AGG_FUNCS, MyTable  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+BY = ["Year", "quarter", "city1", "city2"]
+
+
+def same_results(a, b):
+    """True if two agg() results match (floats compared with a relative tolerance)."""
+    if a.columns != b.columns or len(a) != len(b):
+        return False
+    for row_a, row_b in zip(a.rows, b.rows):
+        for col in a.columns:
+            x, y = row_a[col], row_b[col]
+            if isinstance(x, float) or isinstance(y, float):
+                if x is None or y is None or not math.isclose(x, y, rel_tol=1e-9):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Python vs. NumPy GroupBy.agg")
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="Use this CSV instead of synthetic data")
+    args = parser.parse_args()
+
+    if Mini_DataFrame.np is None:
+        sys.exit("NumPy is not installed: pip install numpy")
+
+    if args.csv:
+        flights = MyTable.from_file(args.csv)
+    else:
+        flights = MyTable(CSV_COLUMNS, generate_rows(args.rows, args.cities, seed=args.seed))
+    print(f"rows: {len(flights)}   group by: {BY}")
+    print(f"{'agg':<8}{'python':>12}{'numpy':>12}{'speedup':>10}  parity")
+
+    for func in AGG_FUNCS:
+        agg_map = {"fare": func, "nsmiles": func}
+
+        start = time.perf_counter()
+        python_result = flights.groupby(BY).agg(agg_map, engine="python")
+        python_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        numpy_result = flights.groupby(BY).agg(agg_map, engine="numpy")
+        numpy_time = time.perf_counter() - start
+
+        parity = "ok" if same_results(python_result, numpy_result) else "MISMATCH"
+        print(f"{func:<8}{python_time * 1000:>10.1f}ms{numpy_time * 1000:>10.1f}ms"
+              f"{python_time / numpy_time:>9.1f}x  {parity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Indirect-route join for hub cities: the old string join_key vs. tuple keys with
+the hash and sort-merge strategies.
+
+    python benchmarks/bench_join.py --rows 245000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Mini_DataFrame import MyTable  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+
+def with_string_key(table, city_col):
+    """The previous approach: copy every row and add f"{city}_{Year}_{quarter}"."""
+    rows = []
+    for row in table.rows:
+        new_row = row.copy()
+        new_row["join_key"] = f"{row[city_col]}_{row['Year']}_{row['quarter']}"
+        rows.append(new_row)
+    return MyTable(table.columns + ["join_key"], rows)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    flights = MyTable(CSV_COLUMNS, generate_rows(args.rows, args.cities, seed=args.seed))
+
+    # Hub pair: the busiest origin and the busiest destination
+    departing = flights.create_index(["city1"])
+    arriving = flights.create_index(["city2"])
+    origin = max(departing, key=lambda c: len(departing[c]))
+    dest = max(arriving, key=lambda c: len(arriving[c]))
+    legs1 = flights.filter_eq(city1=origin)
+    legs2 = flights.filter_eq(city2=dest)
+    print(f"{origin} ({len(legs1)} legs) -> {dest} ({len(legs2)} legs)")
+
+    string_time, string_result = timed(lambda: with_string_key(legs1, "city2").join(
+        with_string_key(legs2, "city1"), on="join_key"))
+    keys = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"])
+    hash_time, hash_result = timed(lambda: legs1.join(legs2, strategy="hash", **keys))
+    merge_time, merge_result = timed(lambda: legs1.join(legs2, strategy="merge", **keys))
+
+    # Reading one column materializes only that column of the lazy join result
+    read_time, _ = timed(lambda: hash_result.column("fare"))
+
+    print(f"matches: {len(string_result)} / {len(hash_result)} / {len(merge_result)}")
+    print(f"string join_key    {string_time * 1000:8.1f} ms")
+    print(f"tuple keys, hash   {hash_time * 1000:8.1f} ms")
+    print(f"tuple keys, merge  {merge_time * 1000:8.1f} ms")
+    print(f"read one column    {read_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Closest connecting route per (Year, quarter) for hub cities: full join + groupby
+vs. the streaming join_reduce, with time and peak memory.
+
+    python benchmarks/bench_join_reduce.py --rows 245000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Mini_DataFrame import MyTable  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+KEYS = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"])
+
+
+def is_fare(value):
+    return isinstance(value, (int, float)) and value > 0
+
+
+def full_join(legs1, legs2):
+    """The previous approach: materialize the join, add totals, group and pick the minimum."""
+    rows = []
+    for row in legs1.rows:
+        new_row = row.copy()
+        new_row["nsmiles_leg1"] = row["nsmiles"]
+        new_row["fare_leg1"] = row["fare"]
+        rows.append(new_row)
+    joined = MyTable(legs1.columns + ["nsmiles_leg1", "fare_leg1"], rows).join(legs2, **KEYS)
+
+    totals = []
+    for row in joined.rows:
+        if is_fare(row["fare_leg1"]) and is_fare(row["fare"]):
+            new_row = row.copy()
+            new_row["nsmiles_total"] = row["nsmiles_leg1"] + row["nsmiles"]
+            new_row["fare_total"] = row["fare_leg1"] + row["fare"]
+            totals.append(new_row)
+    table = MyTable(joined.columns + ["nsmiles_total", "fare_total"], totals)
+
+    best = {}
+    for key, group_rows in table.groupby(["Year", "quarter"]).groups.items():
+        best[key] = min(group_rows, key=lambda r: (r["nsmiles_total"], r["fare_total"]))
+    return {key: (row["nsmiles_total"], row["fare_total"]) for key, row in best.items()}
+
+
+def streamed(legs1, legs2):
+    result = legs1.join_reduce(
+        legs2,
+        key_fn=lambda l, r: (l["Year"], l["quarter"]),
+        order_by=lambda l, r: (l["nsmiles"] + r["nsmiles"], l["fare"] + r["fare"]),
+        where=lambda l, r: is_fare(l["fare"]) and is_fare(r["fare"]),
+        suffixes=("_leg1", "_leg2"),
+        **KEYS)
+    return {(row["Year"], row["quarter"]): (row["nsmiles_leg1"] + row["nsmiles_leg2"],
+                                            row["fare_leg1"] + row["fare_leg2"])
+            for row in result.rows}
+
+
+def measured(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=60)
+    parser.add_argument("--pairs", type=int, default=3, help="number of hub pairs to run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    flights = MyTable(CSV_COLUMNS, generate_rows(args.rows, args.cities, seed=args.seed))
+    departing = flights.create_index(["city1"])
+    arriving = flights.create_index(["city2"])
+    origins = sorted(departing, key=lambda c: -len(departing[c]))[:args.pairs]
+    dests = sorted(arriving, key=lambda c: -len(arriving[c]))[:args.pairs]
+
+    for origin, dest in zip(origins, dests):
+        legs1 = flights.filter_eq(city1=origin)
+        legs2 = flights.filter_eq(city2=dest)
+        connections = legs1.join_count(legs2, **KEYS)
+        print(f"{origin} -> {dest}: {connections} connections")
+
+        full_time, full_peak, expected = measured(lambda: full_join(legs1, legs2))
+        fused_time, fused_peak, actual = measured(lambda: streamed(legs1, legs2))
+        assert expected.keys() == actual.keys()
+        for key, (nsmiles, fare) in expected.items():
+            assert actual[key][0] == nsmiles and abs(actual[key][1] - fare) < 1e-6, key
+
+        print(f"  join + groupby  {full_time * 1000:8.1f} ms  {full_peak / 2**20:8.1f} MiB peak")
+        print(f"  join_reduce     {fused_time * 1000:8.1f} ms  {fused_peak / 2**20:8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Eager MyTable calls vs. the same query as a LazyTable plan: loading the app's
+columns from CSV, and a route query on the loaded table.
+
+    python benchmarks/bench_lazy.py --rows 245000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import FLIGHT_SCHEMA, REQUIRED_COLUMNS  # noqa: E402
+from Mini_DataFrame import MyTable, col  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+CITY_COLUMNS = ["city1", "city2", "airport_1", "airport_2"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+
+        eager_time, eager = timed(lambda: MyTable.from_file(path, schema=FLIGHT_SCHEMA)
+                                  .select(REQUIRED_COLUMNS).drop_missing(columns=CITY_COLUMNS))
+        lazy_time, lazy = timed(lambda: MyTable.scan_file(path, schema=FLIGHT_SCHEMA)
+                                .select(REQUIRED_COLUMNS).drop_missing(columns=CITY_COLUMNS).collect())
+        assert eager.rows == lazy.rows
+        print(f"load {len(lazy)} rows")
+        print(f"  from_file + select + drop_missing  {eager_time * 1000:8.1f} ms")
+        print(f"  scan_file(...).collect()           {lazy_time * 1000:8.1f} ms")
+
+    flights = lazy
+    flights.create_index(["city1"])
+    origin = flights.column("city1")[0]
+    eager_time, eager = timed(lambda: flights.filter(lambda row: row["city1"] == origin)
+                              .filter(lambda row: row["fare"] > 200)
+                              .select(["Year", "quarter", "city2", "fare"]))
+    lazy_time, lazy = timed(lambda: flights.lazy()
+                            .filter((col("city1") == origin) & (col("fare") > 200))
+                            .select(["Year", "quarter", "city2", "fare"]).collect())
+    assert eager.rows == lazy.rows
+    print(f"route query: {len(lazy)} rows from {origin}")
+    print(f"  chained lambda filters             {eager_time * 1000:8.1f} ms")
+    print(f"  lazy plan (index + Expr filter)    {lazy_time * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+MyTable.from_file on one core vs. byte ranges parsed in worker processes
+(workers=N), for the app's typed columns; checks that the tables match.
+
+    python benchmarks/bench_parallel_load.py --rows 2000000 --workers 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import FLIGHT_SCHEMA, REQUIRED_COLUMNS  # noqa: E402
+from Mini_DataFrame import MyTable  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--all-columns", action="store_true", help="parse every column, not just the app's")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    usecols = None if args.all_columns else REQUIRED_COLUMNS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+        size = os.path.getsize(path) / 1e6
+
+        serial_time, serial = timed(lambda: MyTable.from_file(path, schema=FLIGHT_SCHEMA, usecols=usecols))
+        print(f"{len(serial)} rows, {size:.0f} MB, {os.cpu_count()} CPUs")
+        print(f"  workers=1   {serial_time * 1000:9.1f} ms")
+        for workers in args.workers:
+            parallel_time, parallel = timed(lambda: MyTable.from_file(path, schema=FLIGHT_SCHEMA, usecols=usecols,
+                                                                      workers=workers))
+            assert parallel.rows == serial.rows
+            print(f"  workers={workers:<3} {parallel_time * 1000:9.1f} ms  ({serial_time / parallel_time:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
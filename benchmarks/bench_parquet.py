@@ -0,0 +1,77 @@
+"""
+Loading the flight table from CSV vs. Parquet and Arrow IPC (MyTable.from_parquet,
+from_arrow_ipc; requires pyarrow), including a Parquet read of only the
+projection's columns and last years, which skips the other row groups.
+
+    python benchmarks/bench_parquet.py --rows 1000000 --years 6
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import read_flights  # noqa: E402
+from Mini_DataFrame import MyTable, _parquet_row_groups, pq  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+PROJECTION_COLUMNS = ["city1", "city2", "Year", "quarter", "fare"]
+
+
+def best_of(repeat, fn):
+    """(fastest time in seconds, result of the last run)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--years", type=int, default=6, help="most recent years read by the pruned query")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if pq is None:
+        sys.exit("bench_parquet.py requires pyarrow (pip install pyarrow)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "flights.csv")
+        parquet_path = os.path.join(tmp, "flights.parquet")
+        ipc_path = os.path.join(tmp, "flights.arrow")
+        write_csv(csv_path, args.rows, args.cities, seed=args.seed)
+
+        csv_time, flights = best_of(args.repeat, lambda: read_flights(csv_path, workers=1))
+        # Sorted by period, so each row group holds a narrow span of years
+        flights.to_parquet(parquet_path, sort_by=["Year", "quarter"])
+        flights.to_arrow_ipc(ipc_path)
+        last_year = max(flights.column("Year"))
+        ranges = {"Year": (last_year - args.years + 1, last_year)}
+
+        runs = [
+            ("CSV (read_flights)", csv_time, flights, csv_path),
+            ("Parquet, all columns", *best_of(args.repeat, lambda: MyTable.from_parquet(parquet_path)), parquet_path),
+            (f"Parquet, 5 columns, {args.years} years",
+             *best_of(args.repeat, lambda: MyTable.from_parquet(parquet_path, PROJECTION_COLUMNS, ranges)), None),
+            ("Arrow IPC, all columns", *best_of(args.repeat, lambda: MyTable.from_arrow_ipc(ipc_path)), ipc_path),
+        ]
+        metadata = pq.ParquetFile(parquet_path).metadata
+        kept = len(_parquet_row_groups(metadata, ranges))
+
+        print(f"{len(flights)} rows")
+        for name, elapsed, table, path in runs:
+            size = f"{os.path.getsize(path) / 1e6:7.1f} MB" if path else " " * 10
+            print(f"{name:34s} {elapsed * 1000:9.1f} ms  {size}  {len(table):8d} rows  "
+                  f"({csv_time / elapsed:.1f}x vs CSV)")
+        print(f"pruned read: {kept} of {metadata.num_row_groups} row groups")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+End-to-end timings of the fare pipeline on seeded synthetic data, stage by stage,
+as JSON, with an optional regression check against a stored baseline.
+
+    python benchmarks/bench_pipeline.py --rows 245000 --json results.json
+    python benchmarks/bench_pipeline.py --rows 245000 --baseline results.json
+
+Stages: parse (CSV -> MyTable), select + drop_missing, direct projections
+(every route, and single routes as the app asks for them), indirect join +
+best-route reduction (join_reduce, and the RouteGraph search the app uses) and
+the three FAQ answers for sampled city pairs (with an empty, then a warm result
+cache). Each stage reports the fastest of --repeat runs. With --baseline, stages slower than the baseline by more than
+--tolerance are listed and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Projection import build_projection_table, project_connections, project_route  # noqa: E402
+from Flight_Dataset import FLIGHT_SCHEMA, REQUIRED_COLUMNS, FlightDataset  # noqa: E402
+from Mini_DataFrame import MyTable, np  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+CITY_COLUMNS = ["city1", "city2", "airport_1", "airport_2"]
+KEYS = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"])
+
+
+def best_of(repeat, fn):
+    """(fastest time in seconds, result of the last run)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def is_fare(value):
+    return isinstance(value, (int, float)) and value > 0
+
+
+def sample_pairs(flights, n):
+    """The n busiest (origin, destination) city pairs, busiest first, ties by name."""
+    departing = flights.create_index(["city1"])
+    arriving = flights.create_index(["city2"])
+    origins = sorted(departing, key=lambda c: (-len(departing[c]), c))
+    dests = sorted(arriving, key=lambda c: (-len(arriving[c]), c))
+    pairs = []
+    for origin in origins:
+        for dest in dests:
+            if origin != dest:
+                pairs.append((origin, dest))
+                if len(pairs) == n:
+                    return pairs
+    return pairs
+
+
+def best_routes(flights, origin, dest):
+    """Closest 1-stop route per (Year, quarter) with a streaming join (join_reduce)."""
+    return flights.filter_eq(city1=origin).join_reduce(
+        flights.filter_eq(city2=dest),
+        key_fn=lambda l, r: (l["Year"], l["quarter"]),
+        order_by=lambda l, r: (l["nsmiles"] + r["nsmiles"], l["fare"] + r["fare"]),
+        where=lambda l, r: is_fare(l["fare"]) and is_fare(r["fare"]),
+        suffixes=("_leg1", "_leg2"),
+        **KEYS)
+
+
+def faq_answers(dataset, origin, dest, quarter, current_price):
+    """
+    The three FAQ answers the app shows for a city pair: the 2025/2026 fares for
+    `quarter`, the cheapest 2026 quarter, and buy-or-wait for `current_price`.
+    """
+    projection = dataset.projection(origin, dest)
+    if not projection:
+        return None
+
+    fares = [row['projected_fare'] for row in projection if row['quarter'] == quarter]
+    fares_2026 = {row['quarter']: row['projected_fare'] for row in projection if row['Year'] == 2026}
+    best_quarter = min(sorted(fares_2026), key=fares_2026.get) if fares_2026 else None
+    fare_2026 = fares_2026.get(quarter)
+    if not fare_2026:
+        advice = None
+    elif current_price < fare_2026 * 0.7:
+        advice = "buy now"
+    elif current_price > fare_2026:
+        advice = "wait"
+    else:
+        advice = "buy"
+    return fares, best_quarter, advice
+
+
+def run_stages(path, args):
+    """{stage: {"seconds": ..., "rows": ...}} for one synthetic CSV."""
+    stages = {}
+
+    def stage(name, fn, rows=len):
+        seconds, result = best_of(args.repeat, fn)
+        stages[name] = {"seconds": round(seconds, 6), "rows": rows(result)}
+        print(f"  {name:26} {seconds * 1000:10.1f} ms  ({stages[name]['rows']} rows)")
+        return result
+
+    raw = stage("parse", lambda: MyTable.from_file(path, schema=FLIGHT_SCHEMA))
+    flights = stage("select_drop_missing",
+                    lambda: raw.select(REQUIRED_COLUMNS).drop_missing(columns=CITY_COLUMNS))
+    del raw
+
+    # Route indexes are built once per process in the app; not part of any stage
+    dataset = FlightDataset(flights)
+    pairs = sample_pairs(flights, args.queries)
+    direct = [pair for pair in pairs if len(dataset.route(*pair))]
+
+    stage("direct_projection_all", lambda: build_projection_table(flights))
+    stage("direct_projection_routes",
+          lambda: [project_route(dataset.route(*pair)) for pair in direct],
+          rows=lambda results: sum(len(r) for r in results))
+    stage("indirect_join_reduce",
+          lambda: [best_routes(flights, *pair) for pair in pairs],
+          rows=lambda results: sum(len(r) for r in results))
+
+    def graph_search():
+        dataset._graph = None
+        return [project_connections(dataset.connections(*pair)) for pair in pairs]
+
+    stage("indirect_route_graph", graph_search, rows=lambda results: sum(len(r) for r in results))
+    def answer_all():
+        return [faq_answers(dataset, origin, dest, quarter, 250.0)
+                for origin, dest in pairs for quarter in (1, 2, 3, 4)]
+
+    def cold_answers():
+        dataset.results.clear()
+        return answer_all()
+
+    def answered(answers):
+        return sum(answer is not None for answer in answers)
+
+    stage("faq_answers", cold_answers, rows=answered)
+    # Same questions again, answered from the per-route result cache
+    stage("faq_answers_cached", answer_all, rows=answered)
+    return stages
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every stage against `baseline`; returns the regressed stage names."""
+    if baseline.get("config") != results["config"]:
+        print("warning: baseline was run with a different configuration:", baseline.get("config"))
+    regressions = []
+    print(f"vs. baseline (tolerance {tolerance:.0%}):")
+    for name, stage in results["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            print(f"  {name:26} (not in baseline)")
+            continue
+        ratio = stage["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - tolerance:
+            flag = "  faster"
+        print(f"  {name:26} {base['seconds'] * 1000:10.1f} -> {stage['seconds'] * 1000:10.1f} ms  "
+              f"({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000, help="synthetic rows (e.g. 245000 up to 10000000)")
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--first-year", type=int, default=1993)
+    parser.add_argument("--last-year", type=int, default=2024)
+    parser.add_argument("--quarters", type=int, nargs="+", default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    parser.add_argument("--queries", type=int, default=20, help="city pairs asked per query stage")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="keep the synthetic CSV at this path (reused if it exists)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="allowed slowdown vs. the baseline before a stage counts as a regression")
+    args = parser.parse_args()
+
+    config = {
+        "rows": args.rows, "cities": args.cities, "years": [args.first_year, args.last_year],
+        "quarters": sorted(args.quarters), "queries": args.queries, "repeat": args.repeat, "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.csv or os.path.join(tmp, "flights.csv")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            write_csv(path, args.rows, args.cities, years=(args.first_year, args.last_year),
+                      seed=args.seed, quarters=config["quarters"])
+            print(f"generated {args.rows} rows in {time.perf_counter() - start:.1f}s")
+        print(f"pipeline stages (best of {args.repeat}):")
+        stages = run_stages(path, args)
+
+    results = {
+        "benchmark": "pipeline",
+        "config": config,
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "numpy": np is not None,
+        },
+        "stages": stages,
+        "total_seconds": round(sum(stage["seconds"] for stage in stages.values()), 6),
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"wrote {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("regressed stages:", ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
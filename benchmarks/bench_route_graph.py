@@ -0,0 +1,77 @@
+"""
+Connecting routes for hub cities: one join_reduce per request vs. searches on
+the prebuilt RouteGraph (1-stop and 2-stop).
+
+    python benchmarks/bench_route_graph.py --rows 245000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Mini_DataFrame import MyTable  # noqa: E402
+from Route_Graph import RouteGraph  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+KEYS = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"])
+
+
+def is_fare(value):
+    return isinstance(value, (int, float)) and value > 0
+
+
+def per_request_join(flights, origin, dest):
+    """Closest 1-stop connection per (Year, quarter) by joining the two legs."""
+    result = flights.filter_eq(city1=origin).join_reduce(
+        flights.filter_eq(city2=dest),
+        key_fn=lambda l, r: (l["Year"], l["quarter"]),
+        order_by=lambda l, r: (l["nsmiles"] + r["nsmiles"], l["fare"] + r["fare"]),
+        where=lambda l, r: is_fare(l["fare"]) and is_fare(r["fare"]),
+        suffixes=("_leg1", "_leg2"),
+        **KEYS)
+    return {(row["Year"], row["quarter"]): row["fare_leg1"] + row["fare_leg2"] for row in result.rows}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=60)
+    parser.add_argument("--pairs", type=int, default=3, help="number of hub pairs to run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    flights = MyTable(CSV_COLUMNS, generate_rows(args.rows, args.cities, seed=args.seed))
+    departing = flights.create_index(["city1"])
+    arriving = flights.create_index(["city2"])
+
+    build_time, graph = timed(lambda: RouteGraph.from_table(flights))
+    print(f"graph: {len(graph.cities)} cities, {len(graph.periods)} periods, {len(graph)} edges, "
+          f"built in {build_time * 1000:.1f} ms")
+
+    origins = sorted(departing, key=lambda c: -len(departing[c]))[:args.pairs]
+    dests = sorted(arriving, key=lambda c: -len(arriving[c]))[:args.pairs]
+    for origin, dest in zip(origins, dests):
+        join_time, expected = timed(lambda: per_request_join(flights, origin, dest))
+        one_time, one_stop = timed(lambda: graph.best_per_period(origin, dest, stops=1))
+        two_time, two_stop = timed(lambda: graph.best_per_period(origin, dest, stops=2, by="fare"))
+        actual = {(it["Year"], it["quarter"]): it["fare_total"] for it in one_stop}
+        assert expected.keys() == actual.keys()
+        assert all(abs(expected[key] - actual[key]) < 1e-6 for key in expected)
+
+        print(f"{origin} -> {dest}: {graph.count(origin, dest, stops=1)} 1-stop, "
+              f"{graph.count(origin, dest, stops=2)} 2-stop itineraries")
+        print(f"  join_reduce, 1 stop   {join_time * 1000:8.1f} ms")
+        print(f"  graph, 1 stop         {one_time * 1000:8.1f} ms")
+        print(f"  graph, 2 stops        {two_time * 1000:8.1f} ms  ({len(two_stop)} periods)")
+
+
+if __name__ == "__main__":
+    main()
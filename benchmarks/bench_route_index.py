@@ -0,0 +1,55 @@
+"""
+Route lookups: filter_eq() over a cached (city1, city2) hash index vs. the
+lambda filter chain main() used to run.
+
+    python benchmarks/bench_route_index.py --rows 245000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Mini_DataFrame import MyTable  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    flights = MyTable(CSV_COLUMNS, generate_rows(args.rows, args.cities, seed=args.seed))
+    rng = random.Random(args.seed)
+    routes = sorted(set(zip(flights.column("city1"), flights.column("city2"))))
+    pairs = [rng.choice(routes) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    for origin, dest in pairs:
+        subset = flights.filter(lambda row: row["city1"] == origin)
+        subset.filter(lambda row: row["city2"] == dest)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    flights.create_index(["city1", "city2"])
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for origin, dest in pairs:
+        flights.filter_eq(city1=origin, city2=dest)
+    index_time = time.perf_counter() - start
+
+    print(f"rows: {args.rows}   queries: {args.queries}")
+    print(f"filter chain     {scan_time / args.queries * 1000:8.3f} ms/query")
+    print(f"index build      {build_time * 1000:8.1f} ms (once)")
+    print(f"filter_eq        {index_time / args.queries * 1000:8.3f} ms/query"
+          f"   ({scan_time / index_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
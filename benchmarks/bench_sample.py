@@ -0,0 +1,74 @@
+"""
+Approximate route projections from a stratified sample (MyTable.sample_by)
+vs. exact ones: time per route, error of the projected fares and how often
+the exact fare falls inside the sampled bounds.
+
+    python benchmarks/bench_sample.py --rows 2000000 --cities 8 --per-stratum 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Projection import project_route, project_sampled_route  # noqa: E402
+from Flight_Dataset import read_flights  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=600000)
+    parser.add_argument("--cities", type=int, default=8, help="few cities: many rows per route and quarter")
+    parser.add_argument("--first-year", type=int, default=2015)
+    parser.add_argument("--per-stratum", type=int, default=20, help="sampled rows per (route, Year, quarter)")
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, years=(args.first_year, 2024), seed=args.seed)
+        flights = read_flights(path)
+
+    start = time.perf_counter()
+    sample = flights.sample_by(["city1", "city2", "Year", "quarter"], size=args.per_stratum, seed=args.seed)
+    build_time = time.perf_counter() - start
+    sample.filter_eq(city1=None, city2=None)          # builds the sample's route index
+    flights.create_index(["city1", "city2"])
+
+    routes = sorted(flights.create_index(["city1", "city2"]))
+    pairs = random.Random(args.seed).sample(routes, min(args.routes, len(routes)))
+    # The sampled columns are gathered from the table on first read: once, not per route
+    project_route(flights.filter_eq(city1=pairs[0][0], city2=pairs[0][1]))
+    project_sampled_route(sample.filter_eq(city1=pairs[0][0], city2=pairs[0][1]))
+
+    start = time.perf_counter()
+    exact = {pair: project_route(flights.filter_eq(city1=pair[0], city2=pair[1])) for pair in pairs}
+    exact_time = time.perf_counter() - start
+    start = time.perf_counter()
+    approximate = {pair: project_sampled_route(sample.filter_eq(city1=pair[0], city2=pair[1])) for pair in pairs}
+    approximate_time = time.perf_counter() - start
+
+    errors = []
+    inside = 0
+    for pair in pairs:
+        for e, a in zip(exact[pair], approximate[pair]):
+            errors.append(abs(a['projected_fare'] - e['projected_fare']) / e['projected_fare'])
+            inside += a['projected_fare_low'] <= e['projected_fare'] <= a['projected_fare_high']
+
+    speedup = exact_time / approximate_time
+    print(f"{len(flights)} rows ({len(flights) / len(sample._strata):.0f} per route, Year and quarter), "
+          f"sample of {len(sample)} rows ({len(sample) / len(flights):.1%}) built in {build_time * 1000:.0f} ms")
+    print(f"exact projection        {exact_time / len(pairs) * 1000:8.2f} ms/route")
+    print(f"sampled projection      {approximate_time / len(pairs) * 1000:8.2f} ms/route   "
+          + (f"({speedup:.1f}x faster)" if speedup > 1 else "(slower: sampling does not pay off here)"))
+    print(f"projected fare error    mean {sum(errors) / len(errors):.2%}   max {max(errors):.2%}   "
+          f"exact inside bounds {inside / len(errors):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold start and per-session cost of the full flight table vs. the city shards
+(Flight_Shards): time to load everything the app needs before the first
+selection, time to load one (origin, destination) selection, and the memory
+of the loaded rows (MyTable.memory_usage).
+
+    python benchmarks/bench_shards.py --rows 1000000 --cities 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import FlightDataset, load_flights  # noqa: E402
+from Flight_Shards import ShardStore, repartition, shards_path_for  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def timed(fn):
+    """(seconds, result)."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def table_bytes(table):
+    return sum(table.memory_usage().values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--sessions", type=int, default=20, help="random (origin, destination) selections")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+        # First load parses the CSV and writes the binary cache; time the cached load
+        flights = load_flights(path)
+        repartition_time, (directory, n_origins, n_dests) = timed(lambda: repartition(flights, path))
+
+        full_time, full = timed(lambda: FlightDataset(load_flights(path)))
+        store_time, store = timed(lambda: ShardStore(shards_path_for(path), path))
+
+        rng = random.Random(args.seed)
+        pairs = [(rng.choice(store.origin_cities), rng.choice(store.dest_cities)) for _ in range(args.sessions)]
+        session_times, session_bytes = [], []
+        for origin, dest in pairs:
+            elapsed, dataset = timed(lambda: store.for_cities(origin, dest))
+            session_times.append(elapsed)
+            session_bytes.append(table_bytes(dataset.flights))
+            assert dataset.connection_count(origin, dest) == full.connection_count(origin, dest)
+
+        print(f"{len(full.flights)} rows, repartitioned into {n_origins} origin and {n_dests} destination shards "
+              f"in {repartition_time:.2f} s")
+        print(f"{'cold start, full table':34s} {full_time * 1000:9.1f} ms  {table_bytes(full.flights) / 1e6:8.1f} MB")
+        print(f"{'cold start, shard manifest':34s} {store_time * 1000:9.1f} ms")
+        print(f"{'per selection, shards (mean)':34s} {sum(session_times) / len(session_times) * 1000:9.1f} ms  "
+              f"{sum(session_bytes) / len(session_bytes) / 1e6:8.1f} MB  ({len(pairs)} selections)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+The flight table in memory (MyTable) vs. in an SQLite file (SQLiteTable):
+load time (first build and reopening), memory held by the table, and the
+app's queries: route lookups, a route's quarterly averages, departing rows,
+a grouped aggregate over the whole table and the origin/destination join.
+
+    python benchmarks/bench_sqlite.py --rows 1000000 --routes 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Fare_Projection import average_fares  # noqa: E402
+from Flight_Dataset import load_flights, load_flights_sqlite, sqlite_path_for  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+# Float means may differ in the last digits between the backends
+EXACT_ONLY_UP_TO_ROUNDING = ("route quarterly averages", "groupby(city1, Year).agg")
+
+JOIN_KEYS = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"])
+
+
+def timed(fn):
+    """(seconds, result)."""
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--routes", type=int, default=100, help="random routes queried")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+
+        backends = {}
+        for name, load in (("memory", load_flights), ("sqlite", load_flights_sqlite)):
+            build, _ = timed(lambda: load(path))
+            reopen, table = timed(lambda: load(path))
+            # Route indexes, as FlightDataset creates them at start
+            for columns in (["city1"], ["city2"], ["city1", "city2"]):
+                table.create_index(columns)
+            backends[name] = (build, reopen, table)
+        memory = backends["memory"][2]
+        in_memory = sum(memory.memory_usage().values())
+        on_disk = os.path.getsize(sqlite_path_for(path))
+
+        rng = random.Random(args.seed)
+        origins = memory.categories("city1")
+        dests = memory.categories("city2")
+        pairs = [(rng.choice(origins), rng.choice(dests)) for _ in range(args.routes)]
+        queries = [
+            ("route lookup", lambda t: [len(t.filter_eq(city1=o, city2=d)) for o, d in pairs]),
+            ("route quarterly averages", lambda t: [average_fares(t.filter_eq(city1=o, city2=d)) for o, d in pairs]),
+            ("departing rows", lambda t: [len(t.filter_eq(city1=o).rows) for o, _ in pairs[:20]]),
+            ("groupby(city1, Year).agg", lambda t: t.groupby(["city1", "Year"]).agg({"fare": "mean"}).rows),
+            ("origin x destination join", lambda t: [len(t.filter_eq(city1=o).join(t.filter_eq(city2=d), **JOIN_KEYS))
+                                                     for o, d in pairs[:20]]),
+        ]
+
+        print(f"{len(memory)} rows, {args.routes} routes")
+        print(f"{'':28s} {'memory':>12s} {'sqlite':>12s}")
+        print(f"{'first load (parse + write)':28s} {backends['memory'][0]:10.2f} s {backends['sqlite'][0]:10.2f} s")
+        print(f"{'reopen':28s} {backends['memory'][1]:10.2f} s {backends['sqlite'][1]:10.2f} s")
+        print(f"{'table in memory':28s} {in_memory / 1e6:9.1f} MB {0:9.1f} MB   ({on_disk / 1e6:.1f} MB file)")
+        for name, query in queries:
+            times = {}
+            results = {}
+            for backend, (_, _, table) in backends.items():
+                times[backend], results[backend] = timed(lambda: query(table))
+            if name not in EXACT_ONLY_UP_TO_ROUNDING:
+                assert results["memory"] == results["sqlite"], name
+            print(f"{name:28s} {times['memory'] * 1000:9.1f} ms {times['sqlite'] * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Memory and throughput: columnar MyTable vs. the original list-of-dicts rows.
+
+    python benchmarks/bench_storage.py --rows 245000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Mini_DataFrame import MyTable, MISSING_INDICATORS  # noqa: E402
+from synthetic_flights import CSV_COLUMNS, generate_rows  # noqa: E402
+
+
+class DictRowTable:
+    """The previous MyTable storage: one dict per row."""
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def filter(self, condition_fn):
+        return DictRowTable(self.columns, [row for row in self.rows if condition_fn(row)])
+
+    def select(self, columns):
+        return DictRowTable(columns, [{col: row.get(col, "") for col in columns} for row in self.rows])
+
+    def drop_missing(self, columns=None):
+        cols = columns or self.columns
+        return DictRowTable(self.columns, [
+            row for row in self.rows if not any(row.get(col) in MISSING_INDICATORS for col in cols)
+        ])
+
+    def groupby_mean(self, by, col):
+        groups = {}
+        for row in self.rows:
+            groups.setdefault(tuple(row[c] for c in by), []).append(row)
+        return {key: sum(r[col] for r in rows) / len(rows) for key, rows in groups.items()}
+
+    def join(self, other, on):
+        index = {}
+        for row in other.rows:
+            index.setdefault(tuple(row[c] for c in on), []).append(row)
+        joined = []
+        for row in self.rows:
+            for other_row in index.get(tuple(row[c] for c in on), ()):
+                joined.append({**row, **other_row})
+        return DictRowTable(list(dict.fromkeys(self.columns + other.columns)), joined)
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=245000)
+    parser.add_argument("--cities", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    source = list(generate_rows(args.rows, args.cities, seed=args.seed))
+
+    dict_table, dict_bytes = measure_memory(lambda: DictRowTable(CSV_COLUMNS, [dict(r) for r in source]))
+    col_table, col_bytes = measure_memory(lambda: MyTable(CSV_COLUMNS, source))
+    del source
+
+    print(f"rows: {args.rows}")
+    print(f"memory   dict rows: {dict_bytes / 1e6:8.1f} MB   columnar: {col_bytes / 1e6:8.1f} MB"
+          f"   ({dict_bytes / max(col_bytes, 1):.1f}x smaller)")
+
+    origin = col_table._data["city1"][0]
+    required = ["Year", "quarter", "city1", "city2", "airport_1", "airport_2", "nsmiles", "fare", "fare_low"]
+    legs_a = col_table.filter(lambda row: row["city1"] == origin)
+    legs_b = col_table.filter(lambda row: row["city2"] == origin)
+    dict_legs_a = dict_table.filter(lambda row: row["city1"] == origin)
+    dict_legs_b = dict_table.filter(lambda row: row["city2"] == origin)
+
+    cases = [
+        ("filter", lambda: dict_table.filter(lambda row: row["city1"] == origin),
+                   lambda: col_table.filter(lambda row: row["city1"] == origin)),
+        ("select", lambda: dict_table.select(required),
+                   lambda: col_table.select(required)),
+        ("drop_missing", lambda: dict_table.drop_missing(["city1", "city2", "airport_1", "airport_2"]),
+                         lambda: col_table.drop_missing(["city1", "city2", "airport_1", "airport_2"])),
+        ("groupby+mean", lambda: dict_table.groupby_mean(["Year", "quarter"], "fare"),
+                         lambda: col_table.groupby(["Year", "quarter"]).agg({"fare": "mean"})),
+        ("join", lambda: dict_legs_b.join(dict_legs_a, ["Year", "quarter"]),
+                 lambda: legs_b.join(legs_a, ["Year", "quarter"])),
+    ]
+
+    print(f"{'operation':<14}{'dict rows':>12}{'columnar':>12}{'speedup':>10}")
+    for name, dict_fn, col_fn in cases:
+        dict_time = timed(dict_fn)
+        col_time = timed(col_fn)
+        print(f"{name:<14}{dict_time * 1000:>10.1f}ms{col_time * 1000:>10.1f}ms{dict_time / col_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
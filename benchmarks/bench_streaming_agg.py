@@ -0,0 +1,98 @@
+"""
+groupby().agg() over a CSV: loading it (MyTable.from_file + GroupBy.agg) vs.
+streaming it through mergeable aggregate states (MyTable.agg_file), serially
+and with worker processes. Reports time, peak Python memory of this process
+(tracemalloc; worker processes are not included) and the rank error of the
+streamed medians and percentiles.
+
+    python benchmarks/bench_streaming_agg.py --rows 1000000 --workers 4
+"""
+import argparse
+import bisect
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import FLIGHT_SCHEMA  # noqa: E402
+from Mini_DataFrame import MyTable  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+BY = ["Year", "quarter"]
+EXACT_AGG = {"fare": "median", "passengers": "sum", "nsmiles": "mean"}
+
+
+def measure(fn):
+    """(seconds, peak traced bytes, result)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-mb", type=float, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    chunk_bytes = int(args.chunk_mb * 1024 * 1024)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "flights.csv")
+        write_csv(path, args.rows, args.cities, seed=args.seed)
+        size = os.path.getsize(path)
+
+        def load_and_agg():
+            flights = MyTable.from_file(path, schema=FLIGHT_SCHEMA, usecols=BY + list(EXACT_AGG))
+            return flights.groupby(BY).agg(EXACT_AGG, engine="python"), flights
+
+        runs = [("from_file + groupby.agg", lambda: load_and_agg()[0])]
+        for workers in (1, args.workers):
+            runs.append((f"agg_file, {workers} worker(s)",
+                         lambda w=workers: MyTable.agg_file(path, BY, EXACT_AGG, schema=FLIGHT_SCHEMA,
+                                                            workers=w, chunk_bytes=chunk_bytes)))
+
+        print(f"{args.rows} rows ({size / 1e6:.0f} MB), {args.chunk_mb:g} MB chunks")
+        results = []
+        for name, fn in runs:
+            elapsed, peak, result = measure(fn)
+            results.append(result)
+            print(f"{name:28s} {elapsed:7.2f} s   peak {peak / 1e6:8.1f} MB")
+
+        exact = {tuple(row[c] for c in BY): row for row in results[0].rows}
+        for result in results[1:]:
+            for row in result.rows:
+                expected = exact[tuple(row[c] for c in BY)]
+                assert row["passengers_sum"] == expected["passengers_sum"]
+                assert abs(row["nsmiles_mean"] - expected["nsmiles_mean"]) <= 1e-9 * abs(expected["nsmiles_mean"])
+
+        # Rank error of the streamed quantiles against each group's sorted fares
+        _, flights = load_and_agg()
+        fare = flights.column("fare")
+        fares = {key: sorted(v for v in (fare[i] for i in positions) if isinstance(v, (int, float)))
+                 for key, positions in flights.create_index(BY).items()}
+        quantiles = {"median": 0.5, "p10": 0.1, "p90": 0.9, "p99": 0.99}
+        for func, q in quantiles.items():
+            result = MyTable.agg_file(path, BY, {"fare": func}, schema=FLIGHT_SCHEMA,
+                                      workers=args.workers, chunk_bytes=chunk_bytes)
+            errors = []
+            for row in result.rows:
+                values = fares[tuple(row[c] for c in BY)]
+                rank = (bisect.bisect_left(values, row["fare_" + func]) +
+                        bisect.bisect_right(values, row["fare_" + func])) / 2 / len(values)
+                errors.append(abs(rank - q))
+            print(f"fare {func:6s} rank error   mean {sum(errors) / len(errors):.4%}   max {max(errors):.4%}   "
+                  f"({len(errors)} groups)")
+
+
+if __name__ == "__main__":
+    main()
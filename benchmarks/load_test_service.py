@@ -0,0 +1,143 @@
+"""
+Load generator for the fare HTTP service (Fare_Service): starts it on a
+synthetic CSV, sends projection, best-month and price-comparison queries from
+concurrent keep-alive clients and reports throughput and latency percentiles,
+once per --batch-window.
+
+    python benchmarks/load_test_service.py --clients 32 --requests 4000 --batch-window 0 0.005
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import load_flights  # noqa: E402
+from synthetic_flights import make_cities, write_csv  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+MONTHS = ['January', 'April', 'July', 'October']
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def start_service(csv_path, workers, batch_window):
+    """Start `python -m Fare_Service` on a free port; returns (process, port)."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "Fare_Service", "--csv", csv_path, "--port", "0",
+         "--workers", str(workers), "--batch-window", str(batch_window)],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if "listening on" in line:
+            return process, int(line.rsplit(":", 1)[1])
+    raise RuntimeError("fare service exited before listening")
+
+
+async def request(reader, writer, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n")
+                  if line.lower().startswith(b"content-length"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+def make_queries(n, pairs, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        origin, dest = rng.choice(pairs)
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append("/projection?" + urlencode({"origin": origin, "dest": dest}))
+        elif kind < 0.75:
+            queries.append("/best-months?" + urlencode({"origin": origin, "dest": dest}))
+        else:
+            queries.append("/compare?" + urlencode({"origin": origin, "dest": dest, "month": rng.choice(MONTHS),
+                                                    "price": rng.randint(50, 900)}))
+    return queries
+
+
+async def run_load(port, queries, n_clients):
+    """Send `queries` from n_clients keep-alive connections; returns (sorted latencies, wall time, errors)."""
+    latencies = []
+    errors = 0
+    queue = list(reversed(queries))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        while queue:
+            target = queue.pop()
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, target)
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(n_clients)))
+    return sorted(latencies), time.perf_counter() - start, errors
+
+
+async def fetch_stats(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    _, stats = await request(reader, writer, "/stats")
+    writer.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--routes", type=int, default=1000, help="distinct city pairs the queries are drawn from")
+    parser.add_argument("--workers", type=int, default=2, help="service search processes")
+    parser.add_argument("--batch-window", type=float, nargs="+", default=[0, 0.005])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cities = [city[0] for city in make_cities(args.cities, args.seed)]
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(cities, 2)) for _ in range(args.routes)]
+    queries = make_queries(args.requests, pairs, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "flights.csv")
+        write_csv(csv_path, args.rows, args.cities, seed=args.seed)
+        # Write the binary cache once, so the service and its workers start from it
+        load_flights(csv_path)
+        print(f"{args.clients} clients, {args.requests} requests over {args.routes} routes, "
+              f"{args.workers} search workers")
+
+        for window in args.batch_window:
+            process, port = start_service(csv_path, args.workers, window)
+            try:
+                latencies, wall, errors = asyncio.run(run_load(port, queries, args.clients))
+                stats = asyncio.run(fetch_stats(port))
+            finally:
+                process.terminate()
+                process.wait()
+            per_batch = stats["routes_per_batch"]
+            print(f"batch window {window * 1000:4.1f}ms  {len(latencies) / wall:8.1f} req/s   "
+                  f"p50 {percentile(latencies, 50) * 1000:7.1f}ms   p95 {percentile(latencies, 95) * 1000:7.1f}ms   "
+                  f"p99 {percentile(latencies, 99) * 1000:7.1f}ms   "
+                  f"{stats['batches']} batches ({per_batch or 0:.1f} routes each), {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
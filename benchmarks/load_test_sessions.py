@@ -0,0 +1,99 @@
+"""
+Simulate N concurrent Streamlit sessions rerunning the app script and report
+rerun latency percentiles, comparing the shared process-wide dataset with
+rebuilding the dataset on every rerun.
+
+    python benchmarks/load_test_sessions.py --sessions 16 --reruns 20 --rows 245000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from Flight_Dataset import FlightDataset, get_dataset, invalidate_dataset, load_flights  # noqa: E402
+from synthetic_flights import write_csv  # noqa: E402
+
+
+def rerun(dataset, origin, dest):
+    """The data work of one script rerun after a widget change (no rendering)."""
+    origin_options = [""] + dataset.origin_cities
+    dest_options = [""] + dataset.dest_cities
+    direct = dataset.route(origin, dest)
+    table_origin = dataset.departing(origin)
+    table_destination = dataset.arriving(dest)
+    direct.groupby(["Year", "quarter"]).agg({"fare": "mean"})
+    return len(origin_options) + len(dest_options) + len(table_origin) + len(table_destination)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def run_sessions(get, n_sessions, n_reruns, seed):
+    """Run n_sessions threads doing n_reruns reruns each; return (latencies, wall time)."""
+    cities = get().origin_cities
+
+    def session(session_id):
+        rng = random.Random(seed + session_id)
+        latencies = []
+        for _ in range(n_reruns):
+            origin, dest = rng.choice(cities), rng.choice(cities)
+            start = time.perf_counter()
+            rerun(get(), origin, dest)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_sessions) as pool:
+        results = list(pool.map(session, range(n_sessions)))
+    wall = time.perf_counter() - start
+    return sorted(t for latencies in results for t in latencies), wall
+
+
+def report(name, latencies, wall):
+    print(f"{name:<22} p50 {percentile(latencies, 50) * 1000:8.1f}ms   "
+          f"p99 {percentile(latencies, 99) * 1000:8.1f}ms   "
+          f"{len(latencies) / wall:8.1f} reruns/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test for the shared flight dataset")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--cities", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="Use this CSV instead of generating synthetic data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, "flights.csv")
+            write_csv(csv_path, args.rows, args.cities, seed=args.seed)
+
+        # Warm the binary cache so both modes start from the same files
+        load_flights(csv_path)
+        print(f"{args.sessions} sessions x {args.reruns} reruns")
+
+        # Before: every rerun loads and rebuilds its own dataset
+        per_session = lambda: FlightDataset(load_flights(csv_path))  # noqa: E731
+        report("rebuild per rerun", *run_sessions(per_session, args.sessions, args.reruns, args.seed))
+
+        # After: one dataset shared by every session
+        invalidate_dataset()
+        shared = lambda: get_dataset(csv_path)  # noqa: E731
+        report("shared dataset", *run_sessions(shared, args.sessions, args.reruns, args.seed))
+        invalidate_dataset()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Seeded synthetic data shaped like "US Airline Flight Routes and Fares 1993-2024.csv".
+
+Used by the benchmark scripts so they can run without the real dataset.
+"""
+import csv
+import random
+
+
+# Same header as the real DOT fare CSV
+CSV_COLUMNS = [
+    "tbl", "Year", "quarter", "citymarketid_1", "citymarketid_2", "city1", "city2",
+    "airportid_1", "airportid_2", "airport_1", "airport_2", "nsmiles", "passengers",
+    "fare", "carrier_lg", "large_ms", "fare_lg", "carrier_low", "lf_ms", "fare_low",
+    "Geocoded_City1", "Geocoded_City2", "tbl1apk",
+]
+
+_STATES = ["AL", "AZ", "CA", "CO", "FL", "GA", "IL", "MA", "MI", "MN", "NV", "NY", "OR", "PA", "TX", "WA"]
+_CARRIERS = ["AA", "DL", "UA", "WN", "AS", "B6", "NK", "F9"]
+
+
+def make_cities(n_cities, seed=0):
+    """Return `n_cities` (city name, airport code, market id, airport id) tuples."""
+    rng = random.Random(seed)
+    cities = []
+    for i in range(n_cities):
+        state = _STATES[i % len(_STATES)]
+        name = f"City{i:03d}, {state}"
+        if i % 7 == 0:
+            name += " (Metropolitan Area)"
+        code = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(3))
+        cities.append((name, code, 30000 + i, 10000 + i))
+    return cities
+
+
+def generate_rows(n_rows, n_cities=100, years=(1993, 2024), seed=0, quarters=(1, 2, 3, 4)):
+    """
+    Yield `n_rows` fare records as dicts with the CSV schema and already-typed values.
+    Routes are drawn from a fixed set of city pairs so that routes repeat across quarters.
+    `years` is an inclusive (first, last) range; `quarters` the quarters rows are drawn from.
+    """
+    rng = random.Random(seed)
+    cities = make_cities(n_cities, seed)
+    first_year, last_year = years
+
+    # Each route gets a stable distance and base fare; fares grow ~3% a year
+    n_routes = max(1, min(n_cities * (n_cities - 1), n_rows // 20 or 1))
+    routes = []
+    for _ in range(n_routes):
+        a, b = rng.sample(range(n_cities), 2)
+        miles = rng.randint(100, 2800)
+        routes.append((cities[a], cities[b], miles, 50 + miles * 0.12 + rng.random() * 80))
+
+    for i in range(n_rows):
+        (city1, code1, mkt1, apt1), (city2, code2, mkt2, apt2), miles, base = routes[rng.randrange(n_routes)]
+        year = rng.randint(first_year, last_year)
+        quarter = rng.choice(quarters)
+        growth = 1.03 ** (year - first_year)
+        season = (1.0, 0.95, 1.1, 1.02)[quarter - 1]
+        fare = round(base * growth * season * (0.9 + rng.random() * 0.2), 2)
+        # A small share of rows have blank fields, like the real file
+        blank = rng.random() < 0.01
+        yield {
+            "tbl": "Table1a",
+            "Year": year,
+            "quarter": quarter,
+            "citymarketid_1": mkt1,
+            "citymarketid_2": mkt2,
+            "city1": city1,
+            "city2": city2,
+            "airportid_1": apt1,
+            "airportid_2": apt2,
+            "airport_1": "" if blank else code1,
+            "airport_2": code2,
+            "nsmiles": miles,
+            "passengers": rng.randint(0, 5000),
+            "fare": fare,
+            "carrier_lg": rng.choice(_CARRIERS),
+            "large_ms": round(rng.random(), 4),
+            "fare_lg": round(fare * (0.9 + rng.random() * 0.2), 2),
+            "carrier_low": rng.choice(_CARRIERS),
+            "lf_ms": round(rng.random(), 4),
+            "fare_low": "" if blank else round(fare * 0.85, 2),
+            "Geocoded_City1": "",
+            "Geocoded_City2": "",
+            "tbl1apk": f"{year}{quarter}{apt1}{apt2}{i}",
+        }
+
+
+def write_csv(path, n_rows, n_cities=100, years=(1993, 2024), seed=0, quarters=(1, 2, 3, 4)):
+    """Write a synthetic fare CSV to `path` and return the number of rows written."""
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for row in generate_rows(n_rows, n_cities, years, seed, quarters):
+            writer.writerow(row)
+            count += 1
+    return count
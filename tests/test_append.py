@@ -0,0 +1,57 @@
+from Mini_DataFrame import CATEGORY, MyTable
+
+
+def make_table():
+    return MyTable(["a", "b"], [{"a": 1, "b": "x"}, {"a": 2, "b": "y"}, {"a": 1, "b": "z"}])
+
+
+def test_filter_eq_result_unchanged_by_append():
+    table = make_table()
+    table.create_index(["a"])
+    sub = table.filter_eq(a=1)
+    table.append_rows([{"a": 1, "b": "new"}, {"a": 3, "b": "other"}])
+
+    assert len(sub) == 2
+    assert sub.rows == [{"a": 1, "b": "x"}, {"a": 1, "b": "z"}]
+    assert [row["b"] for row in table.filter_eq(a=1).rows] == ["x", "z", "new"]
+
+
+def test_index_lookup_result_unchanged_by_append():
+    table = make_table()
+    sub = table.index_lookup(1, ["a"])
+    table.append_rows([{"a": 1, "b": "new"}])
+
+    assert sub.column("b") == ["x", "z"]
+    assert table.index_lookup(1, ["a"]).column("b") == ["x", "z", "new"]
+
+
+def test_append_updates_index_like_rebuild():
+    table = make_table()
+    table.create_index(["a", "b"])
+    table.append_rows([{"a": 2, "b": "y"}, {"a": 4, "b": "w"}])
+
+    rebuilt = MyTable(table.columns, table.rows).create_index(["a", "b"])
+    assert table.create_index(["a", "b"]) == rebuilt
+
+
+def make_categorical(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text)
+    return MyTable.from_file(str(path), schema={"city": CATEGORY, "n": int})
+
+
+def test_categorical_kind_survives_join_and_append(tmp_path):
+    left = make_categorical(tmp_path, "left.csv", "city,n\nA,1\nB,2\nC,3\n")
+    right = make_categorical(tmp_path, "right.csv", "city,n\nB,20\nD,40\n")
+    plain_left, plain_right = MyTable(left.columns, left.rows), MyTable(right.columns, right.rows)
+
+    for how in ("left", "right", "outer"):
+        joined = left.join(right, on="city", how=how)
+        assert joined._data["city"].kind == "cat"
+        assert joined.rows == plain_left.join(plain_right, on="city", how=how).rows
+
+    left.append_rows([{"city": "E", "n": 5}, {"city": 7, "n": 6}])
+    left.append_rows(right)
+    assert left._data["city"].kind == "cat"
+    assert left.column("city") == ["A", "B", "C", "E", 7, "B", "D"]
+    assert left.filter_eq(city="B").column("n") == [2, 20]
@@ -0,0 +1,71 @@
+import math
+
+import pytest
+
+from Fare_Backtest import backtest, stale_quarters
+from Fare_Models import GrowthRateModel, SeasonalTrendModel
+from Mini_DataFrame import MyTable
+
+COLUMNS = ["city1", "city2", "Year", "quarter", "fare"]
+
+
+def growing_route(city1="A", city2="B", years=range(2015, 2025), rate=0.10):
+    """Every quarter's fare grows by `rate` a year: growth_rate projects it exactly."""
+    return [
+        {"city1": city1, "city2": city2, "Year": year, "quarter": quarter,
+         "fare": 100 * quarter * (1 + rate) ** (year - years[0])}
+        for year in years for quarter in range(1, 5)
+    ]
+
+
+def test_growth_rate_backtest_of_constant_growth():
+    flights = MyTable(COLUMNS, growing_route())
+    result, = backtest(flights, [GrowthRateModel()], holdout_years=2, workers=1)
+
+    assert result['test_years'] == [2023, 2024]
+    assert result['routes'] == 1
+    assert result['points'] == 8
+    assert result['coverage'] == 1.0
+    assert result['stale'] == 0.0
+    # Only the projection's rounding to cents is off
+    assert result['mape'] < 1e-3
+    assert abs(result['bias']) < 1e-3
+
+
+def test_seasonal_trend_backtest_of_linear_fares():
+    rows = [
+        {"city1": "A", "city2": "B", "Year": year, "quarter": quarter, "fare": 100 + 10 * quarter + 5 * (year - 2015)}
+        for year in range(2015, 2025) for quarter in range(1, 5)
+    ]
+    result, = backtest(MyTable(COLUMNS, rows), [SeasonalTrendModel()], holdout_years=2, workers=1)
+    assert math.isclose(result['mape'], 0.0, abs_tol=1e-9)
+
+
+def test_stale_quarter_is_flagged_and_skipped():
+    rows = growing_route()
+    # Quarter 1 of C -> D: last trained fare in 2018, after a jump from 2017
+    rows += [
+        {"city1": "C", "city2": "D", "Year": year, "quarter": 1, "fare": fare}
+        for year, fare in [(2015, 100), (2016, 100), (2017, 100), (2018, 200), (2023, 110), (2024, 112)]
+    ]
+    flights = MyTable(COLUMNS, rows)
+
+    result, = backtest(flights, [GrowthRateModel()], holdout_years=2, workers=1)
+    assert result['stale'] == pytest.approx(2 / 10)
+    assert result['routes'] == 2
+    # The 2018 doubling makes a 33% average change, compounded for five and six years
+    assert result['mape'] > 100
+
+    skipped, = backtest(flights, [GrowthRateModel()], holdout_years=2, workers=1, skip_stale=True)
+    assert skipped['routes'] == 1
+    assert skipped['points'] == 8
+    assert skipped['mape'] < 1e-3
+
+
+def test_stale_quarters():
+    train = [
+        {"Year": year, "quarter": quarter, "average_fare": 100.0}
+        for year, quarter in [(2018, 1), (2019, 1), (2020, 1), (2020, 2), (2021, 2), (2022, 2), (2022, 3)]
+    ]
+    # 1: latest fare in 2020; 2: recent with two changes; 3: one year only
+    assert stale_quarters(train, 2022) == {1, 3}
@@ -0,0 +1,67 @@
+import gc
+import os
+import weakref
+
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable
+
+SCHEMA = {"city": CATEGORY, "n": int, "fare": float}
+
+
+@pytest.fixture
+def make_table(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("city,n,fare\nA,0,0.5\nB,1,\nA,2,3.0\nC,3,4.5\n")
+    return lambda: MyTable.from_file(str(path), schema=SCHEMA)
+
+
+def test_round_trip(tmp_path, make_table):
+    table = make_table()
+    path = str(tmp_path / "table.cache")
+    table.to_cache(path)
+    loaded = MyTable.from_cache(path)
+    assert loaded.rows == table.rows
+    assert loaded._data["city"].kind == "cat"
+
+
+def test_close_keeps_values_and_releases_file(tmp_path, make_table):
+    table = make_table()
+    path = str(tmp_path / "table.cache")
+    table.to_cache(path)
+    loaded = MyTable.from_cache(path)
+    taken = loaded.take([3, 0])
+    mapping = loaded._mapping
+
+    loaded.close()
+    assert mapping.closed
+    assert loaded.rows == table.rows
+    assert taken.rows == [table.rows[3], table.rows[0]]
+    # The file can be rewritten while the closed table stays usable
+    loaded.append_rows([{"city": "D", "n": 9, "fare": 1.0}])
+    loaded.to_cache(path)
+    assert len(MyTable.from_cache(path)) == 5
+    loaded.close()
+
+
+def test_mapping_freed_with_table(tmp_path, make_table):
+    path = str(tmp_path / "table.cache")
+    make_table().to_cache(path)
+    loaded = MyTable.from_cache(path)
+    taken = loaded.filter_eq(city="A")
+    mapping = weakref.ref(loaded._mapping)
+    del loaded
+    gc.collect()
+    # Still viewed by the filtered table's unread columns
+    assert mapping() is not None
+    assert taken.column("n") == [0, 2]
+    del taken
+    gc.collect()
+    assert mapping() is None
+    os.remove(path)
+
+
+def test_close_without_mapping_is_noop(make_table):
+    table = make_table()
+    table.close()
+    assert table.rows == make_table().rows
@@ -0,0 +1,106 @@
+import math
+from array import array
+
+import pytest
+
+from Mini_DataFrame import MyTable
+from dict_table import DictTable
+
+COLUMNS = ["city1", "city2", "Year", "quarter", "fare", "nsmiles"]
+ROWS = [
+    {"city1": "Boston", "city2": "Miami", "Year": 2023, "quarter": 1, "fare": 150.5, "nsmiles": 1250},
+    {"city1": "Boston", "city2": "Denver", "Year": 2023, "quarter": 1, "fare": "", "nsmiles": 1750},
+    {"city1": "Chicago", "city2": "Miami", "Year": 2024, "quarter": 2, "fare": 210.0, "nsmiles": ""},
+    {"city1": "Denver", "city2": "Boston", "Year": 2024, "quarter": 2, "fare": "NA", "nsmiles": 1750},
+    {"city1": "Boston", "city2": "Miami", "Year": 2024, "quarter": 1, "fare": 175.25, "nsmiles": 1250},
+    {"city1": "Chicago", "city2": "Denver", "Year": 2023, "quarter": 3, "fare": 99.0, "nsmiles": 900},
+]
+
+
+def tables():
+    return MyTable(COLUMNS, [dict(r) for r in ROWS]), DictTable(COLUMNS, [dict(r) for r in ROWS])
+
+
+def assert_same(table, reference):
+    assert table.columns == reference.columns
+    assert len(table.rows) == len(reference.rows)
+    for a, b in zip(table.rows, reference.rows):
+        assert a.keys() == b.keys()
+        for key in a:
+            if isinstance(a[key], float) and isinstance(b[key], float):
+                assert math.isclose(a[key], b[key], rel_tol=1e-12), (key, a, b)
+            else:
+                assert a[key] == b[key], (key, a, b)
+
+
+def test_storage_is_typed_per_column():
+    table, _ = tables()
+    kinds = {col: table._data[col].kind for col in COLUMNS}
+    assert kinds == {"city1": "str", "city2": "str", "Year": "int", "quarter": "int",
+                     "fare": "float", "nsmiles": "int"}
+    # Blanks in numeric columns stay as sparse exceptions, not boxed values
+    assert isinstance(table._data["fare"].data, array)
+    assert table._data["fare"].missing == {1: "", 3: "NA"}
+    assert table.rows == ROWS
+    assert table.column("nsmiles") == [r["nsmiles"] for r in ROWS]
+
+
+def test_rows_view_is_lazy_and_rebuilt():
+    table, _ = tables()
+    assert table._rows is None
+    assert table.rows is table.rows
+    table.rows = ROWS[:2]
+    assert len(table) == 2 and table.rows == ROWS[:2]
+
+
+def test_filter_lambda_sees_a_row_view():
+    table, reference = tables()
+    kept = []
+
+    def keep(row):
+        assert row.get("missing", "default") == "default"
+        assert "fare" in row and len(row) == len(COLUMNS)
+        kept.append(row.copy())
+        return row["city1"] == "Boston" and row.get("fare") != ""
+
+    assert_same(table.filter(keep), reference.filter(lambda r: r["city1"] == "Boston" and r.get("fare") != ""))
+    # copy() keeps a row after the view has moved on
+    assert kept == ROWS
+
+
+@pytest.mark.parametrize("columns", [["city2", "fare"], [4, 0], ["city1", "nope"]])
+def test_select_matches_baseline(columns):
+    table, reference = tables()
+    assert_same(table.select(columns), reference.select(columns))
+
+
+@pytest.mark.parametrize("columns", [None, ["fare"], ["nsmiles", "city1"], ["nope"]])
+def test_drop_missing_matches_baseline(columns):
+    table, reference = tables()
+    assert_same(table.drop_missing(columns), reference.drop_missing(columns))
+
+
+@pytest.mark.parametrize("by", ["city1", ["Year", "quarter"]])
+def test_groupby_matches_baseline(by):
+    table, reference = tables()
+    agg_map = {"fare": "mean", "nsmiles": "max"}
+    assert_same(table.groupby(by).agg(agg_map), reference.groupby(by).agg(agg_map))
+    assert table.groupby(by).groups == reference.groupby(by).groups
+
+
+@pytest.mark.parametrize("how", ["inner", "left", "right", "outer"])
+def test_join_matches_baseline(how):
+    table, reference = tables()
+    hubs = [{"city2": "Miami", "Year": 2024, "hub": 1}, {"city2": "Denver", "Year": 2023, "hub": 0},
+            {"city2": "Miami", "Year": 2024, "hub": 2}, {"city2": "Seattle", "Year": 2023, "hub": 0}]
+    columns = ["city2", "Year", "hub"]
+    assert_same(table.join(MyTable(columns, hubs), on=["city2", "Year"], how=how),
+                reference.join(DictTable(columns, hubs), on=["city2", "Year"], how=how))
+
+
+def test_derived_tables_do_not_change_the_source():
+    table, _ = tables()
+    selected = table.select(["city1", "fare"])
+    selected.append_rows([{"city1": "Austin", "fare": 1.0}])
+    assert table.rows == ROWS
+    assert len(selected) == len(ROWS) + 1
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+from Fare_Service import BadRequest, FareService, StaleDataset, _search_connections
+from Flight_Dataset import REQUIRED_COLUMNS, FlightDataset, invalidate_dataset
+from Mini_DataFrame import MyTable
+
+
+@pytest.fixture
+def service():
+    rows = [{"Year": 2020 + i // 4, "quarter": i % 4 + 1, "city1": "A", "city2": "B", "airport_1": "AAA",
+             "airport_2": "BBB", "nsmiles": 500.0, "fare": 100.0 + i} for i in range(8)]
+    service = FareService(FlightDataset(MyTable(list(rows[0]), rows)), search_workers=0)
+    yield service
+    service.close()
+
+
+def exchange(service, request):
+    """Send raw bytes to the service; returns everything it answers before closing."""
+    async def run():
+        server = await asyncio.start_server(service.serve_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+    return asyncio.run(run())
+
+
+def status_and_body(response):
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(payload) if payload else None
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5", b" "])
+def test_bad_content_length(service, length):
+    response = exchange(service, b"GET /stats HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert status_and_body(response) == (400, {"error": "bad Content-Length"})
+
+
+def test_truncated_body_closes_quietly(service):
+    response = exchange(service, b"GET /stats HTTP/1.1\r\nContent-Length: 100\r\n\r\nshort")
+    assert response == b""
+
+
+def test_body_is_skipped(service):
+    response = exchange(service, b"GET /stats HTTP/1.1\r\nContent-Length: 4\r\nConnection: close\r\n\r\nbody")
+    status, body = status_and_body(response)
+    assert status == 200 and body["requests"] == 1
+
+
+def query(service, path, **params):
+    return asyncio.run(service.handle(path, {name: [value] for name, value in params.items()}))
+
+
+@pytest.mark.parametrize("params, error", [
+    ({"origin": "A"}, "missing parameter 'dest'"),
+    ({"dest": "B"}, "missing parameter 'origin'"),
+    ({"origin": "Nowhere", "dest": "B"}, "unknown origin 'Nowhere'"),
+    ({"origin": "A", "dest": "A"}, "unknown dest 'A'"),
+])
+def test_bad_cities_rejected_before_any_work(service, params, error):
+    with pytest.raises(BadRequest, match=error):
+        query(service, "/projection", **params)
+    assert service.batcher.batches == 0
+
+
+def connecting_dataset():
+    rows = [{"Year": 2020 + i // 4, "quarter": i % 4 + 1, "city1": city1, "city2": city2, "airport_1": city1 * 3,
+             "airport_2": city2 * 3, "nsmiles": 500.0, "fare": 100.0 + i}
+            for i in range(8) for city1, city2 in (("A", "C"), ("C", "B"))]
+    return FlightDataset(MyTable(list(rows[0]), rows))
+
+
+def test_injected_dataset_is_searched_in_process(tmp_path):
+    # The workers would load the CSV; an injected dataset's rows are not in one
+    dataset = connecting_dataset()
+    service = FareService(dataset, csv_path=str(tmp_path / "missing.csv"), search_workers=1)
+    try:
+        assert service._worker_source() is None
+        status, body = query(service, "/projection", origin="A", dest="B")
+        assert status == 200
+        assert body["projection"] == dataset.connection_projection("A", "B") != []
+    finally:
+        service.close()
+
+
+def test_workers_only_for_the_csv_rows():
+    dataset = connecting_dataset()
+    dataset.signature = (1, 2)
+    service = FareService(dataset, csv_path="flights.csv", search_workers=0)
+    assert service._worker_source() == ("flights.csv", "memory", (1, 2))
+
+    dataset.append(MyTable(dataset.flights.columns, dataset.flights.rows[:1]))
+    # Rows added by append() alone are not in the CSV the workers load
+    assert service._worker_source() is None
+
+
+def test_worker_rejects_changed_csv(tmp_path):
+    path = tmp_path / "flights.csv"
+    path.write_text(",".join(REQUIRED_COLUMNS) + "\n2024,1,1,2,A,B,1,2,AAA,BBB,500,100,80\n")
+    try:
+        # The service answers from the CSV as it was when it had signature (1, 2)
+        with pytest.raises(StaleDataset):
+            _search_connections((str(path), "memory", (1, 2)), [("A", "B")])
+    finally:
+        invalidate_dataset()
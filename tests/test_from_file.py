@@ -0,0 +1,65 @@
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable
+from dict_table import DictTable
+
+CSV = """Year,quarter,city1,city2,nsmiles,fare,carrier
+2023,1,"Boston, MA","Miami, FL",1250,150.50,AA
+2023,2,"Boston, MA","Denver, CO", 1750 ,,DL
+2024,1,"Chicago, IL","Miami, FL",,210,
+2024,3,"Denver, CO","Boston, MA",1750,NA,UA,extra
+2024,4,"Miami, FL","Chicago, IL",1200
+2022,1,"Austin, TX","Boston, MA",1700,-3.5,WN
+
+"""
+
+SCHEMA = {"Year": int, "quarter": int, "city1": CATEGORY, "city2": str, "nsmiles": float, "fare": float}
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "flights.csv"
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_untyped_parse_matches_baseline(path, capsys):
+    table = MyTable.from_file(path)
+    warning = capsys.readouterr().out
+    reference = DictTable.from_file(path)
+    assert capsys.readouterr().out == warning == " Line 5 has 8 values (expected 7). Truncating extras.\n"
+
+    assert table.columns == reference.columns
+    assert table.rows == reference.rows
+
+
+def test_schema_converts_once_and_keeps_unconvertible_cells(path):
+    table = MyTable.from_file(path, schema=SCHEMA)
+    reference = DictTable.from_file(path)
+    assert {col: table._data[col].kind for col in table.columns} == {
+        "Year": "int", "quarter": "int", "city1": "cat", "city2": "str",
+        "nsmiles": "float", "fare": "float", "carrier": "str"}
+
+    for row, expected in zip(table.rows, reference.rows):
+        for col, value in expected.items():
+            if SCHEMA.get(col) is float and value != "" and value != "NA":
+                # The schema makes every number of a float column a float
+                assert row[col] == float(value) and isinstance(row[col], float)
+            else:
+                assert row[col] == value, (col, row, expected)
+
+
+def test_usecols_parses_only_those_columns_in_that_order(path):
+    usecols = ["fare", "city1", "Year"]
+    table = MyTable.from_file(path, schema=SCHEMA, usecols=usecols)
+    assert table.columns == usecols
+    assert table._data.keys() == set(usecols)
+    assert table.rows == MyTable.from_file(path, schema=SCHEMA).select(usecols).rows
+
+    with pytest.raises(ValueError, match="nope"):
+        MyTable.from_file(path, usecols=["fare", "nope"])
+
+
+def test_unknown_schema_type(path):
+    with pytest.raises(ValueError, match="Unsupported column type"):
+        MyTable.from_file(path, schema={"fare": bytes})
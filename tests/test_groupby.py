@@ -0,0 +1,73 @@
+import math
+
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable
+
+np = pytest.importorskip("numpy")
+
+FUNCS = ("sum", "mean", "count", "min", "max", "median")
+
+CSV = """city,year,quarter,fare,miles
+Boston,2020,1,100.5,200
+Boston,2020,1,,210
+Chicago,2020,2,300,
+Chicago,2021,2,NA,400
+Boston,2021,1,99,205
+Denver,2020,1,,
+Denver,2020,1,,
+Chicago,2020,2,310.25,390
+Boston,2020,1,120,190
+"""
+
+
+def assert_same(left, right):
+    assert left.columns == right.columns
+    assert len(left.rows) == len(right.rows)
+    for a, b in zip(left.rows, right.rows):
+        assert a.keys() == b.keys()
+        for key in a:
+            if isinstance(a[key], float) or isinstance(b[key], float):
+                assert math.isclose(a[key], b[key], rel_tol=1e-12), (key, a, b)
+            else:
+                assert a[key] == b[key], (key, a, b)
+
+
+@pytest.fixture
+def flights(tmp_path):
+    path = tmp_path / "flights.csv"
+    path.write_text(CSV)
+    schema = {"city": CATEGORY, "year": int, "quarter": int, "fare": float, "miles": float}
+    return MyTable.from_file(str(path), schema=schema)
+
+
+@pytest.mark.parametrize("func", FUNCS)
+@pytest.mark.parametrize("by", [["city"], ["year", "quarter"], ["city", "year", "quarter"]])
+def test_numpy_matches_python(flights, by, func):
+    agg = {"fare": func, "miles": func}
+    grouped = flights.groupby(by)
+    assert_same(grouped.agg(agg, engine="numpy"), grouped.agg(agg, engine="python"))
+
+
+def test_group_without_numbers_is_none(flights):
+    for engine in ("numpy", "python"):
+        result = {row["city"]: row for row in flights.groupby(["city"]).agg(
+            {"fare": "sum", "miles": "count"}, engine=engine).rows}
+        assert result["Denver"]["fare_sum"] is None
+        assert result["Denver"]["miles_count"] is None
+
+
+def test_untyped_mixed_column():
+    # Guessed columns mixing numbers and text: only the numbers are aggregated
+    table = MyTable(["k", "v"], [{"k": "a", "v": 1}, {"k": "a", "v": "x"}, {"k": "b", "v": ""},
+                                 {"k": "a", "v": 2.5}, {"k": "b", "v": 4}])
+    for func in FUNCS:
+        grouped = table.groupby("k")
+        assert_same(grouped.agg({"v": func}, engine="numpy"), grouped.agg({"v": func}, engine="python"))
+
+
+def test_cached_index_groups(flights):
+    flights.create_index(["city", "year"])
+    grouped = flights.groupby(["city", "year"])
+    agg = {"fare": "median", "miles": "mean"}
+    assert_same(grouped.agg(agg, engine="numpy"), grouped.agg(agg, engine="python"))
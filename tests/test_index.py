@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable
+
+CITIES = ["Boston, MA", "Chicago, IL", "Denver, CO", "Miami, FL"]
+
+
+@pytest.fixture(params=["guessed", "categorical"])
+def flights(request, tmp_path):
+    rng = random.Random(0)
+    lines = ["city1,city2,Year,fare"]
+    for _ in range(300):
+        city1, city2 = rng.sample(CITIES, 2)
+        lines.append(f'"{city1}","{city2}",{rng.randint(2022, 2024)},{rng.choice(["", rng.randint(50, 400)])}')
+    path = tmp_path / "flights.csv"
+    path.write_text("\n".join(lines) + "\n")
+    schema = {"city1": CATEGORY, "city2": CATEGORY} if request.param == "categorical" else None
+    return MyTable.from_file(str(path), schema=schema)
+
+
+def scan(table, **conditions):
+    """The filter chain filter_eq replaces."""
+    for col, value in conditions.items():
+        table = table.filter(lambda row, col=col, value=value: row[col] == value)
+    return table.rows
+
+
+@pytest.mark.parametrize("conditions", [
+    {"city1": "Boston, MA"},
+    {"city1": "Boston, MA", "city2": "Miami, FL"},
+    {"city1": "Denver, CO", "city2": "Chicago, IL", "Year": 2023},
+    {"city1": "Boston, MA", "city2": "Boston, MA"},
+    {"city1": "Nowhere"},
+])
+def test_filter_eq_matches_scan(flights, conditions):
+    assert flights.filter_eq(**conditions).rows == scan(flights, **conditions)
+
+
+def test_filter_eq_uses_a_covering_index(flights):
+    index = flights.create_index(["city1", "city2"])
+    assert flights.create_index(("city1", "city2")) is index
+    flights.filter_eq(city1="Boston, MA", city2="Miami, FL", Year=2024)
+    # The existing index answered; no index was built for the three columns
+    assert list(flights._indexes) == [("city1", "city2")]
+    assert sum(len(positions) for positions in index.values()) == len(flights)
+
+
+def test_index_lookup(flights):
+    flights.create_index(["city1", "city2"])
+    key = ("Chicago, IL", "Denver, CO")
+    assert flights.index_lookup(key).rows == scan(flights, city1=key[0], city2=key[1])
+    assert flights.index_lookup("Miami, FL", ["city2"]).rows == scan(flights, city2="Miami, FL")
+    assert len(flights.index_lookup(("Nowhere", "Miami, FL"), ["city1", "city2"])) == 0
+    with pytest.raises(ValueError):
+        # Two indexes now: which one is ambiguous
+        flights.index_lookup(key)
+
+
+def test_derived_tables_start_without_indexes(flights):
+    flights.create_index(["city1"])
+    for derived in (flights.filter_eq(city1="Boston, MA"), flights.select(["city1", "fare"]),
+                    flights.drop_missing(["fare"]), flights.take([0, 1])):
+        assert derived._indexes == {}
+    boston = flights.filter_eq(city1="Boston, MA")
+    assert boston.filter_eq(city2="Miami, FL").rows == scan(flights, city1="Boston, MA", city2="Miami, FL")
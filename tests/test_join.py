@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable, _TakenColumn
+from dict_table import DictTable
+
+CITIES = ["Boston", "Chicago", "Denver", "Miami", "Austin"]
+COLUMNS = ["city1", "city2", "Year", "quarter", "fare"]
+
+
+def make_rows(n, seed):
+    rng = random.Random(seed)
+    return [
+        {"city1": city1, "city2": city2, "Year": rng.randint(2022, 2023), "quarter": rng.randint(1, 2),
+         "fare": rng.randint(50, 400)}
+        for city1, city2 in (rng.sample(CITIES, 2) for _ in range(n))
+    ]
+
+
+def read(tmp_path, name, rows, categorical):
+    path = tmp_path / name
+    path.write_text("\n".join([",".join(COLUMNS)] + [",".join(str(r[c]) for c in COLUMNS) for r in rows]) + "\n")
+    schema = {"city1": CATEGORY, "city2": CATEGORY} if categorical else None
+    return MyTable.from_file(str(path), schema=schema)
+
+
+@pytest.fixture(params=[False, True], ids=["text", "categorical"])
+def legs(request, tmp_path):
+    # Separate parses: categorical keys have different dictionaries on each side
+    legs1, legs2 = make_rows(80, 1), make_rows(50, 2)
+    return (read(tmp_path, "legs1.csv", legs1, request.param), read(tmp_path, "legs2.csv", legs2, request.param),
+            DictTable(COLUMNS, legs1), DictTable(COLUMNS, legs2))
+
+
+def with_string_key(table, city_col):
+    """The original connection key: one string per (city, Year, quarter)."""
+    rows = [dict(row, key=f"{row[city_col]}_{row['Year']}_{row['quarter']}") for row in table.rows]
+    return DictTable(table.columns + ["key"], rows)
+
+
+@pytest.mark.parametrize("strategy", ["auto", "hash", "merge"])
+def test_tuple_keys_match_string_key_join(legs, strategy):
+    left, right, left_reference, right_reference = legs
+    joined = left.join(right, left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"],
+                       strategy=strategy)
+    reference = with_string_key(left_reference, "city2").join(with_string_key(right_reference, "city1"), on="key")
+    assert joined.columns == COLUMNS
+    assert joined.rows == [{col: row[col] for col in COLUMNS} for row in reference.rows]
+
+
+@pytest.mark.parametrize("strategy", ["hash", "merge"])
+def test_strategies_agree_on_sorted_and_unsorted_input(legs, strategy):
+    left, right, _, _ = legs
+    keys = dict(left_on=["city2", "Year"], right_on=["city1", "Year"])
+    expected = left.join(right, **keys, strategy="hash").rows
+    assert left.join(right, **keys, strategy=strategy).rows == expected
+    # Sorted inputs take the merge path under "auto"; rows still come out in left order
+    by_key = lambda t, cols: t.take(sorted(range(len(t)), key=lambda i: tuple(t.rows[i][c] for c in cols)))
+    sorted_left, sorted_right = by_key(left, keys["left_on"]), by_key(right, keys["right_on"])
+    assert sorted_left.join(sorted_right, **keys, strategy="auto").rows == \
+        sorted_left.join(sorted_right, **keys, strategy="hash").rows
+
+
+def test_hash_side_does_not_change_order(legs):
+    left, right, left_reference, right_reference = legs
+    on = ["Year", "quarter"]
+    # Build on the smaller side either way round
+    assert left.join(right, on=on).rows == left_reference.join(right_reference, on=on).rows
+    assert right.join(left, on=on).rows == right_reference.join(left_reference, on=on).rows
+
+
+def test_result_columns_are_gathered_on_read(legs):
+    left, right, _, _ = legs
+    joined = left.join(right, left_on=["city2"], right_on=["city1"])
+    assert all(isinstance(column, _TakenColumn) and column._pending is not None for column in joined._data.values())
+    joined.column("fare")
+    assert joined._data["fare"]._pending is None and joined._data["Year"]._pending is not None
+
+
+def test_unknown_strategy(legs):
+    left, right, _, _ = legs
+    with pytest.raises(ValueError):
+        left.join(right, on="Year", strategy="nested")
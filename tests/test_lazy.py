@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from Mini_DataFrame import CATEGORY, MyTable, col
+
+CITIES = ["Boston, MA", "Chicago, IL", "Denver, CO", "Miami, FL"]
+SCHEMA = {"city1": CATEGORY, "city2": CATEGORY, "Year": int, "quarter": int, "fare": float}
+
+# Each query is a list of (method, args) steps, run eagerly on MyTable and lazily
+QUERIES = {
+    "select_then_drop": [("select", (["city1", "city2", "fare"],)), ("drop_missing", (None,))],
+    "fused_filters": [("filter", (col("fare") > 150,)), ("filter", (lambda r: r["quarter"] != 2,)),
+                      ("filter", ((col("Year") >= 2023) | col("city2").isin(["Miami, FL"]),))],
+    "filter_eq": [("filter_eq", ({"city1": "Boston, MA", "city2": "Denver, CO"},)), ("select", (["Year", "fare"],))],
+    "filter_after_select": [("select", (["city1", "fare", "extra"],)), ("filter", (col("extra") == "",)),
+                            ("filter", (lambda r: r.get("Year") is None,)), ("drop_missing", (["fare"],))],
+    "by_position": [("select", ([4, 0, 2],)), ("filter", (~col("fare").is_missing(),))],
+    "missing_column": [("filter", (col("nope") == None,)), ("select", (["city2"],))],  # noqa: E711
+    "drop_unknown": [("drop_missing", (["nope"],))],
+}
+
+
+@pytest.fixture
+def path(tmp_path):
+    rng = random.Random(0)
+    lines = ["city1,city2,Year,quarter,fare,carrier"]
+    for _ in range(400):
+        city1, city2 = rng.sample(CITIES, 2)
+        fare = rng.choice(["", "NA", f"{rng.uniform(50, 400):.2f}", f"{rng.uniform(50, 400):.2f}"])
+        lines.append(f'"{city1}","{city2}",{rng.randint(2021, 2024)},{rng.randint(1, 4)},{fare},{rng.choice("ABC")}')
+    path = tmp_path / "flights.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def run(table, steps):
+    for method, args in steps:
+        table = getattr(table, method)(*args)
+    return table
+
+
+@pytest.mark.parametrize("name", QUERIES)
+def test_lazy_matches_eager(path, name):
+    flights = MyTable.from_file(path, schema=SCHEMA)
+    eager = run(flights, QUERIES[name])
+    for lazy in (run(flights.lazy(), QUERIES[name]), run(MyTable.scan_file(path, schema=SCHEMA), QUERIES[name])):
+        result = lazy.collect()
+        assert result.columns == eager.columns
+        assert result.rows == eager.rows
+
+
+def test_indexed_equality_starts_from_the_index(path):
+    flights = MyTable.from_file(path, schema=SCHEMA)
+    flights.create_index(["city1", "city2"])
+    query = flights.lazy().filter_eq(city1="Chicago, IL", city2="Miami, FL").filter(col("fare") > 100)
+    plan = query.explain().splitlines()
+    assert "index lookup: ['city1', 'city2'] == ('Chicago, IL', 'Miami, FL')" in plan
+    # The index answers both equality tests; only the fare test is left
+    assert [line for line in plan if line.startswith("filter:")] == ["filter: (col('fare') > 100)"]
+    assert query.collect().rows == flights.filter_eq(city1="Chicago, IL", city2="Miami, FL").filter(
+        col("fare") > 100).rows
+
+
+def test_scan_parses_only_needed_columns(path):
+    query = MyTable.scan_file(path, schema=SCHEMA).filter(col("Year") == 2024).select(["city1", "fare"])
+    assert query.explain().splitlines()[0].endswith("parse columns ['city1', 'Year', 'fare']")
+    result = query.collect()
+    assert result._data.keys() == {"city1", "fare"}
+    assert len(result) == len(MyTable.from_file(path).filter(lambda r: r["Year"] == 2024))
+
+
+def test_lambda_sees_only_columns_visible_at_its_step(path):
+    seen = set()
+
+    def record(row):
+        seen.update(row.keys())
+        return True
+
+    MyTable.scan_file(path).select(["fare", "city2"]).filter(record).collect()
+    assert seen == {"fare", "city2"}
@@ -0,0 +1,68 @@
+import functools
+import random
+
+import pytest
+
+import Mini_DataFrame
+from Mini_DataFrame import CATEGORY, MyTable
+
+COLUMNS = ["Year", "quarter", "city1", "city2", "nsmiles", "fare", "note"]
+SCHEMA = {"Year": int, "quarter": int, "city1": CATEGORY, "city2": CATEGORY, "nsmiles": float, "fare": float}
+
+
+@pytest.fixture
+def path(tmp_path):
+    rng = random.Random(0)
+    cities = ["Boston, MA", "Chicago, IL", "Denver, CO", "Miami, FL", "Austin, TX"]
+    lines = [",".join(COLUMNS)]
+    for i in range(3000):
+        city1, city2 = rng.sample(cities, 2)
+        fare = rng.choice(["", f"{rng.uniform(50, 400):.2f}", f"{rng.uniform(50, 400):.2f}"])
+        # Quoted notes with delimiters and newlines, so some ranges would split inside a record
+        note = rng.choice(["", "plain", '"with, comma"', '"two\nlines"', '"quote "" inside"'])
+        line = f'{rng.randint(2020, 2024)},{rng.randint(1, 4)},"{city1}","{city2}",{rng.randint(100, 3000)},{fare},{note}'
+        if i % 997 == 5:
+            line += ",extra"
+        lines.append(line)
+    path = tmp_path / "flights.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    """Split even a small file into byte ranges (the default minimum is 8 MB per range)."""
+    monkeypatch.setattr(Mini_DataFrame, "_byte_ranges", functools.partial(Mini_DataFrame._byte_ranges, min_bytes=4096))
+
+
+@pytest.mark.parametrize("schema", [None, SCHEMA], ids=["guessed", "typed"])
+@pytest.mark.parametrize("usecols", [None, ["fare", "note", "city2"]])
+def test_parallel_parse_matches_serial(path, small_ranges, capsys, schema, usecols):
+    serial = MyTable.from_file(path, schema=schema, usecols=usecols, workers=1)
+    serial_warnings = capsys.readouterr().out
+    parallel = MyTable.from_file(path, schema=schema, usecols=usecols, workers=3)
+    parallel_warnings = capsys.readouterr().out
+
+    assert parallel.columns == serial.columns
+    assert parallel.rows == serial.rows
+    assert {c: parallel._data[c].kind for c in parallel.columns} == {c: serial._data[c].kind for c in serial.columns}
+    # Same warnings, in file order, with the serial parse's line numbers
+    assert parallel_warnings == serial_warnings
+    assert serial_warnings.count("Truncating extras") == 4
+
+
+def test_ranges_start_at_records(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    ranges = Mini_DataFrame._byte_ranges(path, 1, 8, min_bytes=4096)
+    assert len(ranges) == 8
+    assert ranges[0][0] == data.index(b"\n") + 1 and ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+        # Even number of quotes before a boundary: it is not inside a quoted field
+        assert data[:start].count(b'"') % 2 == 0 and data[start - 1:start] == b"\n"
+
+
+def test_small_files_parse_serially(path):
+    assert Mini_DataFrame._byte_ranges(path, 1, 8) == []
+    assert MyTable.from_file(path, workers=None).rows == MyTable.from_file(path).rows
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+import Mini_DataFrame
+from Mini_DataFrame import CATEGORY, MyTable
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+SCHEMA = {"Year": int, "quarter": int, "city1": CATEGORY, "city2": CATEGORY, "nsmiles": int, "fare": float}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = random.Random(0)
+    cities = ["Boston, MA", "Chicago, IL", "Denver, CO", "Miami, FL"]
+    lines = ["Year,quarter,city1,city2,nsmiles,fare,carrier"]
+    for _ in range(2000):
+        city1, city2 = rng.sample(cities, 2)
+        fare = rng.choice(["", f"{rng.uniform(50, 400):.2f}", f"{rng.uniform(50, 400):.2f}"])
+        lines.append(f'{rng.randint(2015, 2024)},{rng.randint(1, 4)},"{city1}","{city2}",'
+                     f'{rng.choice(["", rng.randint(100, 3000)])},{fare},{rng.choice(["AA", "DL", ""])}')
+    path = tmp_path / "flights.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture(params=[None, SCHEMA], ids=["guessed", "typed"])
+def flights(request, csv_path):
+    return MyTable.from_file(csv_path, schema=request.param)
+
+
+def assert_same_kinds(loaded, flights):
+    for col in flights.columns:
+        kind = flights._data[col].kind
+        # A guessed column of numbers and many blanks is an "object" column; it comes back numeric
+        assert loaded._data[col].kind == (kind if kind != "object" else "int"), col
+
+
+def test_parquet_round_trip_equals_csv_load(flights, tmp_path):
+    path = str(tmp_path / "flights.parquet")
+    flights.to_parquet(path, row_group_size=300)
+    loaded = MyTable.from_parquet(path)
+    assert loaded.columns == flights.columns
+    assert loaded.rows == flights.rows
+    assert_same_kinds(loaded, flights)
+
+    assert MyTable.from_parquet(path, columns=["fare", "city1"]).rows == flights.select(["fare", "city1"]).rows
+    with pytest.raises(ValueError):
+        MyTable.from_parquet(path, columns=["nope"])
+
+
+def test_arrow_ipc_round_trip_equals_csv_load(flights, tmp_path):
+    path = str(tmp_path / "flights.arrow")
+    flights.to_arrow_ipc(path)
+    loaded = MyTable.from_arrow_ipc(path)
+    assert loaded.rows == flights.rows
+    assert_same_kinds(loaded, flights)
+    assert MyTable.from_arrow_ipc(path, columns=["city2", "Year"]).rows == flights.select(["city2", "Year"]).rows
+
+
+@pytest.mark.parametrize("ranges", [{"Year": (2019, 2024)}, {"Year": 2016, "quarter": (2, 3)}])
+def test_ranges_skip_row_groups_and_filter_exactly(flights, tmp_path, ranges):
+    path = str(tmp_path / "flights.parquet")
+    flights.to_parquet(path, row_group_size=200, sort_by=["Year", "quarter"])
+
+    loaded = MyTable.from_parquet(path, columns=["city1", "fare"], ranges=ranges)
+    bounds = {name: b if isinstance(b, tuple) else (b, b) for name, b in ranges.items()}
+    expected = flights.filter(lambda r: all(low <= r[name] <= high for name, (low, high) in bounds.items()))
+    assert loaded.columns == ["city1", "fare"]
+    assert sorted(map(repr, loaded.rows)) == sorted(map(repr, expected.select(["city1", "fare"]).rows))
+
+    metadata = pq.ParquetFile(path).metadata
+    read = Mini_DataFrame._parquet_row_groups(metadata, bounds)
+    assert 0 < len(read) < metadata.num_row_groups
+    # Every group holding a matching row is read
+    assert len(expected) <= sum(metadata.row_group(g).num_rows for g in read)
@@ -0,0 +1,86 @@
+import random
+
+from Mini_DataFrame import MyTable
+from Route_Graph import RouteGraph
+
+CITIES = ["A", "B", "C", "D", "E", "F"]
+COLUMNS = ["Year", "quarter", "city1", "city2", "fare", "nsmiles"]
+
+
+def make_flights(n=600, seed=0, same_city=False):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        city1, city2 = rng.sample(CITIES, 2)
+        if same_city and rng.random() < 0.05:
+            city2 = city1
+        rows.append({
+            "Year": rng.randint(2022, 2024), "quarter": rng.randint(1, 2), "city1": city1, "city2": city2,
+            # Blank and zero fares are not legs; a blank distance counts as 0 miles
+            "fare": rng.choice(["", 0, round(rng.uniform(50, 400), 2), round(rng.uniform(50, 400), 2)]),
+            "nsmiles": rng.choice(["", rng.randint(100, 2000), rng.randint(100, 2000)]),
+        })
+    return MyTable(COLUMNS, rows)
+
+
+def miles(value):
+    return value if isinstance(value, (int, float)) else 0
+
+
+def baseline(flights, origin, dest):
+    """The 1-stop search the graph replaced: join_reduce of departing and arriving rows."""
+    best = flights.filter_eq(city1=origin).join_reduce(
+        flights.filter_eq(city2=dest),
+        left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"],
+        key_fn=lambda leg1, leg2: (leg1["Year"], leg1["quarter"]),
+        order_by=lambda leg1, leg2: (miles(leg1["nsmiles"]) + miles(leg2["nsmiles"]), leg1["fare"] + leg2["fare"]),
+        where=lambda leg1, leg2: all(isinstance(leg["fare"], (int, float)) and leg["fare"] > 0 for leg in (leg1, leg2)),
+        suffixes=("_leg1", "_leg2"),
+    )
+    return sorted(
+        (row["Year"], row["quarter"], row["city2_leg1"],
+         miles(row["nsmiles_leg1"]) + miles(row["nsmiles_leg2"]), row["fare_leg1"] + row["fare_leg2"])
+        for row in best.rows
+    )
+
+
+def graph_answer(graph, origin, dest):
+    return [
+        (it["Year"], it["quarter"], it["cities"][1], it["nsmiles_total"], it["fare_total"])
+        for it in graph.best_per_period(origin, dest, stops=1)
+    ]
+
+
+def test_one_stop_matches_join_reduce():
+    flights = make_flights()
+    graph = RouteGraph.from_table(flights)
+    for origin in CITIES:
+        for dest in CITIES:
+            if origin != dest:
+                assert graph_answer(graph, origin, dest) == baseline(flights, origin, dest), (origin, dest)
+
+
+def test_same_city_rows_are_not_legs():
+    # Unlike the baseline join, the graph skips same-city rows: they could
+    # only connect through the origin or the destination
+    flights = make_flights(same_city=True)
+    other_city = flights.filter(lambda r: r["city1"] != r["city2"])
+    assert len(other_city) < len(flights)
+    graph = RouteGraph.from_table(flights)
+    for origin in CITIES:
+        for dest in CITIES:
+            if origin != dest:
+                assert graph_answer(graph, origin, dest) == baseline(other_city, origin, dest), (origin, dest)
+
+
+def test_count_matches_join():
+    flights = make_flights()
+    graph = RouteGraph.from_table(flights)
+    legs = [r for r in flights.rows if isinstance(r["fare"], (int, float)) and r["fare"] > 0]
+    for origin, dest in [("A", "B"), ("C", "F"), ("E", "A")]:
+        expected = sum(
+            1 for leg1 in legs if leg1["city1"] == origin and leg1["city2"] != dest
+            for leg2 in legs if leg2["city2"] == dest and leg2["city1"] == leg1["city2"]
+            and (leg2["Year"], leg2["quarter"]) == (leg1["Year"], leg1["quarter"])
+        )
+        assert graph.count(origin, dest) == expected
@@ -0,0 +1,37 @@
+import random
+
+from Fare_Projection import project_route, project_sampled_route
+from Mini_DataFrame import MyTable
+
+
+def make_route(rows_per_quarter=200, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for year in range(2017, 2025):
+        for quarter in range(1, 5):
+            level = 200 * 1.04 ** (year - 2017) + 10 * quarter
+            for _ in range(rows_per_quarter):
+                rows.append({"city1": "A", "city2": "B", "Year": year, "quarter": quarter,
+                             "fare": round(rng.gauss(level, 60), 2)})
+    return MyTable(["city1", "city2", "Year", "quarter", "fare"], rows)
+
+
+def test_bounds_cover_exact_projection_near_nominal():
+    route = make_route()
+    exact = project_route(route)
+    inside = total = 0
+    for seed in range(40):
+        sample = route.sample_by(["city1", "city2", "Year", "quarter"], size=20, seed=seed)
+        for e, a in zip(exact, project_sampled_route(sample)):
+            assert a['projected_fare_low'] <= a['projected_fare'] <= a['projected_fare_high']
+            inside += a['projected_fare_low'] <= e['projected_fare'] <= a['projected_fare_high']
+            total += 1
+    assert 0.88 <= inside / total <= 1.0
+
+
+def test_whole_strata_give_exact_projection_and_empty_bounds():
+    route = make_route(rows_per_quarter=5)
+    sample = route.sample_by(["city1", "city2", "Year", "quarter"], size=20)
+    for e, a in zip(project_route(route), project_sampled_route(sample)):
+        assert a['projected_fare'] == e['projected_fare']
+        assert a['projected_fare_low'] == a['projected_fare_high'] == e['projected_fare']
@@ -0,0 +1,112 @@
+import os
+from collections import Counter
+
+import pytest
+
+import Flight_Shards
+from Flight_Dataset import REQUIRED_COLUMNS, FlightDataset, read_flights
+from Flight_Shards import CURRENT, ShardStore, get_shards, repartition, shards_path_for
+
+ROUTES = [("A", "B"), ("A", "C"), ("C", "B"), ("B", "A"), ("D", "C"), ("C", "D"), ("D", "B")]
+
+
+def write_flights(path):
+    lines = [",".join(REQUIRED_COLUMNS)]
+    for n, (city1, city2) in enumerate(ROUTES):
+        for year in (2022, 2023, 2024):
+            for quarter in (1, 2):
+                fare = 100 + 10 * n + year - 2022 + quarter
+                lines.append(f"{year},{quarter},1,2,{city1},{city2},1,2,{city1}X,{city2}X,{300 + n},{fare},{fare - 20}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "flights.csv"
+    write_flights(path)
+    return str(path)
+
+
+@pytest.fixture
+def full(csv_path):
+    return FlightDataset(read_flights(csv_path))
+
+
+def row_counter(table):
+    return Counter(tuple(sorted(row.items())) for row in table.rows)
+
+
+def test_round_trip(csv_path, full):
+    directory, n_origins, n_dests = repartition(full.flights, csv_path)
+    store = ShardStore(shards_path_for(csv_path), csv_path)
+
+    assert os.path.dirname(directory) == shards_path_for(csv_path)
+    assert (n_origins, n_dests) == (4, 4)
+    assert store.origin_cities == sorted(full.origin_cities)
+    assert store.dest_cities == sorted(full.dest_cities)
+    for city in store.origin_cities:
+        assert row_counter(store.departing(city)) == row_counter(full.departing(city))
+    for city in store.dest_cities:
+        assert row_counter(store.arriving(city)) == row_counter(full.arriving(city))
+
+
+def test_for_cities_contents(csv_path, full):
+    repartition(full.flights, csv_path)
+    store = ShardStore(shards_path_for(csv_path), csv_path)
+
+    dataset = store.for_cities("A", "B")
+    assert dataset.partial and dataset.max_stops == 1
+    # Rows departing A plus rows arriving at B, the direct route's only once
+    expected = row_counter(full.departing("A")) + row_counter(full.arriving("B").filter(lambda r: r["city1"] != "A"))
+    assert row_counter(dataset.flights) == expected
+    assert row_counter(dataset.route("A", "B")) == row_counter(full.route("A", "B"))
+    assert dataset.connection_count("A", "B") == full.connection_count("A", "B")
+    assert dataset.connections("A", "B") == full.connections("A", "B")
+    assert dataset.projection("A", "B") == full.projection("A", "B")
+
+    # Cached per selection; one result cache for all selections
+    assert store.for_cities("A", "B") is dataset
+    assert store.for_cities("D", "C").results is dataset.results
+
+    nothing = store.for_cities("", "")
+    assert nothing.partial and len(nothing.flights) == 0
+
+
+def test_stale_csv_is_detected(csv_path, full):
+    repartition(full.flights, csv_path)
+    store = ShardStore(shards_path_for(csv_path), csv_path)
+    assert store.is_fresh()
+
+    with open(csv_path, "a") as f:
+        f.write("2024,3,1,2,A,B,1,2,AX,BX,300,150,120\n")
+    assert not store.is_fresh()
+    with pytest.raises(ValueError):
+        ShardStore(shards_path_for(csv_path), csv_path)
+
+
+def test_get_shards_ignores_stale_or_missing_shards(csv_path, full, monkeypatch):
+    monkeypatch.setattr(Flight_Shards, "_store", None)
+    assert get_shards(csv_path) is None
+
+    repartition(full.flights, csv_path)
+    store = get_shards(csv_path)
+    assert store is not None and get_shards(csv_path) is store
+
+    os.utime(csv_path, ns=(0, 0))
+    assert get_shards(csv_path) is None
+
+
+def test_repartition_switches_sets(csv_path, full):
+    root = shards_path_for(csv_path)
+    first, _, _ = repartition(full.flights, csv_path)
+    store = ShardStore(root, csv_path)
+    second, _, _ = repartition(full.flights, csv_path)
+    third, _, _ = repartition(full.flights, csv_path)
+
+    with open(os.path.join(root, CURRENT)) as f:
+        assert f.read() == os.path.basename(third)
+    assert not store.is_fresh()
+    # The previous set stays for readers still loading from it; older ones go
+    assert sorted(os.listdir(root)) == sorted([CURRENT, os.path.basename(second), os.path.basename(third)])
+    assert not os.path.exists(first)
+    assert ShardStore(root, csv_path).set_dir == third
@@ -0,0 +1,129 @@
+import math
+import random
+
+import pytest
+
+import Flight_Dataset
+from Flight_Dataset import FLIGHT_SCHEMA, REQUIRED_COLUMNS, append_data, get_dataset, invalidate_dataset, read_flights
+from Mini_DataFrame import col
+from SQLite_Table import SQLiteTable
+
+CITIES = ["Boston, MA", "Chicago, IL", "Denver, CO", "Miami, FL"]
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = random.Random(0)
+    lines = [",".join(REQUIRED_COLUMNS)]
+    for _ in range(400):
+        city1, city2 = rng.sample(CITIES, 2)
+        fare = rng.choice(["", f"{rng.uniform(50, 400):.2f}"])
+        airport_1 = "" if rng.random() < 0.02 else city1[:3].upper()
+        lines.append(f"{rng.randint(2020, 2024)},{rng.randint(1, 4)},1,2,\"{city1}\",\"{city2}\",1,2,"
+                     f"{airport_1},{city2[:3].upper()},{rng.randint(100, 2000)},{fare},{rng.randint(40, 90)}")
+    path = tmp_path / "flights.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def tables(csv_path, tmp_path):
+    memory = read_flights(csv_path, workers=1)
+    sqlite = SQLiteTable.from_file(csv_path, str(tmp_path / "flights.sqlite"), schema=FLIGHT_SCHEMA,
+                                   usecols=REQUIRED_COLUMNS, drop_missing=["city1", "city2", "airport_1", "airport_2"],
+                                   indexes=[["city1", "city2", "Year", "quarter"]])
+    return sqlite, memory
+
+
+def assert_same(left, right):
+    left, right = left.rows, right.rows
+    assert len(left) == len(right)
+    for a, b in zip(left, right):
+        assert a.keys() == b.keys()
+        for key in a:
+            if isinstance(a[key], float) or isinstance(b[key], float):
+                assert math.isclose(a[key], b[key], rel_tol=1e-9), (key, a, b)
+            else:
+                assert a[key] == b[key], (key, a, b)
+
+
+def test_load_matches_mytable(tables):
+    sqlite, memory = tables
+    assert len(sqlite) == len(memory)
+    assert sqlite.columns == memory.columns
+    assert sqlite.rows == memory.rows
+    assert set(sqlite.categories("city1")) == set(memory.categories("city1"))
+
+
+def test_filters_match_mytable(tables):
+    sqlite, memory = tables
+    assert_same(sqlite.filter_eq(city1="Boston, MA", city2="Miami, FL"),
+                memory.filter_eq(city1="Boston, MA", city2="Miami, FL"))
+    expr = (col("city1") == "Chicago, IL") & ((col("fare") > 200) | ~(col("Year") >= 2022)) & col("quarter").isin([1, 3])
+    assert_same(sqlite.filter(expr), memory.filter(expr))
+    assert_same(sqlite.filter(lambda r: r["fare"] == ""), memory.filter(lambda r: r["fare"] == ""))
+    assert_same(sqlite.drop_missing(["fare"]), memory.drop_missing(["fare"]))
+    assert_same(sqlite.select(["city2", "fare", "nope"]), memory.select(["city2", "fare", "nope"]))
+
+
+def test_take_and_index_match_mytable(tables):
+    sqlite, memory = tables
+    assert_same(sqlite.take([5, 3, 5, 0]), memory.take([5, 3, 5, 0]))
+    key = ("Denver, CO", "Boston, MA")
+    assert sqlite.create_index(["city1", "city2"]).get(key) == memory.create_index(["city1", "city2"]).get(key)
+
+
+@pytest.mark.parametrize("agg_map", [
+    {"fare": "mean", "nsmiles": "sum", "fare_low": "median", "Year": "count"},
+    {"fare": "min", "nsmiles": "max"},
+])
+def test_groupby_matches_mytable(tables, agg_map):
+    sqlite, memory = tables
+    by = ["city1", "Year", "quarter"]
+    assert_same(sqlite.groupby(by).agg(agg_map), memory.groupby(by).agg(agg_map, engine="python"))
+
+
+def test_streaming_functions_match_mytable(tables):
+    sqlite, memory = tables
+    agg_map = {"fare": "std", "nsmiles": "p90"}
+    assert_same(sqlite.filter_eq(city1="Miami, FL").groupby(["Year"]).agg(agg_map),
+                memory.filter_eq(city1="Miami, FL").groupby(["Year"]).agg(agg_map))
+
+
+@pytest.mark.parametrize("how", ["inner", "left", "right", "outer"])
+def test_join_matches_mytable(tables, how):
+    sqlite, memory = tables
+    keys = dict(left_on=["city2", "Year", "quarter"], right_on=["city1", "Year", "quarter"], how=how)
+    assert_same(sqlite.filter_eq(city1="Boston, MA").join(sqlite.filter_eq(city2="Miami, FL"), **keys),
+                memory.filter_eq(city1="Boston, MA").join(memory.filter_eq(city2="Miami, FL"), **keys))
+
+
+def test_reopen_checks_source(tables, csv_path, tmp_path):
+    sqlite, _ = tables
+    db_path = str(tmp_path / "flights.sqlite")
+    assert SQLiteTable.open(db_path).rows == sqlite.rows
+
+    reopened = SQLiteTable.from_table(sqlite.collect(), str(tmp_path / "copy.sqlite"), source=csv_path)
+    assert len(SQLiteTable.open(str(tmp_path / "copy.sqlite"), source=csv_path)) == len(reopened)
+    with open(csv_path, "a") as f:
+        f.write("2024,1,1,2,Boston,Miami,1,2,BOS,MIA,1200,150,90\n")
+    with pytest.raises(ValueError):
+        SQLiteTable.open(str(tmp_path / "copy.sqlite"), source=csv_path)
+
+
+def test_append_data_refuses_sqlite_backend(csv_path, tmp_path, monkeypatch):
+    new_path = tmp_path / "new.csv"
+    new_path.write_text(",".join(REQUIRED_COLUMNS) + "\n2024,1,1,2,Boston,Miami,1,2,BOS,MIA,1200,150,90\n")
+    monkeypatch.setattr(Flight_Dataset, "DATA_BACKEND", "sqlite")
+    before = open(csv_path).read()
+    try:
+        dataset = get_dataset(csv_path)
+        rows = len(dataset.flights)
+        with pytest.raises(ValueError, match="in-memory backend"):
+            append_data(str(new_path), csv_path)
+        with pytest.raises(TypeError):
+            dataset.append(read_flights(str(new_path)))
+        assert len(dataset.flights) == rows
+        assert open(csv_path).read() == before
+    finally:
+        invalidate_dataset()
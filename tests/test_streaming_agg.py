@@ -0,0 +1,76 @@
+import math
+import random
+
+import pytest
+
+from Mini_DataFrame import MyTable
+from Streaming_Agg import TDIGEST_BUFFER, StreamingAgg
+
+EXACT_FUNCS = ("sum", "count", "mean", "min", "max")
+
+
+def make_table(n=3000, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        rows.append({
+            "city": rng.choice(["Boston", "Chicago", "Denver"]),
+            "quarter": rng.randint(1, 4),
+            "fare": rng.choice([None, "", round(rng.uniform(50, 500), 2)]),
+            "miles": rng.randint(100, 3000),
+        })
+    return MyTable(["city", "quarter", "fare", "miles"], rows)
+
+
+def assert_close(left, right):
+    assert left.columns == right.columns
+    assert len(left.rows) == len(right.rows)
+    for a, b in zip(left.rows, right.rows):
+        for key in a:
+            if isinstance(a[key], float) or isinstance(b[key], float):
+                assert math.isclose(a[key], b[key], rel_tol=1e-9), (key, a, b)
+            else:
+                assert a[key] == b[key], (key, a, b)
+
+
+@pytest.mark.parametrize("func", EXACT_FUNCS)
+@pytest.mark.parametrize("by", [["city"], ["city", "quarter"]])
+def test_result_matches_groupby_agg(func, by):
+    table = make_table()
+    agg_map = {"fare": func, "miles": func}
+    streamed = StreamingAgg(by, agg_map).add_table(table).result()
+    assert_close(streamed, table.groupby(by).agg(agg_map, engine="python"))
+
+
+@pytest.mark.parametrize("agg_map", [{"fare": "mean", "miles": "max"}, {"fare": "count", "miles": "sum"}])
+def test_merge_across_chunks_matches_one_pass(agg_map):
+    table = make_table()
+    by = ["city", "quarter"]
+    bounds = [0, 700, 1900, len(table)]
+    merged = StreamingAgg(by, agg_map)
+    for start, stop in zip(bounds, bounds[1:]):
+        merged.merge(StreamingAgg(by, agg_map).add_table(table.take(range(start, stop))))
+    assert_close(merged.result(), StreamingAgg(by, agg_map).add_table(table).result())
+    assert_close(merged.result(), table.groupby(by).agg(agg_map, engine="python"))
+
+
+def test_merge_rejects_other_agg_map():
+    with pytest.raises(ValueError):
+        StreamingAgg(["city"], {"fare": "mean"}).merge(StreamingAgg(["city"], {"fare": "sum"}))
+
+
+def test_tdigest_rank_error_beyond_buffer():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(5, 0.5) for _ in range(40 * TDIGEST_BUFFER)]
+    table = MyTable(["g", "fare"], [{"g": 1, "fare": v} for v in values])
+    funcs = {"p1": 0.01, "p10": 0.1, "median": 0.5, "p90": 0.9, "p99": 0.99}
+    ordered = sorted(values)
+    for func, q in funcs.items():
+        # Chunks of the values merged together, as agg_file's workers do
+        state = StreamingAgg(["g"], {"fare": func})
+        for start in range(0, len(table), 3 * TDIGEST_BUFFER):
+            state.merge(StreamingAgg(["g"], {"fare": func}).add_table(
+                table.take(range(start, min(start + 3 * TDIGEST_BUFFER, len(table))))))
+        estimate = state.result().rows[0]["fare_" + func]
+        rank = sum(v <= estimate for v in ordered) / len(ordered)
+        assert abs(rank - q) <= 0.01, (func, rank)